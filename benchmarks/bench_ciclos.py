@@ -0,0 +1,34 @@
+from itertools import islice
+
+import pytest
+
+from cargas import SEMANAS_DST
+from pyerse.ciclos import Ciclo_Diario, Ciclo_Semanal
+
+
+@pytest.mark.parametrize("ciclo", [Ciclo_Semanal, Ciclo_Diario])
+def test_get_periodo_horario_ano(benchmark, ciclo, ano_datetimes):
+    benchmark(lambda: [ciclo.get_periodo_horario(t) for t in ano_datetimes])
+
+
+def test_classify_many_ano(benchmark, ano_15min):
+    instantes, _ = ano_15min
+    benchmark(Ciclo_Semanal.classify_many, instantes)
+
+
+def test_classify_epoch_ano(benchmark, ano_15min):
+    instantes, _ = ano_15min
+    epochs = instantes.astype("datetime64[s]").astype("int64")
+    benchmark(Ciclo_Semanal.classify_epoch, epochs)
+
+
+@pytest.mark.parametrize("semana", sorted(SEMANAS_DST))
+@pytest.mark.parametrize("ciclo", [Ciclo_Semanal, Ciclo_Diario])
+def test_iter_intervalo_periodo_horario_dst(benchmark, ciclo, semana):
+    # Uma semana de intervalos à volta da mudança de hora
+    benchmark(lambda: list(islice(ciclo.iter_intervalo_periodo_horario(SEMANAS_DST[semana]), 7 * 8)))
+
+
+@pytest.mark.parametrize("semana", sorted(SEMANAS_DST))
+def test_intervalos_dst(benchmark, semana):
+    benchmark(lambda: list(islice(Ciclo_Semanal.intervalos(SEMANAS_DST[semana]), 7 * 8)))
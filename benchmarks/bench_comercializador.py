@@ -0,0 +1,61 @@
+from itertools import islice
+
+import pytest
+
+from cargas import SEMANAS_DST, plano
+from pyerse import centimos
+from pyerse.comercializador import Opcao_Horaria, custos_kWh_iva
+from pyerse.comparador import comparar
+
+np = pytest.importorskip("numpy")
+
+OPCOES = [Opcao_Horaria.BI_HORARIA, Opcao_Horaria.TRI_HORARIA]
+
+
+@pytest.mark.parametrize("opcao_horaria", OPCOES)
+def test_tarifa_actual_ano(benchmark, opcao_horaria, ano_datetimes):
+    p = plano(opcao_horaria)
+    benchmark(lambda: [p.tarifa_actual(t) for t in ano_datetimes])
+
+
+@pytest.mark.parametrize("semana", sorted(SEMANAS_DST))
+@pytest.mark.parametrize("opcao_horaria", OPCOES)
+def test_intervalo_dst(benchmark, opcao_horaria, semana):
+    p = plano(opcao_horaria)
+    benchmark(lambda: list(islice(p.intervalo(SEMANAS_DST[semana]), 7 * 6)))
+
+
+@pytest.mark.parametrize("opcao_horaria", list(Opcao_Horaria))
+def test_custo_kWh_final(benchmark, opcao_horaria):
+    p = plano(opcao_horaria)
+    consumos = [i / 10 for i in range(3000)]
+    benchmark(lambda: [p.custo_kWh_final(tarifa, kwh) for kwh in consumos for tarifa in p.tarifas])
+
+
+@pytest.mark.parametrize("opcao_horaria", list(Opcao_Horaria))
+def test_faturar_serie_ano(benchmark, opcao_horaria, ano_15min_meses):
+    p = plano(opcao_horaria)
+    benchmark(lambda: [p.faturar_serie(instantes, kwh) for instantes, kwh in ano_15min_meses])
+
+
+def test_comparar_ofertas_ano(benchmark, ofertas_com_precos, ano_15min_meses):
+    benchmark(lambda: [comparar(ofertas_com_precos, instantes, kwh) for instantes, kwh in ano_15min_meses])
+
+
+@pytest.fixture(scope="module")
+def carteira():
+    """Consumos mensais (kWh, tri-horária) e famílias numerosas de 100 000 faturas."""
+    rng = np.random.default_rng(0)
+    return np.round(rng.random((100_000, 3)) * 200, 3), rng.random(100_000) < 0.1
+
+
+def test_custos_kWh_iva_carteira(benchmark, carteira):
+    kwh, familia_numerosa = carteira
+    benchmark(custos_kWh_iva, Opcao_Horaria.TRI_HORARIA, [0.1, 0.17, 0.25], kwh, familia_numerosa)
+
+
+def test_centimos_carteira(benchmark, carteira):
+    kwh, familia_numerosa = carteira
+    p = plano(Opcao_Horaria.TRI_HORARIA)
+    wh = centimos.escalar(kwh, centimos.WH)
+    benchmark(centimos.faturar_array, p, wh, 30, familia_numerosa)
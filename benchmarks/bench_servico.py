@@ -0,0 +1,80 @@
+from datetime import datetime, timedelta
+import http.client
+import json
+import threading
+
+import pytest
+
+from pyerse.servico import ServicoTarifas, ServidorHTTP, plano_json
+
+LOTE = 1000
+
+PLANOS = [
+    {
+        "nome": f"{opcao}-{ciclo}",
+        "potencia": 6.9,
+        "opcao": opcao,
+        "ciclo": ciclo,
+        "precos": {"Vazio": 0.10, "Fora de Vazio": 0.19, "Cheias": 0.17, "Ponta": 0.25},
+        "preco_potencia": 0.3147,
+    }
+    for opcao in ("Bi-Horária", "Tri-Horária")
+    for ciclo in ("Ciclo Semanal", "Ciclo Diário")
+]
+
+
+def consultas(tipo):
+    inicio = datetime(2025, 3, 24)
+    return [
+        {"plano": PLANOS[i % len(PLANOS)]["nome"], "tipo": tipo, "kwh": 50,
+         "instante": (inicio + timedelta(minutes=17 * i)).isoformat()}
+        for i in range(LOTE)
+    ]
+
+
+@pytest.fixture(scope="module")
+def servico():
+    servico = ServicoTarifas()
+    for definicao in PLANOS:
+        servico.registar(definicao["nome"], plano_json(definicao))
+    return servico
+
+
+@pytest.fixture(scope="module")
+def ligacao(servico):
+    servidor = ServidorHTTP(servico, ("127.0.0.1", 0))
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    ligacao = http.client.HTTPConnection(*servidor.server_address)
+    yield ligacao
+    ligacao.close()
+    servidor.shutdown()
+    servidor.server_close()
+
+
+def enviar(ligacao, corpo):
+    ligacao.request("POST", "/consultas", body=corpo)
+    resposta = ligacao.getresponse()
+    assert resposta.status == 200
+    return resposta.read()
+
+
+@pytest.mark.parametrize("tipo", ["tarifa", "transicao", "preco"])
+def test_consultar_lote(benchmark, servico, tipo):
+    lote = consultas(tipo)
+    benchmark(servico.consultar, lote)
+    if benchmark.stats:  # None com --benchmark-disable
+        benchmark.extra_info["consultas_por_segundo"] = LOTE / benchmark.stats.stats.mean
+
+
+@pytest.mark.parametrize("tipo", ["tarifa", "transicao", "preco"])
+def test_http_lote(benchmark, ligacao, tipo):
+    corpo = json.dumps({"consultas": consultas(tipo)}).encode()
+    benchmark(enviar, ligacao, corpo)
+    if benchmark.stats:  # None com --benchmark-disable
+        benchmark.extra_info["consultas_por_segundo"] = LOTE / benchmark.stats.stats.mean
+
+
+def test_http_latencia(benchmark, ligacao):
+    # Uma consulta por pedido: latência de ida e volta
+    corpo = json.dumps({"consultas": [{"plano": PLANOS[0]["nome"]}]}).encode()
+    benchmark(enviar, ligacao, corpo)
@@ -0,0 +1,29 @@
+"""Cargas de trabalho realistas para os benchmarks."""
+
+from datetime import datetime
+
+from pyerse.comercializador import Opcao_Horaria, Plano, Tarifa
+
+INICIO_ANO = datetime(2025, 1, 1)
+LEITURAS_ANO = 365 * 96
+"""Leituras de 15 minutos num ano."""
+
+SEMANAS_DST = {
+    "marco": datetime(2025, 3, 26),
+    "outubro": datetime(2025, 10, 22),
+}
+"""Quarta-feira antes de cada mudança de hora de 2025 (último domingo de Março e de Outubro)."""
+
+PRECOS = {
+    Opcao_Horaria.SIMPLES: {Tarifa.NORMAL: 0.1600},
+    Opcao_Horaria.BI_HORARIA: {Tarifa.VAZIO: 0.1000, Tarifa.FORA_DE_VAZIO: 0.1900},
+    Opcao_Horaria.TRI_HORARIA: {Tarifa.VAZIO: 0.1000, Tarifa.CHEIAS: 0.1700, Tarifa.PONTA: 0.2500},
+}
+
+
+def plano(opcao_horaria, ciclo="Ciclo Semanal", desconto=0.0):
+    p = Plano(6.9, opcao_horaria, ciclo)
+    for tarifa, preco in PRECOS[opcao_horaria].items():
+        p.definir_custo_kWh(tarifa, round(preco * (1 - desconto), 4))
+    p.definir_custo_potencia(0.3147)
+    return p
@@ -0,0 +1,53 @@
+"""Cargas de trabalho partilhadas pelos benchmarks (ver README)."""
+
+from datetime import timedelta
+
+import pytest
+
+from cargas import INICIO_ANO, LEITURAS_ANO, PRECOS
+from pyerse.comercializador import Comercializador, Opcao_Horaria
+
+np = pytest.importorskip("numpy")
+
+
+@pytest.fixture(scope="session")
+def ano_datetimes():
+    """Um ano de instantes de 15 em 15 minutos (datetime)."""
+    return [INICIO_ANO + timedelta(minutes=15 * i) for i in range(LEITURAS_ANO)]
+
+
+@pytest.fixture(scope="session")
+def ano_15min():
+    """Um ano de leituras de 15 minutos: (instantes datetime64[m], kWh)."""
+    instantes = np.datetime64(INICIO_ANO, "m") + np.arange(LEITURAS_ANO) * np.timedelta64(15, "m")
+    horas = (instantes.astype("datetime64[h]").astype(np.int64) % 24).astype(np.float64)
+    kwh = 0.05 + 0.15 * np.exp(-((horas - 20) ** 2) / 8) + np.random.default_rng(0).random(LEITURAS_ANO) * 0.02
+    return instantes, kwh
+
+
+@pytest.fixture(scope="session")
+def ano_15min_meses(ano_15min):
+    """As leituras de ano_15min separadas por mês (faturar_serie e comparar faturam um mês)."""
+    instantes, kwh = ano_15min
+    inicios = np.flatnonzero(np.diff(instantes.astype("datetime64[M]"))) + 1
+    return list(zip(np.split(instantes, inicios), np.split(kwh, inicios)))
+
+
+@pytest.fixture(scope="session")
+def ofertas():
+    """24 ofertas: 3 opções horárias x 2 ciclos x 4 níveis de preço."""
+    return [
+        Comercializador(f"{opcao_horaria.value} {ciclo} {i}", 6.9, opcao_horaria, ciclo)
+        for opcao_horaria in Opcao_Horaria
+        for ciclo in ("Ciclo Semanal", "Ciclo Diário")
+        for i in range(4)
+    ]
+
+
+@pytest.fixture(scope="session")
+def ofertas_com_precos(ofertas):
+    for i, oferta in enumerate(ofertas):
+        for tarifa, preco in PRECOS[oferta.plano.opcao_horaria].items():
+            oferta.plano.definir_custo_kWh(tarifa, round(preco * (1 - 0.02 * (i % 4)), 4))
+        oferta.plano.definir_custo_potencia(0.3147)
+    return ofertas
@@ -0,0 +1 @@
+from pyerse.estatisticas import stats
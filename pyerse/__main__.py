@@ -1,11 +1,119 @@
+import argparse
+from contextlib import nullcontext
 import sys
 
+from pyerse.ciclos import MAPPING as CYCLE_MAPPING
+from pyerse.comercializador import Opcao_Horaria, Plano, PlanoException, Tarifa, POTENCIA
+
+
+def _preco(valor):
+    """Converte "Tarifa=preço" em (Tarifa, float)."""
+    try:
+        tarifa, preco = valor.split("=")
+        return Tarifa(tarifa), float(preco)
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            f"Preço inválido {valor!r}, usar TARIFA=PRECO com TARIFA em {[t.value for t in Tarifa]}"
+        )
+
+
+def _parser():
+    parser = argparse.ArgumentParser(prog="pyerse", description="Ferramentas ERSE")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+
+    faturar = comandos.add_parser(
+        "faturar", help="Agrega por Tarifa e por mês um perfil de carga em CSV e estima a fatura"
+    )
+    faturar.add_argument("ficheiro", help="CSV com as leituras ('-' para stdin)")
+    faturar.add_argument("--potencia", type=float, required=True, choices=POTENCIA)
+    faturar.add_argument(
+        "--opcao", required=True, type=Opcao_Horaria, choices=list(Opcao_Horaria), metavar="OPCAO",
+        help=f"Opção horária: {', '.join(o.value for o in Opcao_Horaria)}",
+    )
+    faturar.add_argument("--ciclo", choices=list(CYCLE_MAPPING), help="Ciclo (obrigatório excepto na opção simples)")
+    faturar.add_argument(
+        "--preco", type=_preco, action="append", default=[], metavar="TARIFA=PRECO",
+        help="Custo em Euros por kWh de uma tarifa (repetir para cada tarifa)",
+    )
+    faturar.add_argument("--preco-potencia", type=float, help="Custo em Euros por dia da potência")
+    faturar.add_argument("--familia-numerosa", action="store_true")
+    faturar.add_argument("--coluna-data", default="timestamp")
+    faturar.add_argument("--coluna-kwh", default="kwh")
+    faturar.add_argument("--delimitador", default=",")
+    faturar.add_argument("--decimal", default=".")
+    faturar.add_argument("--bloco", type=int, default=100_000, help="Leituras processadas de cada vez")
+    faturar.add_argument("--output", "-o", default="-", help="Ficheiro do resumo ('-' para stdout)")
+    faturar.set_defaults(erro=faturar.error)
+
+    serve = comandos.add_parser("serve", help="Serviço local de consulta de tarifas (ver pyerse.servico)")
+    serve.add_argument("--endereco", default="127.0.0.1")
+    serve.add_argument("--porta", type=int, default=8080)
+    serve.add_argument("--socket", help="Socket Unix a usar em vez de TCP")
+    serve.add_argument("--planos", help="JSON com a lista de planos a registar (formato de POST /planos)")
+
+    return parser
+
+
+def serve(args):
+    import json
+    from pyerse import servico
+
+    tarifas = servico.ServicoTarifas()
+    if args.planos:
+        with open(args.planos) as ficheiro:
+            for definicao in json.load(ficheiro):
+                tarifas.registar(definicao["nome"], servico.plano_json(definicao))
+
+    if args.socket:
+        servidor = servico.ServidorUnix(tarifas, args.socket)
+    else:
+        servidor = servico.ServidorHTTP(tarifas, (args.endereco, args.porta))
+    with servidor:
+        try:
+            servidor.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+def faturar(args):
+    from pyerse import leituras
+
+    try:
+        plano = Plano(args.potencia, args.opcao, args.ciclo)
+    except PlanoException as erro:
+        # e.g. opção bi-horária sem --ciclo
+        args.erro(str(erro))
+    for tarifa, preco in args.preco:
+        plano.definir_custo_kWh(tarifa, preco)
+    if args.preco_potencia is not None:
+        plano.definir_custo_potencia(args.preco_potencia)
+
+    precos = {tarifa for tarifa, _ in args.preco}
+    com_custos = args.preco_potencia is not None and precos.issuperset(plano.tarifas)
+
+    entrada = nullcontext(sys.stdin) if args.ficheiro == "-" else open(args.ficheiro, newline="")
+    with entrada as entrada:
+        blocos = leituras.ler_csv(
+            entrada, args.coluna_data, args.coluna_kwh, args.delimitador, args.decimal, args.bloco
+        )
+        agregados = leituras.agregar(plano, blocos)
+
+    saida = nullcontext(sys.stdout) if args.output == "-" else open(args.output, "w", newline="")
+    with saida as saida:
+        leituras.escrever_resumo(plano, agregados, saida, args.familia_numerosa, com_custos)
+
 
 def main(args=None):
     """The main routine."""
     if args is None:
         args = sys.argv[1:]
 
+    args = _parser().parse_args(args)
+    if args.comando == "faturar":
+        faturar(args)
+    elif args.comando == "serve":
+        serve(args)
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,143 @@
+"""Custo do mês corrente actualizado leitura a leitura, para leituras recebidas em tempo real.
+
+    acumulador = AcumuladorMensal(plano)
+    acumulador.adicionar(instante, kwh)
+    acumulador.fatura(), acumulador.plafonds(), acumulador.custo_marginal()
+
+O estado (ver estado e restaurar) é um dicionário serializável em JSON, para sobreviver a
+reinícios dos processos.
+"""
+
+from calendar import monthrange
+from datetime import datetime
+
+from pyerse.comercializador import IMPOSTO_ESPECIAL_CONSUMO, IVA_NORMAL, Fatura, Plano, Tarifa
+
+
+class AcumuladorException(Exception):
+    """Exceptions lançadas por AcumuladorMensal."""
+
+
+class AcumuladorMensal:
+    """kWh por Tarifa do mês corrente de um plano, com a fatura estimada e o custo marginal.
+
+    Cada leitura custa O(1): a tarifa do instante vem de Plano.tarifa_actual (que guarda o
+    intervalo em que a tarifa é válida) e os kWh são somados ao total dessa tarifa. Uma leitura
+    de um mês seguinte fecha o mês corrente. Os instantes são tratados em hora local, como nos
+    ciclos, e a ordem das leituras dentro do mês é indiferente.
+    """
+
+    def __init__(self, plano: Plano, familia_numerosa=False):
+        self._plano = plano
+        self._familia_numerosa = familia_numerosa
+        self._reiniciar(None)
+
+    def _reiniciar(self, mes):
+        self._mes = mes
+        self._energia = dict.fromkeys(self._plano.tarifas, 0.0)
+        self._leituras = 0
+        self._ultima = None
+
+    @property
+    def plano(self):
+        return self._plano
+
+    @property
+    def mes(self):
+        """Mês corrente (ano, mês), ou None antes da primeira leitura."""
+        return self._mes
+
+    @property
+    def energia(self):
+        """kWh consumidos no mês por Tarifa."""
+        return dict(self._energia)
+
+    @property
+    def leituras(self):
+        """Número de leituras do mês."""
+        return self._leituras
+
+    @property
+    def ultima(self):
+        """Instante da leitura mais recente do mês."""
+        return self._ultima
+
+    def adicionar(self, instante: datetime, kwh: float):
+        """Soma os kWh de uma leitura à tarifa do instante.
+
+        Retorna a Fatura do mês anterior (com todos os dias do mês) quando a leitura abre um novo
+        mês, ou None. Leituras de meses já fechados lançam AcumuladorException.
+        """
+        if kwh < 0:
+            raise AcumuladorException(f"Leitura negativa: {kwh} kWh")
+
+        fechada = None
+        mes = (instante.year, instante.month)
+        if mes != self._mes:
+            if self._mes is not None:
+                if mes < self._mes:
+                    raise AcumuladorException(f"Leitura de {instante} num mês já fechado")
+                fechada = self.fatura(monthrange(*self._mes)[1])
+            self._reiniciar(mes)
+
+        self._energia[self._plano.tarifa_actual(instante)] += kwh
+        self._leituras += 1
+        if self._ultima is None or instante > self._ultima:
+            self._ultima = instante
+        return fechada
+
+    def fatura(self, dias: int = None) -> Fatura:
+        """Fatura estimada do mês até ao momento (ver Plano.faturar).
+
+        Sem dias, os custos fixos são calculados até ao dia da leitura mais recente.
+        """
+        if dias is None:
+            dias = self._ultima.day if self._ultima is not None else 0
+        return self._plano.faturar(self._energia, dias, self._familia_numerosa)
+
+    def plafonds(self):
+        """kWh com IVA intermédio já usados por Tarifa: {tarifa: (usados, plafond)}."""
+        plafonds = {}
+        for tarifa, kwh in self._energia.items():
+            plafond = self._plano._plafond(tarifa, self._familia_numerosa)
+            plafonds[tarifa] = (min(kwh, plafond), plafond)
+        return plafonds
+
+    def custo_marginal(self, now=None):
+        """Custo em Euros (com IVA e imposto especial de consumo) do próximo kWh consumido em now.
+
+        Por omissão now é o instante da leitura mais recente (ou o instante actual).
+        """
+        if now is None:
+            now = self._ultima or datetime.now()
+        tarifa = self._plano.tarifa_actual(now)
+        return (
+            self._plano.custo_kWh_actual(self._energia[tarifa], self._familia_numerosa, now)
+            + IMPOSTO_ESPECIAL_CONSUMO * IVA_NORMAL
+        )
+
+    def estado(self):
+        """Estado do mês corrente, serializável em JSON (ver restaurar)."""
+        return {
+            "mes": None if self._mes is None else "%04d-%02d" % self._mes,
+            "energia": {tarifa.value: kwh for tarifa, kwh in self._energia.items()},
+            "leituras": self._leituras,
+            "ultima": None if self._ultima is None else self._ultima.isoformat(),
+            "familia_numerosa": self._familia_numerosa,
+        }
+
+    @classmethod
+    def restaurar(cls, plano: Plano, estado):
+        """Acumulador do plano com o estado guardado por estado()."""
+        acumulador = cls(plano, estado["familia_numerosa"])
+        energia = {Tarifa(tarifa): kwh for tarifa, kwh in estado["energia"].items()}
+        if set(energia) != set(plano.tarifas):
+            raise AcumuladorException(f"Estado com as tarifas {list(energia)} em vez de {plano.tarifas}")
+
+        if estado["mes"] is not None:
+            ano, mes = estado["mes"].split("-")
+            acumulador._mes = (int(ano), int(mes))
+        acumulador._energia.update(energia)
+        acumulador._leituras = estado["leituras"]
+        acumulador._ultima = None if estado["ultima"] is None else datetime.fromisoformat(estado["ultima"])
+        return acumulador
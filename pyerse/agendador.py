@@ -0,0 +1,174 @@
+"""Agendador asyncio das mudanças de tarifa de muitos planos, sem polling.
+
+Mantém um heap com a próxima mudança de Tarifa de cada plano (a partir dos limites dos periodos
+horários do Ciclo) e dorme até à mais próxima. O trabalho depende do número de mudanças e não
+da frequência com que se quer saber a tarifa::
+
+    async with Agendador() as agendador:
+        agendador.adicionar("casa", plano, callback=print)
+        async for transicao in agendador.eventos():
+            ...
+"""
+
+import asyncio
+from datetime import datetime, timezone
+import heapq
+from itertools import count
+import logging
+from typing import Any, NamedTuple
+from zoneinfo import ZoneInfo
+
+from pyerse.comercializador import Plano, Tarifa
+
+FUSO = ZoneInfo("Europe/Lisbon")
+
+ESPERA_MAXIMA = 3600
+"""Segundos máximos de cada espera, para acompanhar acertos (ou suspensões) do relógio do sistema."""
+
+
+def _relogio():
+    return datetime.now(timezone.utc)
+
+
+class Transicao(NamedTuple):
+    """Mudança de tarifa de um plano."""
+
+    nome: Any
+    plano: Plano
+    instante: datetime
+    """Instante da mudança, com o fuso horário do agendador."""
+    tarifa: Tarifa
+    anterior: Tarifa
+
+
+class Agendador:
+    """Dispara callbacks e eventos nas mudanças de tarifa dos planos adicionados.
+
+    Os periodos horários são avaliados na hora legal do fuso (por omissão Europe/Lisbon) e as
+    esperas calculadas em UTC, pelo que os dias de mudança de hora são tratados correctamente.
+    relogio (função que retorna o instante actual com fuso horário) e dormir (corotina que
+    espera um número de segundos) podem ser substituídos, e.g. em testes. Sem espera_maxima,
+    o agendador só acorda nas mudanças de tarifa.
+    """
+
+    def __init__(self, fuso=FUSO, relogio=_relogio, dormir=asyncio.sleep, espera_maxima=ESPERA_MAXIMA):
+        self._fuso = fuso
+        self._relogio = relogio
+        self._dormir = dormir
+        self._espera_maxima = espera_maxima
+        self._planos = {}
+        self._heap = []
+        self._sequencia = count()
+        self._filas = set()
+        self._alterado = asyncio.Event()
+        self._tarefa = None
+
+    def __len__(self):
+        return len(self._planos)
+
+    def agora(self):
+        """Instante actual no fuso do agendador."""
+        return self._relogio().astimezone(self._fuso)
+
+    def adicionar(self, nome, plano: Plano, callback=None):
+        """Acompanha as mudanças de tarifa do plano (substitui um plano anterior com o mesmo nome).
+
+        callback(transicao) é chamado em cada mudança; se retornar um awaitable, é aguardado.
+        """
+        agora = self.agora()
+        self._planos[nome] = [plano, callback, plano.tarifa_actual(agora), next(self._sequencia)]
+        self._agendar(nome, agora)
+        self._alterado.set()
+
+    def remover(self, nome):
+        """Deixa de acompanhar o plano nome."""
+        del self._planos[nome]
+
+    def tarifa(self, nome):
+        """Tarifa actual do plano nome, segundo o agendador."""
+        return self._planos[nome][2]
+
+    def _agendar(self, nome, desde):
+        plano, _, _, versao = self._planos[nome]
+        transicao = plano.next_transition(desde)
+        if transicao is None:
+            return  # opção simples
+        instante, tarifa = transicao
+        # A mudança é dada em hora legal; replace escolhe o desvio UTC em vigor nesse instante
+        instante = instante.replace(tzinfo=self._fuso)
+        heapq.heappush(self._heap, (instante.astimezone(timezone.utc), next(self._sequencia), nome, versao, tarifa))
+
+    def _valida(self, entrada):
+        estado = self._planos.get(entrada[2])
+        return estado is not None and estado[3] == entrada[3]
+
+    def proxima(self):
+        """Instante (UTC) da próxima mudança agendada, ou None."""
+        while self._heap and not self._valida(self._heap[0]):
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+
+    async def _esperar(self, segundos):
+        """Dorme até segundos (None sem limite) ou até ser adicionado um plano."""
+        self._alterado.clear()
+        esperas = {asyncio.ensure_future(self._alterado.wait())}
+        if segundos is not None:
+            esperas.add(asyncio.ensure_future(self._dormir(segundos)))
+        try:
+            await asyncio.wait(esperas, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for espera in esperas:
+                espera.cancel()
+
+    async def executar(self):
+        """Ciclo do agendador; corre até ser cancelado."""
+        while True:
+            proxima = self.proxima()
+            agora = self._relogio()
+            if proxima is None or proxima > agora:
+                espera = None if proxima is None else (proxima - agora).total_seconds()
+                if self._espera_maxima is not None:
+                    espera = self._espera_maxima if espera is None else min(espera, self._espera_maxima)
+                await self._esperar(espera)
+                continue
+
+            instante, _, nome, _, tarifa = heapq.heappop(self._heap)
+            estado = self._planos[nome]
+            plano, callback, anterior, _ = estado
+            transicao = Transicao(nome, plano, instante.astimezone(self._fuso), tarifa, anterior)
+            estado[2] = tarifa
+            self._agendar(nome, transicao.instante)
+            await self._disparar(callback, transicao)
+
+    async def _disparar(self, callback, transicao):
+        for fila in self._filas:
+            fila.put_nowait(transicao)
+        if callback is not None:
+            try:
+                resultado = callback(transicao)
+                if asyncio.iscoroutine(resultado) or isinstance(resultado, asyncio.Future):
+                    await resultado
+            except Exception:
+                logging.exception("Callback de %s falhou", transicao.nome)
+
+    async def eventos(self):
+        """Iterador assíncrono das mudanças de tarifa de todos os planos, a partir de agora."""
+        fila = asyncio.Queue()
+        self._filas.add(fila)
+        try:
+            while True:
+                yield await fila.get()
+        finally:
+            self._filas.discard(fila)
+
+    async def __aenter__(self):
+        self._tarefa = asyncio.ensure_future(self.executar())
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self._tarefa.cancel()
+        try:
+            await self._tarefa
+        except asyncio.CancelledError:
+            pass
+        self._tarefa = None
@@ -0,0 +1,148 @@
+"""Cache persistente (sqlite) das respostas do simulador da ERSE."""
+
+import asyncio
+from concurrent.futures import Future
+from datetime import datetime
+import json
+import sqlite3
+import threading
+import time
+
+from pyerse import estatisticas
+
+TTL = 24 * 3600
+MAX_ENTRADAS = 10_000
+
+CAMPOS_CHAVE = ("caseType", "electSupply", "cycle", "electCalendarPeriodStart", "electCalendarPeriodEnd")
+"""Campos do pedido que determinam os preços das ofertas (os consumos não entram na chave)."""
+
+
+def chave(dados):
+    """Chave normalizada de um pedido ao simulador."""
+    valores = []
+    for campo in CAMPOS_CHAVE:
+        valor = str(dados[campo])
+        if campo.startswith("electCalendarPeriod"):
+            valor = datetime.strptime(valor, "%Y-%m-%d").strftime("%Y-%m-%d")
+        valores.append(valor)
+    return "|".join(valores)
+
+
+class CacheSimulador:
+    """Cache em sqlite das respostas do simulador, com TTL e limite de entradas (LRU).
+
+    Os simuladores guardam, pela chave normalizada do pedido, a lista completa das ofertas; a
+    melhor oferta e a estimativa são calculadas localmente com os consumos de cada pedido. Pedidos
+    idênticos em simultâneo (threads ou tarefas asyncio) resultam num único pedido ao simulador.
+    """
+
+    def __init__(self, caminho=":memory:", ttl=TTL, max_entradas=MAX_ENTRADAS):
+        self._ttl = ttl
+        self._max_entradas = max_entradas
+        self._lock = threading.Lock()
+        self._em_curso = {}
+        self._em_curso_async = {}
+        self._db = sqlite3.connect(caminho, check_same_thread=False)
+        with self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS respostas "
+                "(chave TEXT PRIMARY KEY, valor TEXT NOT NULL, criado REAL NOT NULL, acedido REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS respostas_acedido ON respostas (acedido)")
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM respostas").fetchone()[0]
+
+    def ler(self, chave):
+        """Resposta guardada para a chave, ou None se não existir ou tiver expirado."""
+        agora = time.time()
+        with self._lock, self._db:
+            linha = self._db.execute("SELECT valor, criado FROM respostas WHERE chave = ?", (chave,)).fetchone()
+            if linha is not None and linha[1] + self._ttl <= agora:
+                self._db.execute("DELETE FROM respostas WHERE chave = ?", (chave,))
+                linha = None
+            if linha is not None:
+                self._db.execute("UPDATE respostas SET acedido = ? WHERE chave = ?", (agora, chave))
+        if estatisticas.ACTIVO:
+            estatisticas.contar("cache.falhas" if linha is None else "cache.acertos")
+        if linha is None:
+            return None
+        return json.loads(linha[0])
+
+    def escrever(self, chave, valor):
+        """Guarda a resposta, removendo as entradas usadas há mais tempo acima do limite."""
+        agora = time.time()
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO respostas VALUES (?, ?, ?, ?)", (chave, json.dumps(valor), agora, agora)
+            )
+            self._db.execute(
+                "DELETE FROM respostas WHERE chave IN "
+                "(SELECT chave FROM respostas ORDER BY acedido DESC LIMIT -1 OFFSET ?)",
+                (self._max_entradas,),
+            )
+
+    def limpar(self):
+        """Remove todas as entradas."""
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM respostas")
+
+    def obter(self, chave, calcular):
+        """Resposta para a chave, chamando calcular() só se não estiver em cache nem a ser pedida."""
+        valor = self.ler(chave)
+        if valor is not None:
+            return valor
+
+        with self._lock:
+            futuro = self._em_curso.get(chave)
+            dono = futuro is None
+            if dono:
+                futuro = self._em_curso[chave] = Future()
+        if not dono:
+            if estatisticas.ACTIVO:
+                estatisticas.contar("cache.partilhados")
+            return futuro.result()
+
+        try:
+            valor = calcular()
+            self.escrever(chave, valor)
+            futuro.set_result(valor)
+            return valor
+        except BaseException as err:
+            futuro.set_exception(err)
+            raise
+        finally:
+            with self._lock:
+                del self._em_curso[chave]
+
+    async def obter_async(self, chave, calcular):
+        """Como obter, com calcular uma função que retorna um awaitable.
+
+        O acesso ao sqlite é feito numa thread à parte para não bloquear o ciclo de eventos.
+        """
+        valor = await asyncio.to_thread(self.ler, chave)
+        if valor is not None:
+            return valor
+
+        futuro = self._em_curso_async.get(chave)
+        if futuro is not None:
+            if estatisticas.ACTIVO:
+                estatisticas.contar("cache.partilhados")
+            return await asyncio.shield(futuro)
+
+        futuro = self._em_curso_async[chave] = asyncio.get_running_loop().create_future()
+        try:
+            valor = await calcular()
+            await asyncio.to_thread(self.escrever, chave, valor)
+            futuro.set_result(valor)
+            return valor
+        except asyncio.CancelledError:
+            futuro.cancel()
+            raise
+        except Exception as err:
+            futuro.set_exception(err)
+            futuro.exception()  # marca a excepção como lida mesmo sem outros pedidos à espera
+            raise
+        finally:
+            del self._em_curso_async[chave]
@@ -0,0 +1,101 @@
+"""Faturação de carteiras de clientes (CPEs) em paralelo."""
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+import os
+from typing import NamedTuple, Any
+
+from pyerse.ciclos import MAPPING as CYCLE_MAPPING
+from pyerse.comercializador import Fatura, Plano
+
+TAMANHO_LOTE = 64
+
+
+class Cliente(NamedTuple):
+    """Perfil de carga de um cliente e o respectivo plano."""
+
+    id: Any
+    plano: Plano
+    timestamps: Any
+    kwh: Any
+    dias: int = None
+    familia_numerosa: bool = False
+
+
+def somar(faturas):
+    """Soma várias faturas numa fatura agregada (e.g. total da carteira)."""
+    energia, custo_energia = {}, {}
+    iec = custos_fixos = total = 0
+    for fatura in faturas:
+        for tarifa, kwh in fatura.energia.items():
+            energia[tarifa] = energia.get(tarifa, 0) + kwh
+        for tarifa, (intermedia, normal) in fatura.custo_energia.items():
+            anterior = custo_energia.get(tarifa, (0, 0))
+            custo_energia[tarifa] = (anterior[0] + intermedia, anterior[1] + normal)
+        iec += fatura.iec
+        custos_fixos += fatura.custos_fixos
+        total += fatura.total
+    return Fatura(energia, custo_energia, iec, custos_fixos, total)
+
+
+def _inicializar():
+    """Compila as tabelas dos ciclos uma única vez por processo."""
+    for ciclo in CYCLE_MAPPING.values():
+        ciclo.tabela()
+
+
+def _faturar_lote(lote):
+    """Faturas de um lote de clientes e o respectivo agregado parcial."""
+    faturas = [
+        (cliente.id, cliente.plano.faturar_serie(cliente.timestamps, cliente.kwh, cliente.dias, cliente.familia_numerosa))
+        for cliente in lote
+    ]
+    return faturas, somar(fatura for _, fatura in faturas)
+
+
+def _lotes(clientes, tamanho):
+    clientes = iter(clientes)
+    while lote := [Cliente(*cliente) for cliente in islice(clientes, tamanho)]:
+        yield lote
+
+
+def faturar_carteira(clientes, max_workers=None, tamanho_lote=TAMANHO_LOTE):
+    """Fatura cada cliente e a carteira, distribuindo lotes de clientes por processos.
+
+    clientes é um iterável de Cliente (ou tuplos equivalentes). Retorna o tuplo
+    (faturas por id de cliente, fatura agregada da carteira). Cada fatura é igual à de
+    Plano.faturar_serie; os agregados parciais de cada lote são somados pela ordem dos lotes,
+    pelo que o resultado só depende de tamanho_lote e não do número de processos.
+    Com max_workers=0 tudo corre no processo actual.
+    """
+    lotes = _lotes(clientes, tamanho_lote)
+    if max_workers == 0:
+        _inicializar()
+        return _juntar(map(_faturar_lote, lotes))
+
+    max_workers = max_workers or os.cpu_count()
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_inicializar) as executor:
+        return _juntar(_executar(executor, lotes, 2 * max_workers))
+
+
+def _executar(executor, lotes, em_curso):
+    """Resultados dos lotes, por ordem, com no máximo em_curso lotes submetidos em simultâneo.
+
+    Ao contrário de executor.map, não consome todos os clientes de uma vez.
+    """
+    pendentes = deque()
+    for lote in lotes:
+        pendentes.append(executor.submit(_faturar_lote, lote))
+        if len(pendentes) >= em_curso:
+            yield pendentes.popleft().result()
+    while pendentes:
+        yield pendentes.popleft().result()
+
+
+def _juntar(resultados):
+    faturas, parciais = {}, []
+    for faturas_lote, parcial in resultados:
+        faturas.update(faturas_lote)
+        parciais.append(parcial)
+    return faturas, somar(parciais)
@@ -0,0 +1,132 @@
+"""Catálogo local de ofertas, para responder a melhor_tarifa_* sem acesso ao simulador."""
+
+import csv
+from datetime import datetime
+
+from pyerse.comercializador import Opcao_Horaria, POTENCIA
+from pyerse.simulador import Oferta, dias_periodo, validar_data
+
+CAMPOS_CSV = (
+    "comercializador", "nome", "potencia", "opcao_horaria",
+    "preco_ponta", "preco_cheias", "preco_vazio", "preco_fixo", "inicio", "fim",
+)
+"""Colunas de importar_csv/exportar_csv (inicio e fim da validade em AAAA-MM-DD, vazios se em aberto)."""
+
+
+class CatalogoOfertas:
+    """Ofertas indexadas por potência e opção horária, com datas de validade.
+
+    Os preços de energia seguem a convenção do simulador (ver Oferta): (ponta, cheias, vazio) na
+    tri-horária, (fora de vazio, vazio) na bi-horária e (energia,) na simples. Cada pesquisa
+    avalia de uma só vez, com numpy, todas as ofertas da potência e opção horária.
+    """
+
+    def __init__(self):
+        self._ofertas = {}
+        self._arrays = {}
+
+    def __len__(self):
+        return sum(len(ofertas) for ofertas in self._ofertas.values())
+
+    def adicionar(self, oferta: Oferta, potencia, opcao_horaria: Opcao_Horaria, inicio=None, fim=None):
+        """Adiciona uma oferta, válida de inicio a fim (inclusive, AAAA-MM-DD; None se em aberto)."""
+        if potencia not in POTENCIA:
+            raise ValueError(f"Potencia {potencia} não disponivel")
+        chave = (potencia, Opcao_Horaria(opcao_horaria))
+        self._ofertas.setdefault(chave, []).append(
+            (oferta, validar_data(inicio) if inicio else None, validar_data(fim) if fim else None)
+        )
+        self._arrays.pop(chave, None)
+
+    def importar(self, ofertas, potencia, opcao_horaria: Opcao_Horaria, inicio=None, fim=None):
+        """Adiciona várias ofertas com a mesma potência, opção horária e validade.
+
+        Por exemplo, as ofertas exportadas do simulador com Simulador.ofertas.
+        """
+        for oferta in ofertas:
+            self.adicionar(oferta, potencia, opcao_horaria, inicio, fim)
+
+    def importar_csv(self, ficheiro, delimitador=","):
+        """Importa ofertas de um CSV com as colunas CAMPOS_CSV (decimais com ponto ou vírgula)."""
+
+        def preco(valor):
+            valor = valor.replace(",", ".")
+            return float(valor) if valor else None
+
+        for linha in csv.DictReader(ficheiro, delimiter=delimitador):
+            oferta = Oferta(
+                linha["comercializador"],
+                linha["nome"],
+                tuple(preco(linha[campo]) for campo in ("preco_ponta", "preco_cheias", "preco_vazio")),
+                preco(linha["preco_fixo"]),
+            )
+            self.adicionar(
+                oferta, preco(linha["potencia"]), linha["opcao_horaria"], linha["inicio"] or None, linha["fim"] or None
+            )
+
+    def exportar_csv(self, ficheiro, delimitador=","):
+        """Exporta o catálogo no formato de importar_csv."""
+        escritor = csv.writer(ficheiro, delimiter=delimitador)
+        escritor.writerow(CAMPOS_CSV)
+        for (potencia, opcao_horaria), ofertas in self._ofertas.items():
+            for oferta, inicio, fim in ofertas:
+                escritor.writerow(
+                    [oferta.comercializador, oferta.nome, potencia, opcao_horaria.value]
+                    + ["" if preco is None else preco for preco in oferta.precos_energia]
+                    + [oferta.preco_fixo, inicio or "", fim or ""]
+                )
+
+    def _indice(self, chave):
+        """Arrays (preços de energia, preço fixo, inicio, fim) das ofertas de uma chave."""
+        import numpy as np
+
+        arrays = self._arrays.get(chave)
+        if arrays is None:
+            ofertas = self._ofertas.get(chave, [])
+            arrays = self._arrays[chave] = (
+                np.array([[p if p is not None else np.nan for p in o.precos_energia] for o, _, _ in ofertas]).reshape(-1, 3),
+                np.array([o.preco_fixo for o, _, _ in ofertas], dtype=np.float64),
+                np.array([inicio or "NaT" for _, inicio, _ in ofertas], dtype="datetime64[D]"),
+                np.array([fim or "NaT" for _, _, fim in ofertas], dtype="datetime64[D]"),
+            )
+        return arrays
+
+    def ranking(self, potencia, opcao_horaria: Opcao_Horaria, period_start, period_stop, consumos, n=None):
+        """Ofertas válidas em todo o período, da mais barata para a mais cara: lista de (Oferta, estimativa).
+
+        consumos segue a convenção de Simulador (ver CatalogoOfertas).
+        """
+        import numpy as np
+
+        chave = (potencia, Opcao_Horaria(opcao_horaria))
+        energia, fixo, inicio, fim = self._indice(chave)
+        dias = dias_periodo(validar_data(period_start), validar_data(period_stop))
+        primeiro, ultimo = (
+            np.datetime64(datetime.strptime(data, "%Y-%m-%d").date(), "D") for data in (period_start, period_stop)
+        )
+
+        consumos = np.array(list(consumos) + [0] * (3 - len(consumos)), dtype=np.float64)
+        estimativas = np.nansum(energia * consumos, axis=1) + fixo * dias
+        validas = (np.isnat(inicio) | (inicio <= primeiro)) & (np.isnat(fim) | (ultimo <= fim))
+
+        indices = np.flatnonzero(validas)
+        indices = indices[np.argsort(estimativas[indices], kind="stable")][:n]
+        ofertas = self._ofertas[chave] if indices.size else []
+        return [(ofertas[i][0], float(estimativas[i])) for i in indices]
+
+    def _melhor(self, potencia, opcao_horaria, period_start, period_stop, consumos):
+        ranking = self.ranking(potencia, opcao_horaria, period_start, period_stop, consumos, n=1)
+        if not ranking:
+            return None
+        oferta, estimativa = ranking[0]
+        return str(oferta), estimativa
+
+    def melhor_tarifa_simples(self, potencia, period_start, period_stop, energia):
+        """Como Simulador.melhor_tarifa_simples: (nome, estimativa), ou None sem ofertas válidas."""
+        return self._melhor(potencia, Opcao_Horaria.SIMPLES, period_start, period_stop, (energia,))
+
+    def melhor_tarifa_bihorario(self, potencia, period_start, period_stop, fora_de_vazio, vazio):
+        return self._melhor(potencia, Opcao_Horaria.BI_HORARIA, period_start, period_stop, (fora_de_vazio, vazio))
+
+    def melhor_tarifa_trihorario(self, potencia, period_start, period_stop, ponta, cheias, vazio):
+        return self._melhor(potencia, Opcao_Horaria.TRI_HORARIA, period_start, period_stop, (ponta, cheias, vazio))
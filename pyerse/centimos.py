@@ -0,0 +1,213 @@
+"""Faturação em inteiros: preços em micro-euros, energia em Wh e montantes em cêntimos.
+
+Alternativa ao cálculo em float de Plano.faturar: todas as parcelas são calculadas de forma exacta
+em inteiros (int ou arrays numpy int64) e arredondadas ao cêntimo por excesso a partir de meio
+cêntimo, como nas faturas. Os totais somam-se sem erros de arredondamento, ao cêntimo.
+
+Os valores são não negativos; os preços são convertidos para micro-euros e a energia para Wh
+(arredondados ao inteiro mais próximo).
+"""
+
+import logging
+import math
+from typing import NamedTuple
+
+from pyerse.comercializador import (
+    CONTRIB_AUDIOVISUAL,
+    IMPOSTO_ESPECIAL_CONSUMO,
+    IVA_INTERMEDIA,
+    IVA_NORMAL,
+    IVA_REDUZIDA,
+    PLAFOND_IVA_INTERMEDIA,
+    TARIFAS,
+    TAXA_DGEG,
+    Fatura,
+    Opcao_Horaria,
+    Plano,
+)
+
+MICRO_EUROS = 1_000_000
+"""Micro-euros por Euro."""
+WH = 1000
+"""Wh por kWh."""
+
+# Taxas de IVA em percentagem (e.g. 23 para IVA_NORMAL)
+_PERCENTAGEM = {iva: round((iva - 1) * 100) for iva in (IVA_REDUZIDA, IVA_INTERMEDIA, IVA_NORMAL)}
+
+# Wh x micro-euros/kWh x (100 + IVA) são 1e-11 Euros; dias x micro-euros x (100 + IVA) são 1e-8 Euros
+_ENERGIA_CENTIMOS = 10**9
+_POTENCIA_CENTIMOS = 10**6
+
+
+def escalar(valores, escala):
+    """Converte valores (float ou array) para inteiros na escala, arredondando ao mais próximo."""
+    if isinstance(valores, (int, float)):
+        return math.floor(valores * escala + 0.5)
+
+    import numpy as np
+
+    return np.floor(np.asarray(valores, dtype=np.float64) * escala + 0.5).astype(np.int64)
+
+
+def _dividir(valores, divisor):
+    """Divisão inteira arredondada por excesso a partir de metade (valores não negativos)."""
+    return (valores + divisor // 2) // divisor
+
+
+def euros(centimos):
+    """Montante em Euros (float) de um valor em cêntimos."""
+    return centimos / 100
+
+
+PLAFOND_IVA_INTERMEDIA_WH = {
+    opcao: {tarifa: tuple(escalar(kwh, WH) for kwh in plafonds) for tarifa, plafonds in tarifas.items()}
+    for opcao, tarifas in PLAFOND_IVA_INTERMEDIA.items()
+}
+"""PLAFOND_IVA_INTERMEDIA em Wh."""
+
+CONTRIB_AUDIOVISUAL_CENTIMOS = _dividir(escalar(CONTRIB_AUDIOVISUAL, 100) * (100 + _PERCENTAGEM[IVA_REDUZIDA]), 100)
+TAXA_DGEG_CENTIMOS = _dividir(escalar(TAXA_DGEG, 100) * (100 + _PERCENTAGEM[IVA_NORMAL]), 100)
+IEC_MICRO_EUROS = escalar(IMPOSTO_ESPECIAL_CONSUMO, MICRO_EUROS)
+"""Imposto especial de consumo em micro-euros por kWh."""
+
+
+class FaturaCentimos(NamedTuple):
+    """Como Fatura, com a energia em Wh e os montantes em cêntimos (inteiros)."""
+
+    energia: dict
+    custo_energia: dict
+    iec: int
+    custos_fixos: int
+    total: int
+
+    def em_euros(self):
+        """Fatura equivalente em kWh e Euros."""
+        return Fatura(
+            {tarifa: wh / WH for tarifa, wh in self.energia.items()},
+            {tarifa: (euros(intermedia), euros(normal)) for tarifa, (intermedia, normal) in self.custo_energia.items()},
+            euros(self.iec),
+            euros(self.custos_fixos),
+            euros(self.total),
+        )
+
+
+_INTERMEDIA = 100 + _PERCENTAGEM[IVA_INTERMEDIA]
+_NORMAL = 100 + _PERCENTAGEM[IVA_NORMAL]
+
+
+def custo_energia(opcao_horaria: Opcao_Horaria, tarifa, preco: int, wh: int, familia_numerosa=False):
+    """Como Plano.custo_kWh_iva, em cêntimos, com preco em micro-euros por kWh e wh em Wh."""
+    plafond = PLAFOND_IVA_INTERMEDIA_WH[opcao_horaria][tarifa][1 if familia_numerosa else 0]
+    return (
+        _dividir(min(wh, plafond) * preco * _INTERMEDIA, _ENERGIA_CENTIMOS),
+        _dividir(max(wh - plafond, 0) * preco * _NORMAL, _ENERGIA_CENTIMOS),
+    )
+
+
+def custos_energia(opcao_horaria: Opcao_Horaria, precos, wh, familia_numerosa=False):
+    """Versão vectorizada de custo_energia (ver custos_kWh_iva): arrays int64 em cêntimos.
+
+    wh tem uma coluna por tarifa de TARIFAS[opcao_horaria]; precos e familia_numerosa (por linha)
+    são difundidos para a forma de wh.
+    """
+    import numpy as np
+
+    wh = np.asarray(wh, dtype=np.int64)
+    precos = np.asarray(precos, dtype=np.int64)
+    plafonds = np.array(
+        [PLAFOND_IVA_INTERMEDIA_WH[opcao_horaria][tarifa] for tarifa in TARIFAS[opcao_horaria]], dtype=np.int64
+    )
+    plafond = np.where(np.asarray(familia_numerosa, dtype=bool)[..., np.newaxis], plafonds[:, 1], plafonds[:, 0])
+
+    return (
+        _dividir(np.minimum(wh, plafond) * precos * _INTERMEDIA, _ENERGIA_CENTIMOS),
+        _dividir(np.maximum(wh - plafond, 0) * precos * _NORMAL, _ENERGIA_CENTIMOS),
+    )
+
+
+def iec(wh):
+    """Imposto especial de consumo (com IVA) em cêntimos."""
+    return _dividir(wh * IEC_MICRO_EUROS * (100 + _PERCENTAGEM[IVA_NORMAL]), _ENERGIA_CENTIMOS)
+
+
+def custos_fixos(potencia, preco_potencia, dias):
+    """Custos fixos em cêntimos, com preco_potencia em micro-euros por dia (ver Plano.custos_fixos)."""
+    iva = IVA_REDUZIDA if potencia <= 3.45 else IVA_NORMAL
+    return (
+        _dividir(dias * preco_potencia * (100 + _PERCENTAGEM[iva]), _POTENCIA_CENTIMOS)
+        + CONTRIB_AUDIOVISUAL_CENTIMOS
+        + TAXA_DGEG_CENTIMOS
+    )
+
+
+def _precos(plano: Plano):
+    return [escalar(plano.preco_kWh(tarifa), MICRO_EUROS) for tarifa in plano.tarifas]
+
+
+def faturar(plano: Plano, energia: dict, dias: int, familia_numerosa=False, verificar=False):
+    """Como Plano.faturar (energia em kWh por Tarifa), com o resultado em FaturaCentimos.
+
+    Com verificar, compara com Plano.faturar e regista um aviso com as diferenças (ver equivalencia).
+    """
+    tarifas = plano.tarifas
+    wh = {tarifa: escalar(energia.get(tarifa, 0), WH) for tarifa in tarifas}
+    custos = {
+        tarifa: custo_energia(plano.opcao_horaria, tarifa, preco, wh[tarifa], familia_numerosa)
+        for tarifa, preco in zip(tarifas, _precos(plano))
+    }
+    imposto = iec(sum(wh.values()))
+    fixos = custos_fixos(plano.potencia, escalar(plano.custo_potencia(), MICRO_EUROS), dias)
+
+    fatura = FaturaCentimos(
+        wh,
+        custos,
+        imposto,
+        fixos,
+        sum(sum(custo) for custo in custos.values()) + imposto + fixos,
+    )
+    if verificar:
+        diferencas = _diferencas(fatura, plano.faturar(energia, dias, familia_numerosa))
+        if diferencas:
+            logging.warning("Faturação em inteiros difere do cálculo em float: %s", diferencas)
+    return fatura
+
+
+def _diferencas(fatura: FaturaCentimos, referencia: Fatura):
+    diferencas = {}
+    for tarifa, custos in fatura.custo_energia.items():
+        for parcela, centimos, valor in zip(("intermedia", "normal"), custos, referencia.custo_energia[tarifa]):
+            if centimos != escalar(valor, 100):
+                diferencas[f"{tarifa.name}.{parcela}"] = (centimos, escalar(valor, 100))
+    for campo in ("iec", "custos_fixos", "total"):
+        centimos, valor = getattr(fatura, campo), escalar(getattr(referencia, campo), 100)
+        if centimos != valor:
+            diferencas[campo] = (centimos, valor)
+    return diferencas
+
+
+def equivalencia(plano: Plano, energia: dict, dias: int, familia_numerosa=False):
+    """Diferenças entre faturar e Plano.faturar: {parcela: (cêntimos, cêntimos do cálculo em float)}.
+
+    Vazio quando os dois cálculos coincidem ao cêntimo. As diferenças esperadas são de um cêntimo,
+    em parcelas cujo valor exacto termina em meio cêntimo (o float pode ficar abaixo de .5) ou no
+    imposto especial de consumo, que o cálculo em float não arredonda.
+    """
+    return _diferencas(faturar(plano, energia, dias, familia_numerosa), plano.faturar(energia, dias, familia_numerosa))
+
+
+def faturar_array(plano: Plano, wh, dias, familia_numerosa=False):
+    """Totais em cêntimos (array int64) de muitas faturas do mesmo plano.
+
+    wh tem os Wh de cada fatura com uma coluna por tarifa de plano.tarifas; dias e familia_numerosa
+    são difundidos por fatura.
+    """
+    import numpy as np
+
+    wh = np.asarray(wh, dtype=np.int64)
+    intermedia, normal = custos_energia(plano.opcao_horaria, _precos(plano), wh, familia_numerosa)
+    return (
+        intermedia.sum(axis=-1)
+        + normal.sum(axis=-1)
+        + iec(wh.sum(axis=-1))
+        + custos_fixos(plano.potencia, escalar(plano.custo_potencia(), MICRO_EUROS), np.asarray(dias, dtype=np.int64))
+    )
@@ -1,21 +1,185 @@
 """"Helper com ciclos"""
 
+from bisect import bisect_right
 from datetime import time, datetime, timedelta
+import json
+import os
 
+from pyerse import estatisticas, hora_legal
 from pyerse.periodos_horarios import Periodos_Horarios as ph
 
+_PERIODOS = tuple(ph)
+
+MINUTOS_DIA = 24 * 60
+MINUTOS_SEMANA = 7 * MINUTOS_DIA
+ESTACOES = ("Inverno", "Verão")
+"""Estações pela ordem usada nas tabelas compiladas (0 - Inverno, 1 - Verão)."""
+
+ESTACOES_MESES = ("Novembro a Maio", "Junho a Outubro")
+"""Estações por meses do ano (ciclos semanais das regiões autónomas), pela mesma ordem."""
+
+_MESES_VERAO = (6, 10)  # Junho a Outubro
+
+DEFINICOES = os.path.join(os.path.dirname(__file__), "data", "ciclos.json")
+"""Ficheiro de definição dos ciclos incluídos no pacote (ver registar_ficheiro)."""
+
+MAPPING = {}
+"""Ciclos registados (ver registar), por NOME."""
+
+_tabelas = {}  # tabelas compiladas, uma única cópia de cada tabela distinta
+
+
+class _atributo_preguicoso:
+    """Atributo de classe construído no primeiro acesso, para cada classe (e.g. PERIODOS)."""
+
+    def __init__(self, construir):
+        self._construir = construir
+
+    def __set_name__(self, owner, nome):
+        self._nome = nome
+
+    def __get__(self, instancia, owner):
+        valor = self._construir(owner)
+        setattr(owner, self._nome, valor)
+        return valor
+
 class CicloException(Exception):
     """Exceptions lançadas por Ciclo."""
     pass
 
+
+def _dia(dias, weekday):
+    """Chave de dias aplicável a weekday: a maior que não o excede (0 - dias úteis, ou todos no ciclo diário)."""
+    return max(dia for dia in dias if dia <= weekday)
+
+
+def _hora(minuto):
+    return f"{minuto // 60:02d}:{minuto % 60:02d}"
+
+
+def _minuto(hora):
+    horas, minutos = (int(valor) for valor in hora.split(":"))
+    if not (0 <= horas < 24 and 0 <= minutos < 60):
+        raise ValueError(f"hora inválida {hora}")
+    return horas * 60 + minutos
+
+
+def _intervalo(texto):
+    inicio, fim = texto.split("-")
+    return _minuto(inicio), _minuto(fim)
+
+
+def _ler_periodos(nome, periodos):
+    """Periodos de um ficheiro de definição ("HH:MM-HH:MM" por estação, dia e periodo) em minutos."""
+    try:
+        minutos = {}
+        for season, dias in periodos.items():
+            minutos[season] = {}
+            for dia, periodos_dia in dias.items():
+                if not 0 <= int(dia) < 7:
+                    raise ValueError(f"dia inválido {dia}")
+                minutos[season][int(dia)] = {
+                    ph(periodo): [_intervalo(intervalo) for intervalo in intervalos]
+                    for periodo, intervalos in periodos_dia.items()
+                }
+    except (AttributeError, TypeError, ValueError) as err:
+        raise CicloException(f"{nome}: definição inválida ({err})")
+    return minutos
+
+
+def _linha(onde, periodos):
+    """Códigos dos periodos de cada minuto de um dia, que tem de estar coberto sem lacunas nem sobreposições."""
+    segmentos = []
+    for periodo, intervalos in periodos.items():
+        for inicio, fim in intervalos:
+            if fim <= inicio:  # atravessa a meia-noite (fim 00:00 é a meia-noite)
+                segmentos.append((inicio, MINUTOS_DIA, periodo))
+                inicio = 0
+            if fim > inicio:
+                segmentos.append((inicio, fim, periodo))
+    segmentos.sort(key=lambda segmento: segmento[:2])
+
+    linha = bytearray(MINUTOS_DIA)
+    minuto = 0
+    for inicio, fim, periodo in segmentos:
+        if inicio > minuto:
+            raise CicloException(f"{onde}: lacuna entre {_hora(minuto)} e {_hora(inicio)}")
+        if inicio < minuto:
+            raise CicloException(f"{onde}: {periodo} às {_hora(inicio)} sobrepõe-se ao periodo anterior")
+        linha[inicio:fim] = bytes((periodo.codigo,)) * (fim - inicio)
+        minuto = fim
+    if minuto < MINUTOS_DIA:
+        raise CicloException(f"{onde}: lacuna entre {_hora(minuto)} e 00:00")
+    return linha
+
+
+def _estacoes(nome, periodos):
+    """Estações de uma definição: ESTACOES (hora legal) ou ESTACOES_MESES."""
+    for estacoes in (ESTACOES, ESTACOES_MESES):
+        if set(periodos) == set(estacoes):
+            return estacoes
+    raise CicloException(f"{nome}: estações {sorted(periodos)} em vez de {list(ESTACOES)} ou {list(ESTACOES_MESES)}")
+
+
+def _compilar_periodos(nome, periodos):
+    """Valida periodos (em minutos) e compila a tabela do ciclo (ver Ciclo.tabela).
+
+    Ciclos com tabelas iguais partilham o mesmo objecto.
+    """
+    tabela = bytearray(2 * MINUTOS_SEMANA)
+    for estacao, season in enumerate(_estacoes(nome, periodos)):
+        dias = periodos[season]
+        if 0 not in dias:
+            raise CicloException(f"{nome}: {season} sem os periodos do dia 0 (Segunda)")
+        linhas = {dia: _linha(f"{nome}, {season}, dia {dia}", periodos_dia) for dia, periodos_dia in dias.items()}
+        for weekday in range(7):
+            inicio = estacao * MINUTOS_SEMANA + weekday * MINUTOS_DIA
+            tabela[inicio:inicio + MINUTOS_DIA] = linhas[_dia(dias, weekday)]
+
+    tabela = bytes(tabela)
+    return _tabelas.setdefault(tabela, tabela)
+
+
 class Ciclo:
     """Estão previstos dois ciclos: ciclo diário (os períodos horários são iguais em todos os dias do ano) e ciclo semanal (os períodos horários diferem entre dias úteis e fim de semana).
 
+        Os ciclos são carregados de ficheiros de definição (ver DEFINICOES e registar_ficheiro).
         Mais informações em: https://www.erse.pt/atividade/regulacao/tarifas-e-precos-eletricidade/#periodos-horarios
     """
 
+    NOME = None
+
+    FUSO = 0
+    """Desvio da hora legal de Inverno em relação a UTC, em segundos."""
+
+    ESTACOES = ESTACOES
+    """Estações do ciclo: ESTACOES (Inverno e Verão da hora legal) ou ESTACOES_MESES."""
+
+    _definicao = None
+
+    def __str__(self) -> str:
+        return self.NOME
+
+    @_atributo_preguicoso
+    def PERIODOS(cls):
+        """{estação: {dia: {Periodos_Horarios: [(inicio, fim)]}}}, com datetime.time, a partir da definição."""
+        if cls._definicao is None:
+            raise AttributeError(f"{cls.__name__} não tem PERIODOS")
+        return {
+            season: {
+                dia: {
+                    periodo: [(time(*divmod(inicio, 60)), time(*divmod(fim, 60))) for inicio, fim in intervalos]
+                    for periodo, intervalos in periodos.items()
+                }
+                for dia, periodos in dias.items()
+            }
+            for season, dias in cls._definicao.items()
+        }
+
     @classmethod
     def in_time_range(cls, hour_start, minute_start, t, hour_stop, minute_stop):
+        if (hour_start, minute_start) == (hour_stop, minute_stop):
+            return True  # o dia inteiro (e.g. "00:00-00:00")
         if hour_stop < hour_start:
             return not (
                 time(hour_stop, minute_stop)
@@ -27,33 +191,162 @@ class Ciclo:
     @classmethod
     def is_summer(cls, time):
         # Hora legal de Verão começa no ultimo Domingo de Março e acaba no ultimo de Outubro
-        # https://docs.python.org/3.3/library/datetime.html
-        d = datetime(time.year, 4, 1)
-        i_verao = d - timedelta(days=d.weekday() + 1)
-        d = datetime(time.year, 11, 1)
-        f_verao = d - timedelta(days=d.weekday() + 1)
+        if time.tzinfo is not None and time.utcoffset() is not None:
+            # Com fuso horário o instante é exacto (inclui a hora ambígua de Outubro)
+            return hora_legal.verao(int(time.timestamp()))
+
+        i_verao, f_verao = hora_legal.limites_verao(time.year)
         if i_verao <= time.replace(tzinfo=None) < f_verao:
             return True
         return False
 
 
+    @classmethod
+    def estacao(cls, t):
+        """Índice em ESTACOES da estação de t (1 - Verão, ou Junho a Outubro)."""
+        if cls.ESTACOES is ESTACOES_MESES:
+            return int(_MESES_VERAO[0] <= t.month <= _MESES_VERAO[1])
+        return int(cls.is_summer(t))
+
+    @classmethod
+    def tabela(cls) -> bytes:
+        """Tabela compilada com o código do periodo horário de cada minuto da semana.
+
+        Tem 2 x 10080 bytes, indexada por ``estacao * MINUTOS_SEMANA + minuto da semana``
+        (estacao, ver Ciclo.estacao: 0 - Inverno, 1 - Verão; minuto 0 - Segunda 00:00). Os ciclos registados são
+        compilados no registo; outras subclasses são compiladas uma única vez a partir de PERIODOS.
+        """
+        tabela = cls.__dict__.get("_tabela")
+        if tabela is None:
+            tabela = cls._tabela = cls._compilar()
+        return tabela
+
+    @classmethod
+    def _compilar(cls):
+        periodos = {
+            season: {
+                dia: {
+                    periodo: [(a.hour * 60 + a.minute, b.hour * 60 + b.minute) for a, b in intervalos]
+                    for periodo, intervalos in periodos_dia.items()
+                }
+                for dia, periodos_dia in dias.items()
+            }
+            for season, dias in cls.PERIODOS.items()
+        }
+        return _compilar_periodos(cls.__name__, periodos)
+
+
     @classmethod
     def get_periodo_horario(cls, time):
         """Retorna o Periodo Horario em que nos encontramos."""
-        season = "Verão" if cls.is_summer(time) else "Inverno"
-        weekday = 0 if time.weekday() < 5 or hasattr(cls, 'diario') else time.weekday()
-        
-        for periodo_horario in cls.PERIODOS[season][weekday]:
-            for start, stop in cls.PERIODOS[season][weekday][periodo_horario]:
-                if cls.in_time_range(start.hour, start.minute, time, stop.hour, stop.minute):
-                    return periodo_horario
+        if estatisticas.ACTIVO:
+            estatisticas.contar("ciclo.classificacoes")
+        estacao = cls.estacao(time)
+        codigo = cls.tabela()[
+            estacao * MINUTOS_SEMANA
+            + time.weekday() * MINUTOS_DIA
+            + time.hour * 60
+            + time.minute
+        ]
+        return ph.de_codigo(codigo)
+
+    @classmethod
+    @estatisticas.medido("ciclo.classify_many")
+    def classify_many(cls, timestamps):
+        """Classifica de uma só vez um array de instantes (numpy datetime64 ou pandas DatetimeIndex).
+
+        Retorna um array uint8 com o código (Periodos_Horarios.codigo) do periodo horário de cada
+        instante. Tal como get_periodo_horario, usa a hora local (instantes com fuso horário são
+        classificados pela sua hora de parede).
+        """
+        import numpy as np
+
+        if getattr(timestamps, "tz", None) is not None:
+            utc = np.asarray(timestamps.tz_convert("UTC").tz_localize(None), dtype="datetime64[s]")
+            estacao = hora_legal.verao_many(utc.astype(np.int64))
+            timestamps = timestamps.tz_localize(None)
+        else:
+            estacao = None
+
+        minutos = np.asarray(timestamps, dtype="datetime64[m]")
+        if estacao is None:
+            # Limites da hora legal de Verão (hora local) para cada ano presente na amostra
+            dias = minutos.astype("datetime64[D]")
+            anos = dias.astype("datetime64[Y]").astype(np.int64) + 1970
+            primeiro, ultimo = (int(anos.min()), int(anos.max())) if anos.size else (1970, 1970)
+            limites = np.array(
+                [hora_legal.limites_verao(ano) for ano in range(primeiro, ultimo + 1)], dtype="datetime64[D]"
+            )[anos - primeiro]
+            estacao = (limites[..., 0] <= dias) & (dias < limites[..., 1])
+
+        return cls._classificar(minutos.astype(np.int64), estacao)
+
+    @classmethod
+    def get_periodo_horario_epoch(cls, epoch):
+        """Retorna o Periodo Horario de um instante Unix epoch (segundos UTC).
+
+        Usa apenas aritmética inteira sobre o instante e a cache anual das transições da hora legal.
+        """
+        if estatisticas.ACTIVO:
+            estatisticas.contar("ciclo.classificacoes")
+        epoch = int(epoch)
+        em_verao = hora_legal.verao(epoch)
+        minuto = (epoch + cls.FUSO + em_verao * hora_legal.HORA) // 60
+        estacao = em_verao
+        if cls.ESTACOES is ESTACOES_MESES:
+            estacao = cls.estacao(datetime(1970, 1, 1) + timedelta(minutes=minuto))
+        codigo = cls.tabela()[
+            estacao * MINUTOS_SEMANA
+            + (minuto // MINUTOS_DIA + 3) % 7 * MINUTOS_DIA
+            + minuto % MINUTOS_DIA
+        ]
+        return ph.de_codigo(codigo)
+
+    @classmethod
+    @estatisticas.medido("ciclo.classify_epoch")
+    def classify_epoch(cls, epochs):
+        """Versão vectorizada de get_periodo_horario_epoch.
+
+        Aceita um array de instantes Unix epoch (segundos) ou de datetime64 em UTC e retorna um
+        array uint8 com os códigos dos periodos horários.
+        """
+        import numpy as np
+
+        epochs = np.asarray(epochs)
+        if np.issubdtype(epochs.dtype, np.datetime64):
+            epochs = epochs.astype("datetime64[s]").astype(np.int64)
+        else:
+            epochs = np.floor(epochs).astype(np.int64)
+
+        em_verao = hora_legal.verao_many(epochs)
+        return cls._classificar((epochs + cls.FUSO + em_verao * hora_legal.HORA) // 60, em_verao)
+
+    @classmethod
+    def _classificar(cls, minutos, estacao):
+        """Indexa a tabela compilada a partir de minutos locais desde 1970-01-01 e da estação da hora legal.
+
+        Nos ciclos com ESTACOES_MESES a estação vem do mês dos minutos locais.
+        """
+        import numpy as np
+
+        if estatisticas.ACTIVO:
+            estatisticas.contar("ciclo.classificacoes", minutos.size)
+
+        if cls.ESTACOES is ESTACOES_MESES:
+            meses = minutos.astype("datetime64[m]").astype("datetime64[M]").astype(np.int64) % 12 + 1
+            estacao = (_MESES_VERAO[0] <= meses) & (meses <= _MESES_VERAO[1])
+
+        # 1970-01-01 foi uma Quinta-feira (weekday 3)
+        weekday = (minutos // MINUTOS_DIA + 3) % 7
+        tabela = np.frombuffer(cls.tabela(), dtype=np.uint8)
+        return tabela[estacao.astype(np.int64) * MINUTOS_SEMANA + weekday * MINUTOS_DIA + minutos % MINUTOS_DIA]
 
     @classmethod
     def get_intervalo_periodo_horario(cls, dt):
         """Retorna o intervalo do periodo horário em que nos encontramos."""
         
-        season = "Verão" if cls.is_summer(dt) else "Inverno"
-        weekday = 0 if dt.weekday() < 5 or hasattr(cls, 'diario') else dt.weekday()
+        season = cls.ESTACOES[cls.estacao(dt)]
+        weekday = _dia(cls.PERIODOS[season], dt.weekday())
         
         for tariff in cls.PERIODOS[season][weekday]:
             for start, stop in cls.PERIODOS[season][weekday][tariff]:
@@ -70,6 +363,124 @@ class Ciclo:
 
         raise CicloException(f"Não foi possível determinar o intervalo do periodo horário para a data {dt}.")
 
+    @classmethod
+    def _pontos(cls, estacao, mapa):
+        """Valor de cada minuto da semana e minutos (ordenados) em que esse valor muda.
+
+        mapa traduz o código de cada periodo horário no valor a comparar (por omissão o próprio
+        Periodos_Horarios). Calculado uma única vez por ciclo, estação e mapa.
+        """
+        cache = cls.__dict__.get("_cache_pontos")
+        if cache is None:
+            cache = cls._cache_pontos = {}
+
+        try:
+            return cache[estacao, mapa]
+        except KeyError:
+            pass
+
+        tabela = cls.tabela()[estacao * MINUTOS_SEMANA:(estacao + 1) * MINUTOS_SEMANA]
+        valores = [mapa[codigo] for codigo in tabela]
+        pontos = [minuto for minuto in range(MINUTOS_SEMANA) if valores[minuto] != valores[minuto - 1]]
+        cache[estacao, mapa] = valores, pontos
+        return valores, pontos
+
+    @classmethod
+    def _estacao(cls, t):
+        """Estação de t (ver estacao) e os seus limites (inicio, fim) em hora local."""
+        if cls.ESTACOES is ESTACOES_MESES:
+            inicio, fim = (datetime(t.year, mes, 1) for mes in (_MESES_VERAO[0], _MESES_VERAO[1] + 1))
+            if inicio <= t < fim:
+                return 1, inicio, fim
+            if t < inicio:
+                return 0, datetime(t.year - 1, _MESES_VERAO[1] + 1, 1), inicio
+            return 0, fim, datetime(t.year + 1, _MESES_VERAO[0], 1)
+
+        i_verao, f_verao = hora_legal.limites_verao(t.year)
+        if i_verao <= t < f_verao:
+            return 1, i_verao, f_verao
+        if t < i_verao:
+            return 0, hora_legal.limites_verao(t.year - 1)[1], i_verao
+        return 0, f_verao, hora_legal.limites_verao(t.year + 1)[0]
+
+    @classmethod
+    def _segmentos(cls, t, mapa):
+        """Itera sobre os segmentos (inicio, fim, valor) de valor constante a partir do que contém t.
+
+        Os segmentos são limitados às estações. Dentro de cada estação percorre os pontos de
+        mudança por índice e só constrói os datetime dos limites.
+        """
+        semana = timedelta(days=7)
+        while True:
+            estacao, inicio_estacao, fim_estacao = cls._estacao(t)
+            valores, pontos = cls._pontos(estacao, mapa)
+            minuto = t.weekday() * MINUTOS_DIA + t.hour * 60 + t.minute
+            segunda = datetime.combine(t.date(), time()) - timedelta(days=t.weekday())
+            valor = valores[minuto]
+            i = bisect_right(pontos, minuto)
+            n = len(pontos)
+
+            inicio = inicio_estacao
+            if n:
+                inicio = max(inicio, segunda + timedelta(minutes=pontos[i - 1] if i else pontos[-1] - MINUTOS_SEMANA))
+                while True:
+                    if i == n:
+                        i = 0
+                        segunda += semana
+                    fim = segunda + timedelta(minutes=pontos[i])
+                    if fim >= fim_estacao:
+                        break
+                    yield inicio, fim, valor
+                    inicio, valor = fim, valores[pontos[i]]
+                    i += 1
+            yield inicio, fim_estacao, valor
+            t = fim_estacao
+
+    @classmethod
+    def intervalos(cls, start, end=None, mapa=None):
+        """Itera sobre os intervalos (inicio, fim, periodo) entre start e end.
+
+        O primeiro intervalo é o que contém start, com o seu inicio real. Intervalos contíguos do
+        mesmo periodo são fundidos, incluindo através da meia-noite e da mudança de estação.
+        Sem end o iterador não termina. Instantes com fuso horário são tratados em hora local.
+        Num ciclo em que o valor nunca muda, os intervalos são as estações.
+
+        mapa (tuplo indexado pelo código do periodo) permite agrupar periodos, e.g. por Tarifa.
+        """
+        if mapa is None:
+            mapa = _PERIODOS
+
+        tz = start.tzinfo
+        if end is not None:
+            end = end.replace(tzinfo=None)
+
+        # Os pontos de mudança garantem valores diferentes dentro da estação, por isso só é preciso
+        # fundir segmentos nos limites da estação; sem pontos nas duas estações e com o mesmo valor
+        # a fusão não terminaria
+        inverno, verao = cls._pontos(0, mapa), cls._pontos(1, mapa)
+        fundir = bool(inverno[1] or verao[1] or inverno[0][0] != verao[0][0])
+
+        segmentos = cls._segmentos(start.replace(tzinfo=None), mapa)
+        inicio, fim, valor = next(segmentos)
+        if fundir:
+            anterior = next(cls._segmentos(inicio - timedelta(minutes=1), mapa))
+            while anterior[2] == valor:
+                inicio = anterior[0]
+                anterior = next(cls._segmentos(inicio - timedelta(minutes=1), mapa))
+
+        seguinte = next(segmentos)
+        while end is None or inicio < end:
+            while fundir and seguinte[2] == valor:
+                fim = seguinte[1]
+                seguinte = next(segmentos)
+
+            if tz is None:
+                yield inicio, fim, valor
+            else:
+                yield inicio.replace(tzinfo=tz), fim.replace(tzinfo=tz), valor
+            inicio, fim, valor = seguinte
+            seguinte = next(segmentos)
+
     @classmethod
     def iter_intervalo_periodo_horario(cls, dt):
         """Retorna o intervalo do próximo periodo horário."""
@@ -82,155 +493,137 @@ class Ciclo:
 class Ciclo_Semanal(Ciclo):
     """Ciclo semanal continente (os períodos horários diferem entre dias úteis e fim de semana)."""
 
-    def __str__(self) -> str:
-        return "Ciclo Semanal"
-
-    PERIODOS = {
-        "Verão": {
-            0: {
-                ph.PONTA: [
-                    (time(9, 15), time(12, 15)),
-                ],
-                ph.CHEIAS: [
-                    (time(7, 0), time(9, 15)),
-                    (time(12, 15), time(0, 0)),
-                ],
-                ph.VAZIO_NORMAL: [
-                    (time(6, 0), time(7, 0)),
-                    (time(0, 0), time(2, 0)),
-                ],
-                ph.SUPER_VAZIO: [
-                    (time(2, 0), time(6, 0)),
-                ],
-            }, # Segunda
-            5: {
-                ph.CHEIAS: [
-                    (time(9, 0), time(14, 0)),
-                    (time(20, 0), time(22, 0)),
-                ],
-                ph.VAZIO_NORMAL: [
-                    (time(0, 0), time(2, 0)),
-                    (time(6, 0), time(9, 0)),
-                    (time(14, 0), time(20, 0)),
-                    (time(22, 0), time(0, 0)),
-                ],
-                ph.SUPER_VAZIO: [
-                    (time(2, 0), time(6, 0)),
-                ],
-            }, # Sábado
-            6: {
-                ph.VAZIO_NORMAL: [
-                    (time(0, 0), time(2, 0)),
-                    (time(6, 0), time(0, 0)),
-                ],
-                ph.SUPER_VAZIO: [
-                    (time(2, 0), time(6, 0)),
-                ],
-            }, # Domingo
-        },
-        "Inverno": {
-            0: {
-                ph.PONTA: [
-                    (time(9, 30), time(12, 00)),
-                    (time(18, 30), time(21, 0)),
-                ],
-                ph.CHEIAS: [
-                    (time(7, 0), time(9, 30)),
-                    (time(12, 0), time(18, 30)),
-                    (time(21, 0), time(0, 0)),
-                ],
-                ph.VAZIO_NORMAL: [
-                    (time(6, 0), time(7, 0)),
-                    (time(0, 0), time(2, 0)),
-                ],
-                ph.SUPER_VAZIO: [
-                    (time(2, 0), time(6, 0)),
-                ],
-            }, # Segunda
-            5: {
-                ph.CHEIAS: [
-                    (time(9, 30), time(13, 0)),
-                    (time(18, 30), time(22, 0)),
-                ],
-                ph.VAZIO_NORMAL: [
-                    (time(0, 0), time(2, 0)),
-                    (time(6, 0), time(9, 30)),
-                    (time(13, 0), time(18, 30)),
-                    (time(22, 0), time(0, 0)),
-                ],
-                ph.SUPER_VAZIO: [
-                    (time(2, 0), time(6, 0)),
-                ],
-            }, # Sábado
-            6: {
-                ph.VAZIO_NORMAL: [
-                    (time(0, 0), time(2, 0)),
-                    (time(6, 0), time(0, 0)),
-                ],
-                ph.SUPER_VAZIO: [
-                    (time(2, 0), time(6, 0)),
-                ],
-            }, # Domingo
-        },
-    }
-
+    NOME = "Ciclo Semanal"
 
 
 class Ciclo_Diario(Ciclo):
-    """Ciclo diário continente (os períodos horários são iguais em todos os dias do ano) """
+    """Ciclo diário continente (os períodos horários são iguais em todos os dias do ano)."""
 
+    NOME = "Ciclo Diário"
     diario = True
 
-    def __str__(self) -> str:
-        return "Ciclo Diário"
-    
-    PERIODOS = {
-        "Verão": {
-            0: {
-                ph.PONTA: [
-                    (time(10, 30), time(13, 00)),
-                    (time(19, 30), time(21, 0)),
-                ],
-                ph.CHEIAS: [
-                    (time(8, 0), time(10, 30)),
-                    (time(13, 0), time(19, 30)),
-                    (time(21, 0), time(22, 0)),
-                ],
-                ph.VAZIO_NORMAL: [
-                    (time(0, 0), time(2, 0)),
-                    (time(6, 0), time(8, 0)),
-                    (time(22, 0), time(0, 0)),
-                ],
-                ph.SUPER_VAZIO: [
-                    (time(2, 0), time(6, 0)),
-                ],
-            }   # Todos os dias da semana
-        },
-        "Inverno": {
-            0: {
-                ph.PONTA: [
-                    (time(9, 0), time(10, 30)),
-                    (time(18, 0), time(20, 30)),
-                ],
-                ph.CHEIAS: [
-                    (time(8, 0), time(9, 0)),
-                    (time(10, 30), time(18, 0)),
-                    (time(20, 30), time(22, 0)),
-                ],
-                ph.VAZIO_NORMAL: [
-                    (time(0, 0), time(2, 0)),
-                    (time(6, 0), time(8, 0)),
-                    (time(22, 0), time(0, 0)),
-                ],
-                ph.SUPER_VAZIO: [
-                    (time(2, 0), time(6, 0)),
-                ],
-            }   # Todos os dias da semana
-        },
-    }
-
-
-
-
-
-MAPPING = {str(Ciclo_Semanal()): Ciclo_Semanal, str(Ciclo_Diario()): Ciclo_Diario}
+
+class Ciclo_Semanal_Opcional(Ciclo):
+    """Ciclo semanal opcional para clientes em MAT, AT e MT (continente)."""
+
+    NOME = "Ciclo Semanal Opcional"
+
+
+class Ciclo_Diario_Acores(Ciclo):
+    """Ciclo diário da Região Autónoma dos Açores (hora legal dos Açores)."""
+
+    NOME = "Ciclo Diário Açores"
+    diario = True
+
+
+class Ciclo_Diario_Opcional_Acores(Ciclo):
+    """Ciclo diário opcional da Região Autónoma dos Açores (hora legal dos Açores)."""
+
+    NOME = "Ciclo Diário Opcional Açores"
+    diario = True
+
+
+class Ciclo_Semanal_Acores(Ciclo):
+    """Ciclo semanal da Região Autónoma dos Açores, com estações por meses (ver ESTACOES_MESES)."""
+
+    NOME = "Ciclo Semanal Açores"
+
+
+class Ciclo_Diario_Madeira(Ciclo):
+    """Ciclo diário da Região Autónoma da Madeira."""
+
+    NOME = "Ciclo Diário Madeira"
+    diario = True
+
+
+class Ciclo_Diario_Opcional_Madeira(Ciclo):
+    """Ciclo diário opcional da Região Autónoma da Madeira."""
+
+    NOME = "Ciclo Diário Opcional Madeira"
+    diario = True
+
+
+class Ciclo_Semanal_Madeira(Ciclo):
+    """Ciclo semanal da Região Autónoma da Madeira, com estações por meses (ver ESTACOES_MESES)."""
+
+    NOME = "Ciclo Semanal Madeira"
+
+
+def registar(nome, periodos, classe=None, descricao=None, fuso=0):
+    """Regista o ciclo nome e retorna a sua classe (subclasse de Ciclo, em MAPPING).
+
+    periodos segue o formato dos ficheiros de definição: {estação: {dia: {periodo: ["HH:MM-HH:MM"]}}},
+    com as estações de ESTACOES (hora legal) ou de ESTACOES_MESES, em que cada dia se aplica até ao dia seguinte definido (e.g. 0 - dias úteis, 5 - Sábado,
+    6 - Domingo; só 0 num ciclo diário). Cada dia tem de estar coberto sem lacunas nem
+    sobreposições. A tabela é compilada no registo; registar de novo um ciclo igual retorna a
+    classe existente. Os ciclos incluídos no pacote são declarados neste módulo (e.g.
+    Ciclo_Semanal) e recebem a definição de DEFINICOES; os restantes são classes criadas no registo.
+    """
+    definicao = _ler_periodos(nome, periodos)
+    tabela = _compilar_periodos(nome, definicao)
+
+    existente = MAPPING.get(nome)
+    if existente is not None:
+        if existente.tabela() is tabela and existente.FUSO == fuso and existente.ESTACOES == _estacoes(nome, definicao):
+            return existente
+        raise CicloException(f"Ciclo {nome} já registado com outra definição")
+
+    atributos = {"FUSO": fuso, "ESTACOES": _estacoes(nome, definicao), "_definicao": definicao, "_tabela": tabela}
+    if all(list(dias) == [0] for dias in definicao.values()):
+        atributos["diario"] = True
+
+    classe = classe or nome.replace(" ", "_")
+    declarada = globals().get(classe)
+    if declarada is None:
+        ciclo = type(classe, (Ciclo,), {"__doc__": descricao, "__module__": __name__, "NOME": nome, **atributos})
+        globals()[classe] = ciclo  # referenciável como pyerse.ciclos.<classe>, e.g. pelo pickle
+    elif (
+        isinstance(declarada, type)
+        and issubclass(declarada, Ciclo)
+        and declarada.NOME == nome
+        and "_tabela" not in vars(declarada)
+    ):
+        # Ciclos declarados neste módulo (e.g. Ciclo_Semanal) recebem os periodos da definição
+        if getattr(declarada, "diario", False) != atributos.get("diario", False):
+            raise CicloException(f"{nome}: definição incompatível com {classe}.diario")
+        ciclo = declarada
+        for atributo, valor in atributos.items():
+            setattr(ciclo, atributo, valor)
+    else:
+        raise CicloException(f"Nome de classe {classe} já usado")
+
+    MAPPING[nome] = ciclo
+    return ciclo
+
+
+def registar_ficheiro(caminho):
+    """Regista os ciclos de um ficheiro de definição JSON e retorna as suas classes.
+
+    O ficheiro tem o formato de DEFINICOES: {nome: {"classe", "descricao", "fuso", "periodos"}}, com
+    fuso (por omissão 0) o desvio da hora legal de Inverno em relação a UTC em segundos (e.g. -3600
+    nos Açores). Os ficheiros indicados na variável de ambiente PYERSE_CICLOS (separados por
+    os.pathsep) são registados na importação.
+    """
+    with open(caminho, encoding="utf-8") as ficheiro:
+        definicoes = json.load(ficheiro)
+
+    return [
+        registar(nome, definicao.get("periodos", {}), definicao.get("classe"), definicao.get("descricao"), definicao.get("fuso", 0))
+        for nome, definicao in definicoes.items()
+    ]
+
+
+registar_ficheiro(DEFINICOES)
+for _caminho in os.environ.get("PYERSE_CICLOS", "").split(os.pathsep):
+    if _caminho:
+        registar_ficheiro(_caminho)
+
+
+if __name__ == "__main__":
+    # Valida ficheiros de definição: python -m pyerse.ciclos ficheiro.json ...
+    import sys
+
+    for _caminho in sys.argv[1:]:
+        registar_ficheiro(_caminho)
+    for _nome, _ciclo in MAPPING.items():
+        print(f"{_nome}: {_ciclo.__name__}")
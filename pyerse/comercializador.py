@@ -1,9 +1,13 @@
 """Informação por comercializador."""
 import logging
+import threading
+import weakref
 from enum import Enum
 from datetime import datetime, timedelta, time, date
+from typing import NamedTuple
+from pyerse import estatisticas
 from pyerse.periodos_horarios import Periodos_Horarios
-from pyerse.ciclos import Ciclo, Ciclo_Diario, Ciclo_Semanal, MAPPING as CYCLE_MAPPING
+from pyerse.ciclos import Ciclo, MAPPING as CYCLE_MAPPING
 
 
 class Opcao_Horaria(str, Enum):
@@ -23,6 +27,13 @@ class Tarifa(str, Enum):
     FORA_DE_VAZIO = "Fora de Vazio"
     NORMAL = "Normal"
 
+    @property
+    def codigo(self) -> int:
+        """Código inteiro compacto da tarifa (indice dos preços de PlanoCompacto)."""
+        return _CODIGOS_TARIFA[self]
+
+
+_CODIGOS_TARIFA = {tarifa: codigo for codigo, tarifa in enumerate(Tarifa)}
 
 POTENCIA = [
     1.15,
@@ -40,35 +51,160 @@ POTENCIA = [
     41.4,
 ]
 
+TARIFAS = {
+    Opcao_Horaria.SIMPLES: (Tarifa.NORMAL,),
+    Opcao_Horaria.BI_HORARIA: (Tarifa.VAZIO, Tarifa.FORA_DE_VAZIO),
+    Opcao_Horaria.TRI_HORARIA: (Tarifa.VAZIO, Tarifa.CHEIAS, Tarifa.PONTA),
+}
+"""Tarifas de cada opção horária (e ordem das colunas nas funções vectorizadas)."""
+
+TARIFA_PERIODO = {
+    Opcao_Horaria.BI_HORARIA: {
+        Periodos_Horarios.PONTA: Tarifa.FORA_DE_VAZIO,
+        Periodos_Horarios.CHEIAS: Tarifa.FORA_DE_VAZIO,
+        Periodos_Horarios.VAZIO_NORMAL: Tarifa.VAZIO,
+        Periodos_Horarios.SUPER_VAZIO: Tarifa.VAZIO,
+    },
+    Opcao_Horaria.TRI_HORARIA: {
+        Periodos_Horarios.PONTA: Tarifa.PONTA,
+        Periodos_Horarios.CHEIAS: Tarifa.CHEIAS,
+        Periodos_Horarios.VAZIO_NORMAL: Tarifa.VAZIO,
+        Periodos_Horarios.SUPER_VAZIO: Tarifa.VAZIO,
+    },
+}
+"""Tarifa aplicável a cada periodo horário, por opção horária."""
+
+# Tarifa indexada pelo código do periodo horário (ver Ciclo.intervalos)
+_MAPA_TARIFA = {
+    opcao: tuple(tarifas[periodo] for periodo in Periodos_Horarios)
+    for opcao, tarifas in TARIFA_PERIODO.items()
+}
+
 IVA_REDUZIDA = 1.06
 IVA_INTERMEDIA = 1.13
 IVA_NORMAL = 1.23
 
+PLAFOND_IVA_INTERMEDIA = {
+    Opcao_Horaria.SIMPLES: {Tarifa.NORMAL: (100, 150)},
+    Opcao_Horaria.BI_HORARIA: {Tarifa.VAZIO: (40, 60), Tarifa.FORA_DE_VAZIO: (60, 90)},
+    Opcao_Horaria.TRI_HORARIA: {Tarifa.VAZIO: (40, 60), Tarifa.CHEIAS: (42.9, 64.3), Tarifa.PONTA: (17.1, 25.7)},
+}
+"""kWh mensais por tarifa com IVA intermédio: (plafond, plafond para famílias numerosas)."""
+
 IMPOSTO_ESPECIAL_CONSUMO = 0.001
 CONTRIB_AUDIOVISUAL = 2.85
 TAXA_DGEG = 0.07
 
 
+def _arredondar(valores):
+    """round(valor, 2) do Python, vectorizado.
+
+    numpy.round multiplica por 100 antes de arredondar e pode divergir de round() quando o
+    resultado fica a menos de um ulp de .5; esses casos (raros) são arredondados um a um.
+    """
+    import numpy as np
+
+    valores = np.asarray(valores, dtype=np.float64)
+    arredondados = np.round(valores, 2)
+    escalados = valores * 100
+    duvidosos = np.abs(escalados - np.floor(escalados) - 0.5) <= 4 * np.spacing(np.abs(escalados))
+    if duvidosos.any():
+        arredondados[duvidosos] = [round(valor, 2) for valor in valores[duvidosos].tolist()]
+    return arredondados
+
+
+def custos_kWh_iva(opcao_horaria: Opcao_Horaria, precos, kwh, familia_numerosa=False):
+    """Versão vectorizada de Plano.custo_kWh_iva para muitos clientes/meses de uma vez.
+
+    kwh tem os kWh mensais com uma coluna por tarifa de TARIFAS[opcao_horaria] (e.g. forma
+    (clientes, tarifas)); precos (Euros por kWh, mesmas colunas) e familia_numerosa (máscara por
+    linha) são difundidos para a forma de kwh. Retorna os arrays (parcela com IVA intermédio,
+    parcela com IVA normal), com os mesmos arredondamentos de Plano.custo_kWh_iva.
+    """
+    import numpy as np
+
+    kwh = np.asarray(kwh, dtype=np.float64)
+    precos = np.broadcast_to(np.asarray(precos, dtype=np.float64), kwh.shape)
+    familia_numerosa = np.asarray(familia_numerosa, dtype=bool)[..., np.newaxis]
+
+    plafonds = np.array(
+        [PLAFOND_IVA_INTERMEDIA[opcao_horaria][tarifa] for tarifa in TARIFAS[opcao_horaria]], dtype=np.float64
+    )
+    plafond = np.where(familia_numerosa, plafonds[:, 1], plafonds[:, 0])
+
+    acima = kwh > plafond
+    intermedia = _arredondar(np.where(acima, plafond, kwh) * precos * IVA_INTERMEDIA)
+    normal = np.where(acima, _arredondar((kwh - plafond) * precos * IVA_NORMAL), 0.0)
+    return intermedia, normal
+
+
+def _locais(timestamps):
+    return timestamps.tz_localize(None) if getattr(timestamps, "tz", None) is not None else timestamps
+
+
+def dias_distintos(timestamps):
+    """Número de dias (em hora local) com leituras de um array de instantes (ver Plano.faturar_serie)."""
+    import numpy as np
+
+    return len(np.unique(np.asarray(_locais(timestamps), dtype="datetime64[D]")))
+
+
+def verificar_mes(timestamps):
+    """Verifica que as leituras de um array de instantes são todas do mesmo mês (em hora local).
+
+    Os plafonds de IVA intermédio são mensais: um perfil de vários meses deve ser faturado mês a mês.
+    """
+    import numpy as np
+
+    meses = np.asarray(_locais(timestamps), dtype="datetime64[M]")
+    if meses.size and meses.min() != meses.max():
+        raise PlanoException(f"Leituras de {meses.min()} a {meses.max()}: faturar cada mês em separado")
+
+
 class PlanoException(Exception):
     """Exceptions lançadas por Plano."""
 
 
+class Fatura(NamedTuple):
+    """Fatura detalhada de um periodo, em Euros."""
+
+    energia: dict
+    """kWh consumidos por Tarifa."""
+    custo_energia: dict
+    """Custo da energia por Tarifa: tuplo (parcela com IVA intermédio, parcela com IVA normal)."""
+    iec: float
+    """Imposto especial de consumo (com IVA)."""
+    custos_fixos: float
+    total: float
+
+
+def _obter_ciclo(opcao_horaria, ciclo):
+    """Ciclo de um plano, a partir da classe ou do NOME registado (ver pyerse.ciclos.MAPPING)."""
+    if opcao_horaria != Opcao_Horaria.SIMPLES and ciclo is None:
+        raise PlanoException("Ciclo não definido")
+
+    if ciclo and isinstance(ciclo, str):
+        if ciclo not in CYCLE_MAPPING:
+            raise PlanoException(f"Ciclo {ciclo} desconhecido")
+        ciclo = CYCLE_MAPPING[ciclo]
+    return ciclo
+
+
 class Plano:
     """Plano de Energia."""
 
+    __slots__ = ("_potencia", "_opcao_horaria", "_ciclo", "_custo", "_custo_potencia", "_janela", "__weakref__")
+
     def __init__(
         self, potencia: float, opcao_horaria: Opcao_Horaria, ciclo: Ciclo = None
     ):
         """Inicialização do Plano."""
         self._potencia = potencia if potencia in POTENCIA else None
         self._opcao_horaria = opcao_horaria
-        if opcao_horaria != Opcao_Horaria.SIMPLES and ciclo is None:
-            raise PlanoException("Ciclo não definido")
-
-        if ciclo and ciclo not in [Ciclo_Diario, Ciclo_Semanal]:
-            ciclo = CYCLE_MAPPING[ciclo]
-        self._ciclo = ciclo
+        self._ciclo = _obter_ciclo(opcao_horaria, ciclo)
         self._custo = {}
+        self._custo_potencia = None
+        self._janela = None
 
     def __str__(self):
         """Representação textual do plano."""
@@ -78,162 +214,161 @@ class Plano:
     def potencia(self):
         return self._potencia
 
+    @property
+    def opcao_horaria(self):
+        return self._opcao_horaria
+
+    @property
+    def ciclo(self):
+        return self._ciclo
+
     @property
     def tarifas(self):
         """Tarifas disponiveis para o plano."""
-        if self._opcao_horaria == Opcao_Horaria.SIMPLES:
-            return [Tarifa.NORMAL]
-        elif self._opcao_horaria == Opcao_Horaria.BI_HORARIA:
-            return [Tarifa.VAZIO, Tarifa.FORA_DE_VAZIO]
-        elif self._opcao_horaria == Opcao_Horaria.TRI_HORARIA:
-            return [Tarifa.VAZIO, Tarifa.CHEIAS, Tarifa.PONTA]
+        return list(TARIFAS[self._opcao_horaria])
 
     def tarifa_actual(self, now=None):
-        """Tarifa actual."""
+        """Tarifa actual.
+
+        A tarifa é guardada com o intervalo [inicio, fim) em que é válida (ver intervalos), pelo
+        que consultas seguidas dentro do mesmo intervalo não voltam a classificar o instante.
+        """
         if now is None:
             now = datetime.now()
 
         if self._opcao_horaria == Opcao_Horaria.SIMPLES:
             return Tarifa.NORMAL
-        elif self._opcao_horaria == Opcao_Horaria.BI_HORARIA:
-            return (
-                Tarifa.VAZIO
-                if self._ciclo.get_periodo_horario(now)
-                in [Periodos_Horarios.VAZIO_NORMAL, Periodos_Horarios.SUPER_VAZIO]
-                else Tarifa.FORA_DE_VAZIO
-            )
-        elif self._opcao_horaria == Opcao_Horaria.TRI_HORARIA:
-            periodo_actual = self._ciclo.get_periodo_horario(now)
-            if periodo_actual in [
-                Periodos_Horarios.VAZIO_NORMAL,
-                Periodos_Horarios.SUPER_VAZIO,
-            ]:
-                return Tarifa.VAZIO
-            elif periodo_actual == Periodos_Horarios.PONTA:
-                return Tarifa.PONTA
-            elif periodo_actual == Periodos_Horarios.CHEIAS:
-                return Tarifa.CHEIAS
 
+        # Com o mesmo tzinfo (ou ambos sem fuso) a comparação é feita em hora local, como nos ciclos
+        janela = self._janela
+        if janela is not None and janela[3] is now.tzinfo and janela[0] <= now < janela[1]:
+            return janela[2]
+
+        inicio, fim, tarifa = next(self.intervalos(now))
+        self._janela = (inicio, fim, tarifa, now.tzinfo)
+        return tarifa
+
+    def invalidar(self):
+        """Esquece o intervalo guardado por tarifa_actual (e.g. após alterar o plano ou o ciclo)."""
+        self._janela = None
+
+    def intervalos(self, start, end=None):
+        """Itera sobre os intervalos (inicio, fim, tarifa) entre start e end.
+
+        Periodos contíguos com a mesma Tarifa (e.g. vazio normal e super vazio) são fundidos.
+        O primeiro intervalo é o que contém start, com o seu inicio real. Sem end o iterador não
+        termina; na opção simples há um único intervalo (start, end, Tarifa.NORMAL).
+        """
+        if self._opcao_horaria == Opcao_Horaria.SIMPLES:
+            yield start, end, Tarifa.NORMAL
+            return
+
+        yield from self._ciclo.intervalos(start, end, _MAPA_TARIFA[self._opcao_horaria])
+
+    def next_transition(self, now=None):
+        """Próxima mudança de tarifa: tuplo (instante, nova tarifa), ou None na opção simples."""
+        if now is None:
+            now = datetime.now()
+
+        if self._opcao_horaria == Opcao_Horaria.SIMPLES:
+            return None
+
+        intervalos = self.intervalos(now)
+        next(intervalos)
+        start, _, tarifa = next(intervalos)
+        return start, tarifa
 
     def intervalo(self, now=None):
-        """iterator sobre os Intervalos de tarifa."""
+        """iterator sobre os Intervalos de tarifa.
+
+        O primeiro intervalo começa no inicio do periodo horário actual; para intervalos
+        completos usar intervalos().
+        """
+        if estatisticas.ACTIVO:
+            return estatisticas.iterar("plano.intervalo", self._intervalo(now))
+        return self._intervalo(now)
+
+    def _intervalo(self, now):
         if now is None:
             now = datetime.now()
 
         if self._opcao_horaria == Opcao_Horaria.SIMPLES:
             datetime_start = datetime.combine(now, time(0, 0)) + timedelta(days=1)
-            return datetime_start, datetime_start + timedelta(days=1)
+            yield datetime_start, datetime_start + timedelta(days=1)
 
         elif self._opcao_horaria in [Opcao_Horaria.BI_HORARIA, Opcao_Horaria.TRI_HORARIA]:
-            current_tarifa = self.tarifa_actual(now)
-            return_start, return_stop = None, None
-            initial = None
-            current = False
-
-            for start, stop in self._ciclo.iter_intervalo_periodo_horario(now):
-                new_tarifa = self.tarifa_actual(start)
-                if initial is None:
-                    initial = start #TODO devia andar para tras
-
-                if new_tarifa != current_tarifa and return_start is None:
-                    if not current:
-                        current = True
-                        yield initial, start              
-                    return_start = start
-                    current_tarifa = new_tarifa
-
-                if new_tarifa != current_tarifa and return_stop is None:
-                    return_stop = start
-            
-                    yield return_start, return_stop
-
-                    current_tarifa = new_tarifa
-                    return_start, return_stop = return_stop, None
+            intervalos = self.intervalos(now)
+            _, stop, _ = next(intervalos)
+            yield self._ciclo.get_intervalo_periodo_horario(now)[0], stop
+
+            for start, stop, _ in intervalos:
+                yield start, stop
 
     def definir_custo_kWh(self, tarifa: Tarifa, custo: float):
         """Configura o custo em Euros por kWh da tarifa."""
         self._custo[tarifa] = custo
+        self.invalidar()
 
     def definir_custo_potencia(self, custo: float):
         """Configura o custo em Euros por dia da potencia instalada."""
-        self._custo[self._potencia] = custo
+        self._custo_potencia = custo
+        self.invalidar()
 
     def custo_tarifa(self, tarifa: Tarifa):
         return self._custo.get(tarifa, 0)  # TODO exception
 
     def custo_potencia(self):
-        return self._custo[self._potencia]
+        if self._custo_potencia is None:
+            raise PlanoException("Sem valor de custo para a potencia")
+        return self._custo_potencia
+
+    def preco_kWh(self, tarifa: Tarifa):
+        """Custo em Euros por kWh da tarifa, sem impostos."""
+        try:
+            return self._custo[tarifa]
+        except KeyError:
+            raise PlanoException(f"Sem valor de custo para {tarifa}")
+
+    def _plafond(self, tarifa: Tarifa, familia_numerosa):
+        """kWh com IVA intermédio da tarifa (ver PLAFOND_IVA_INTERMEDIA)."""
+        try:
+            return PLAFOND_IVA_INTERMEDIA[self._opcao_horaria][tarifa][1 if familia_numerosa else 0]
+        except KeyError:
+            raise PlanoException(f"Tarifa {tarifa} não disponivel em {self._opcao_horaria}")
 
-    def custo_kWh_actual(self, kwh_consumidos: float, familia_numerosa=False):
+    def custo_kWh_actual(self, kwh_consumidos: float, familia_numerosa=False, now=None):
         """
-        Custo com IVA do kWh na tarifa do momento.
+        Custo com IVA do kWh na tarifa do momento (now, por omissão o instante actual).
 
         Ver https://www.erse.pt/media/pzievesl/ersexplica_aplicação-do-iva.pdf
         """
-        tarifa_actual = self.tarifa_actual()
-
-        try:
-            custo_kwh = self._custo[tarifa_actual]
-        except KeyError:
-            raise PlanoException(f"Sem valor de custo para {tarifa_actual}")
+        tarifa_actual = self.tarifa_actual(now)
+        custo_kwh = self.preco_kWh(tarifa_actual)
 
         if self._potencia > 6.9:
             return custo_kwh * IVA_NORMAL
 
-        def desconto(plafond):
-            if kwh_consumidos > plafond:
-                return custo_kwh * IVA_NORMAL
-            else:
-                return custo_kwh * IVA_INTERMEDIA
-
-        if self._opcao_horaria == Opcao_Horaria.SIMPLES:
-            return desconto(150 if familia_numerosa else 100)
-
-        if self._opcao_horaria == Opcao_Horaria.BI_HORARIA:
-            if tarifa_actual == Tarifa.VAZIO:
-                return desconto(60 if familia_numerosa else 40)
-            else:
-                return desconto(90 if familia_numerosa else 60)
-
-        if self._opcao_horaria == Opcao_Horaria.TRI_HORARIA:
-            if tarifa_actual == Tarifa.CHEIAS:
-                return desconto(64.3 if familia_numerosa else 42.9)
-            elif tarifa_actual == Tarifa.PONTA:
-                return desconto(25.7 if familia_numerosa else 17.1)
-            elif tarifa_actual == Tarifa.VAZIO:
-                return desconto(60 if familia_numerosa else 40)
+        if kwh_consumidos > self._plafond(tarifa_actual, familia_numerosa):
+            return custo_kwh * IVA_NORMAL
+        return custo_kwh * IVA_INTERMEDIA
 
     def custo_kWh(self, tarifa: Tarifa, kwh_consumidos: float, familia_numerosa=False):
         """Custo em Euros dos kWh consumidos na tarifa."""
-        try:
-            custo_kwh = self._custo[tarifa]
-        except KeyError:
-            raise PlanoException(f"Sem valor de custo para {tarifa}")
+        return sum(self.custo_kWh_iva(tarifa, kwh_consumidos, familia_numerosa))
 
-        def desconto(plafond):
-            if kwh_consumidos > plafond:
-                return round(plafond * custo_kwh * IVA_INTERMEDIA, 2) + round(
-                    (kwh_consumidos - plafond) * custo_kwh * IVA_NORMAL, 2
-                )
-            else:
-                return round(kwh_consumidos * custo_kwh * IVA_INTERMEDIA, 2)
+    def custo_kWh_iva(self, tarifa: Tarifa, kwh_consumidos: float, familia_numerosa=False):
+        """Custo em Euros dos kWh consumidos na tarifa, separado por taxa de IVA.
 
-        if self._opcao_horaria == Opcao_Horaria.SIMPLES:
-            return desconto(150 if familia_numerosa else 100)
-
-        if self._opcao_horaria == Opcao_Horaria.BI_HORARIA:
-            if tarifa == Tarifa.VAZIO:
-                return desconto(60 if familia_numerosa else 40)
-            else:
-                return desconto(90 if familia_numerosa else 60)
-
-        if self._opcao_horaria == Opcao_Horaria.TRI_HORARIA:
-            if tarifa == Tarifa.CHEIAS:
-                return desconto(64.3 if familia_numerosa else 42.9)
-            elif tarifa == Tarifa.PONTA:
-                return desconto(25.7 if familia_numerosa else 17.1)
-            elif tarifa == Tarifa.VAZIO:
-                return desconto(60 if familia_numerosa else 40)
+        Retorna o tuplo (parcela com IVA intermédio até ao plafond, parcela com IVA normal).
+        """
+        custo_kwh = self.preco_kWh(tarifa)
+        plafond = self._plafond(tarifa, familia_numerosa)
+
+        if kwh_consumidos > plafond:
+            return round(plafond * custo_kwh * IVA_INTERMEDIA, 2), round(
+                (kwh_consumidos - plafond) * custo_kwh * IVA_NORMAL, 2
+            )
+        return round(kwh_consumidos * custo_kwh * IVA_INTERMEDIA, 2), 0
 
     def custo_kWh_final(
         self, tarifa: Tarifa, kwh_consumidos: float, familia_numerosa=False
@@ -243,6 +378,88 @@ class Plano:
             + kwh_consumidos * IMPOSTO_ESPECIAL_CONSUMO * IVA_NORMAL
         )
 
+    def indices_tarifa(self, timestamps):
+        """Indice (em self.tarifas) da tarifa de cada instante de um array (ver Ciclo.classify_many)."""
+        import numpy as np
+
+        if self._opcao_horaria == Opcao_Horaria.SIMPLES:
+            return np.zeros(np.shape(timestamps), dtype=np.intp)
+
+        return self.indices_tarifa_codigos(self._ciclo.classify_many(timestamps))
+
+    def indices_tarifa_codigos(self, codigos):
+        """Indice (em self.tarifas) da tarifa de cada código de periodo horário (Periodos_Horarios.codigo)."""
+        import numpy as np
+
+        if self._opcao_horaria == Opcao_Horaria.SIMPLES:
+            return np.zeros(np.shape(codigos), dtype=np.intp)
+
+        # Indice da tarifa de cada periodo horário, indexado pelo código do periodo
+        tarifas = self.tarifas
+        indice = np.array([tarifas.index(tarifa) for tarifa in _MAPA_TARIFA[self._opcao_horaria]])
+        return indice[codigos]
+
+    def energia_serie(self, timestamps, kwh):
+        """kWh por Tarifa de uma série de leituras (arrays de instantes e de kWh).
+
+        A classificação e a agregação são vectorizadas (ver Ciclo.classify_many).
+        """
+        return self._energia(self.indices_tarifa(timestamps), kwh)
+
+    def energia_codigos(self, codigos, kwh):
+        """kWh por Tarifa de leituras já classificadas (códigos de periodo horário e kWh)."""
+        return self._energia(self.indices_tarifa_codigos(codigos), kwh)
+
+    def energia_periodos(self, energia_periodos: dict):
+        """kWh por Tarifa a partir dos kWh consumidos em cada Periodos_Horarios."""
+        if self._opcao_horaria == Opcao_Horaria.SIMPLES:
+            return {Tarifa.NORMAL: sum(energia_periodos.values())}
+
+        energia = {tarifa: 0 for tarifa in self.tarifas}
+        for periodo, kwh in energia_periodos.items():
+            energia[TARIFA_PERIODO[self._opcao_horaria][periodo]] += kwh
+        return energia
+
+    def _energia(self, indices, kwh):
+        import numpy as np
+
+        tarifas = self.tarifas
+        totais = np.bincount(
+            np.ravel(indices), weights=np.ravel(np.asarray(kwh, dtype=np.float64)), minlength=len(tarifas)
+        )
+        return {tarifa: float(total) for tarifa, total in zip(tarifas, totais)}
+
+    def faturar(self, energia: dict, dias: int, familia_numerosa=False):
+        """Fatura de um periodo a partir dos kWh consumidos por Tarifa."""
+        energia = {tarifa: energia.get(tarifa, 0) for tarifa in self.tarifas}
+        custo_energia = {
+            tarifa: self.custo_kWh_iva(tarifa, kwh, familia_numerosa)
+            for tarifa, kwh in energia.items()
+        }
+        iec = sum(kwh * IMPOSTO_ESPECIAL_CONSUMO * IVA_NORMAL for kwh in energia.values())
+        custos_fixos = self.custos_fixos(dias)
+
+        return Fatura(
+            energia,
+            custo_energia,
+            iec,
+            custos_fixos,
+            sum(sum(custo) for custo in custo_energia.values()) + iec + custos_fixos,
+        )
+
+    def faturar_serie(self, timestamps, kwh, dias: int = None, familia_numerosa=False):
+        """Fatura de um mês a partir de um perfil de carga (arrays de instantes e de kWh).
+
+        Os plafonds de IVA são mensais: leituras de mais do que um mês lançam PlanoException (ver
+        verificar_mes). Sem dias, os custos fixos são calculados para o número de dias distintos
+        com leituras.
+        """
+        verificar_mes(timestamps)
+        if dias is None:
+            dias = dias_distintos(timestamps)
+
+        return self.faturar(self.energia_serie(timestamps, kwh), dias, familia_numerosa)
+
     def custos_fixos(self, dias: int):
         """Custos fixos em Euros."""
         if self._potencia <= 3.45:
@@ -251,7 +468,7 @@ class Plano:
             )
         custo_potencia = (
             dias
-            * self._custo[self._potencia]
+            * self.custo_potencia()
             * (IVA_REDUZIDA if self._potencia <= 3.45 else IVA_NORMAL)
         )
 
@@ -262,6 +479,102 @@ class Plano:
         )
 
 
+class PlanoCompacto(Plano):
+    """Plano imutável e partilhado, para carteiras com muitos clientes e poucos planos distintos.
+
+    Os preços de energia ficam num tuplo indexado por Tarifa.codigo. PlanoCompacto(...) retorna
+    sempre o mesmo objecto para a mesma potência, opção horária, ciclo e preços (flyweight), pelo
+    que os planos podem ser partilhados entre clientes e usados como chaves de caches. precos é um
+    dicionário {Tarifa: Euros por kWh} e preco_potencia o custo em Euros por dia da potência.
+    """
+
+    __slots__ = ("_precos", "_chave")
+
+    _planos = weakref.WeakValueDictionary()
+    _lock = threading.Lock()
+
+    def __new__(
+        cls, potencia: float, opcao_horaria: Opcao_Horaria, ciclo: Ciclo = None, precos=None, preco_potencia=None
+    ):
+        opcao_horaria = Opcao_Horaria(opcao_horaria)
+        ciclo = _obter_ciclo(opcao_horaria, ciclo)
+        tabela = [None] * len(_CODIGOS_TARIFA)
+        for tarifa, preco in (precos or {}).items():
+            tabela[Tarifa(tarifa).codigo] = float(preco)
+        chave = (
+            potencia, opcao_horaria, ciclo, tuple(tabela), None if preco_potencia is None else float(preco_potencia)
+        )
+
+        with cls._lock:
+            plano = cls._planos.get(chave)
+            if plano is None:
+                plano = super().__new__(cls)
+                for nome, valor in (
+                    ("_potencia", potencia if potencia in POTENCIA else None),
+                    ("_opcao_horaria", opcao_horaria),
+                    ("_ciclo", ciclo),
+                    ("_precos", chave[3]),
+                    ("_custo_potencia", chave[4]),
+                    ("_janela", None),
+                    ("_chave", chave),
+                ):
+                    object.__setattr__(plano, nome, valor)
+                cls._planos[chave] = plano
+        return plano
+
+    def __init__(self, *args, **kwargs):
+        pass  # construído em __new__
+
+    @classmethod
+    def de_plano(cls, plano: Plano):
+        """PlanoCompacto com a potência, opção horária, ciclo e preços de um Plano."""
+        if isinstance(plano, PlanoCompacto):
+            return plano
+        return cls(plano.potencia, plano.opcao_horaria, plano.ciclo, plano._custo, plano._custo_potencia)
+
+    def __setattr__(self, nome, valor):
+        # _janela é apenas a cache de tarifa_actual, partilhada por quem usa o plano
+        if nome != "_janela":
+            raise AttributeError(f"{type(self).__name__} é imutável")
+        object.__setattr__(self, nome, valor)
+
+    def __delattr__(self, nome):
+        raise AttributeError(f"{type(self).__name__} é imutável")
+
+    def __reduce__(self):
+        potencia, opcao_horaria, ciclo, _, preco_potencia = self._chave
+        return type(self), (potencia, opcao_horaria, ciclo, self.precos, preco_potencia)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    @property
+    def precos(self):
+        """Preços de energia definidos: {Tarifa: Euros por kWh}."""
+        return {tarifa: preco for tarifa, preco in zip(Tarifa, self._precos) if preco is not None}
+
+    def definir_custo_kWh(self, tarifa: Tarifa, custo: float):
+        raise PlanoException("PlanoCompacto é imutável: criar outro plano com os novos preços")
+
+    def definir_custo_potencia(self, custo: float):
+        raise PlanoException("PlanoCompacto é imutável: criar outro plano com o novo preço")
+
+    def custo_tarifa(self, tarifa: Tarifa):
+        codigo = _CODIGOS_TARIFA.get(tarifa)
+        preco = None if codigo is None else self._precos[codigo]
+        return 0 if preco is None else preco
+
+    def preco_kWh(self, tarifa: Tarifa):
+        codigo = _CODIGOS_TARIFA.get(tarifa)
+        preco = None if codigo is None else self._precos[codigo]
+        if preco is None:
+            raise PlanoException(f"Sem valor de custo para {tarifa}")
+        return preco
+
+
 class Comercializador:
     """Representação de um Comercializador."""
 
@@ -270,12 +583,17 @@ class Comercializador:
     ):
         """Configuração de um plano para o comercializador."""
         self._name = nome
-        self._plano = Plano(potencia, horario, CYCLE_MAPPING[ciclo])
+        self._plano = Plano(potencia, horario, ciclo or None)
 
     def __str__(self) -> str:
         """Nome do operador e respectivo plano."""
         return f"{self._name} - {self._plano}"
 
+    @property
+    def nome(self):
+        """Nome do comercializador."""
+        return self._name
+
     @classmethod
     def potencias(cls):
         """Potencias disponiveis."""
@@ -0,0 +1,98 @@
+"""Comparação de várias ofertas (Comercializador/Plano) sobre o mesmo perfil de carga."""
+
+from typing import NamedTuple
+
+from pyerse.comercializador import (
+    IMPOSTO_ESPECIAL_CONSUMO,
+    IVA_NORMAL,
+    Comercializador,
+    Fatura,
+    Opcao_Horaria,
+    Plano,
+    TARIFAS,
+    Tarifa,
+    custos_kWh_iva,
+    dias_distintos,
+    verificar_mes,
+)
+from pyerse.periodos_horarios import Periodos_Horarios
+
+
+class Proposta(NamedTuple):
+    """Linha do ranking de comparar."""
+
+    nome: str
+    plano: Plano
+    fatura: Fatura
+
+
+def energia_por_periodo(ciclo, timestamps, kwh):
+    """kWh consumidos em cada Periodos_Horarios, numa única classificação do perfil."""
+    import numpy as np
+
+    totais = np.bincount(
+        np.ravel(ciclo.classify_many(timestamps)),
+        weights=np.ravel(np.asarray(kwh, dtype=np.float64)),
+        minlength=len(Periodos_Horarios),
+    )
+    return {periodo: float(totais[periodo.codigo]) for periodo in Periodos_Horarios}
+
+
+def comparar(ofertas, timestamps, kwh, dias: int = None, familia_numerosa=False):
+    """Ranking, do mais barato para o mais caro, das ofertas para o perfil de carga.
+
+    ofertas pode conter Comercializador ou Plano. O perfil é classificado uma única vez por Ciclo
+    distinto; os kWh por Tarifa de cada opção horária derivam dos totais por periodo horário e os
+    custos de energia são calculados com custos_kWh_iva para todas as ofertas da mesma opção.
+    Instantes com fuso horário (pandas DatetimeIndex) são tratados em hora local e, como em
+    Plano.faturar_serie, o perfil deve ser de um só mês.
+    """
+    import numpy as np
+
+    verificar_mes(timestamps)
+    kwh = np.asarray(kwh, dtype=np.float64)
+    if dias is None:
+        dias = dias_distintos(timestamps)
+    total = float(kwh.sum())
+
+    por_ciclo = {}
+    por_opcao = {}
+    for oferta in ofertas:
+        if isinstance(oferta, Comercializador):
+            nome, plano = oferta.nome, oferta.plano
+        else:
+            nome, plano = str(oferta), oferta
+
+        if plano.opcao_horaria == Opcao_Horaria.SIMPLES:
+            energia = {Tarifa.NORMAL: total}
+        else:
+            if plano.ciclo not in por_ciclo:
+                por_ciclo[plano.ciclo] = energia_por_periodo(plano.ciclo, timestamps, kwh)
+            energia = plano.energia_periodos(por_ciclo[plano.ciclo])
+
+        por_opcao.setdefault(plano.opcao_horaria, []).append((nome, plano, energia))
+
+    propostas = []
+    for opcao_horaria, linhas in por_opcao.items():
+        # Custos de energia de todas as ofertas da opção horária de uma só vez
+        tarifas = TARIFAS[opcao_horaria]
+        intermedia, normal = custos_kWh_iva(
+            opcao_horaria,
+            [[plano.preco_kWh(tarifa) for tarifa in tarifas] for _, plano, _ in linhas],
+            [[energia[tarifa] for tarifa in tarifas] for _, _, energia in linhas],
+            familia_numerosa,
+        )
+        for (nome, plano, energia), intermedias, normais in zip(linhas, intermedia.tolist(), normal.tolist()):
+            custo_energia = dict(zip(tarifas, zip(intermedias, normais)))
+            iec = sum(kwh * IMPOSTO_ESPECIAL_CONSUMO * IVA_NORMAL for kwh in energia.values())
+            custos_fixos = plano.custos_fixos(dias)
+            fatura = Fatura(
+                energia,
+                custo_energia,
+                iec,
+                custos_fixos,
+                sum(sum(custo) for custo in custo_energia.values()) + iec + custos_fixos,
+            )
+            propostas.append(Proposta(nome, plano, fatura))
+
+    return sorted(propostas, key=lambda proposta: proposta.fatura.total)
@@ -0,0 +1,160 @@
+"""Instrumentação opcional dos caminhos críticos: contadores, histogramas de latência e hooks.
+
+Desactivada por omissão: cada ponto instrumentado custa apenas a verificação de ACTIVO. Activar
+com activar() ou com a variável de ambiente PYERSE_ESTATISTICAS=1; consultar com pyerse.stats().
+
+Nomes registados:
+
+- ciclo.classificacoes: instantes classificados (get_periodo_horario*, classify_*)
+- ciclo.classify_many, ciclo.classify_epoch: latência de cada chamada
+- plano.intervalo: latência de cada passo de Plano.intervalo
+- simulador.simular, simulador.pedido: latência de _simular e de cada pedido HTTP ao simulador
+- cache.acertos, cache.falhas, cache.partilhados: consultas a CacheSimulador (partilhados são
+  pedidos que aguardaram um pedido idêntico em curso)
+"""
+
+from bisect import bisect_left
+from functools import wraps
+import os
+import threading
+import time
+
+ACTIVO = os.environ.get("PYERSE_ESTATISTICAS", "") not in ("", "0")
+"""Se a instrumentação está activa."""
+
+LIMITES = (1e-6, 1e-5, 1e-4, 1e-3, 1e-2, 1e-1, 1.0, 10.0)
+"""Limites superiores (segundos) dos baldes dos histogramas; o último balde não tem limite."""
+
+_lock = threading.Lock()
+_contadores = {}
+_histogramas = {}
+_hooks = []
+
+
+class Histograma:
+    """Distribuição das durações registadas com um nome."""
+
+    __slots__ = ("n", "total", "minimo", "maximo", "baldes")
+
+    def __init__(self):
+        self.n = 0
+        self.total = 0.0
+        self.minimo = float("inf")
+        self.maximo = 0.0
+        self.baldes = [0] * (len(LIMITES) + 1)
+
+    def registar(self, duracao):
+        self.n += 1
+        self.total += duracao
+        self.minimo = min(self.minimo, duracao)
+        self.maximo = max(self.maximo, duracao)
+        self.baldes[bisect_left(LIMITES, duracao)] += 1
+
+    def resumo(self):
+        return {
+            "n": self.n,
+            "total": self.total,
+            "media": self.total / self.n,
+            "min": self.minimo,
+            "max": self.maximo,
+            "baldes": dict(zip(LIMITES + (float("inf"),), self.baldes)),
+        }
+
+
+def activar(activo=True):
+    """Activa (ou desactiva) a instrumentação."""
+    global ACTIVO
+    ACTIVO = activo
+
+
+def repor():
+    """Apaga os contadores e histogramas."""
+    with _lock:
+        _contadores.clear()
+        _histogramas.clear()
+
+
+def contar(nome, n=1):
+    """Incrementa o contador nome."""
+    with _lock:
+        _contadores[nome] = _contadores.get(nome, 0) + n
+
+
+def registar(nome, duracao):
+    """Regista uma duração (segundos) no histograma nome e chama os hooks com (nome, duracao)."""
+    with _lock:
+        histograma = _histogramas.get(nome)
+        if histograma is None:
+            histograma = _histogramas[nome] = Histograma()
+        histograma.registar(duracao)
+    for hook in _hooks:
+        hook(nome, duracao)
+
+
+def adicionar_hook(hook):
+    """Adiciona uma função hook(nome, duracao), chamada por cada duração registada (e.g. profiling)."""
+    _hooks.append(hook)
+
+
+def remover_hook(hook):
+    _hooks.remove(hook)
+
+
+def medido(nome):
+    """Decorador que regista a latência de cada chamada (funções ou corotinas) quando ACTIVO."""
+    import inspect
+
+    def decorador(funcao):
+        if inspect.iscoroutinefunction(funcao):
+
+            @wraps(funcao)
+            async def medida_async(*args, **kwargs):
+                if not ACTIVO:
+                    return await funcao(*args, **kwargs)
+                inicio = time.perf_counter()
+                try:
+                    return await funcao(*args, **kwargs)
+                finally:
+                    registar(nome, time.perf_counter() - inicio)
+
+            return medida_async
+
+        @wraps(funcao)
+        def medida(*args, **kwargs):
+            if not ACTIVO:
+                return funcao(*args, **kwargs)
+            inicio = time.perf_counter()
+            try:
+                return funcao(*args, **kwargs)
+            finally:
+                registar(nome, time.perf_counter() - inicio)
+
+        return medida
+
+    return decorador
+
+
+def iterar(nome, iterador):
+    """Itera sobre iterador, registando a latência de cada passo em nome."""
+    iterador = iter(iterador)
+    while True:
+        inicio = time.perf_counter()
+        try:
+            valor = next(iterador)
+        except StopIteration:
+            return
+        registar(nome, time.perf_counter() - inicio)
+        yield valor
+
+
+def stats():
+    """Estado da instrumentação: {"activo", "contadores": {nome: n}, "histogramas": {nome: resumo}}.
+
+    Cada resumo tem n, total, media, min e max (segundos) e baldes ({limite superior: n}).
+    """
+    with _lock:
+        return {
+            "activo": ACTIVO,
+            "contadores": dict(_contadores),
+            "histogramas": {nome: histograma.resumo() for nome, histograma in _histogramas.items()},
+        }
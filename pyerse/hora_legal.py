@@ -0,0 +1,67 @@
+"""Hora legal de Portugal sobre instantes Unix epoch (segundos UTC).
+
+A hora de Verão começa às 01:00 UTC do ultimo Domingo de Março e acaba às 01:00 UTC do
+ultimo Domingo de Outubro (regra europeia, comum ao continente e às regiões autónomas).
+"""
+
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+import time
+
+HORA = 3600
+
+
+@lru_cache(maxsize=None)
+def limites_verao(ano):
+    """Inicio e fim (exclusivo) da hora legal de Verão: ultimo Domingo de Março e de Outubro."""
+    # https://docs.python.org/3.3/library/datetime.html
+    d = datetime(ano, 4, 1)
+    i_verao = d - timedelta(days=d.weekday() + 1)
+    d = datetime(ano, 11, 1)
+    f_verao = d - timedelta(days=d.weekday() + 1)
+    return i_verao, f_verao
+
+
+@lru_cache(maxsize=None)
+def transicoes(ano):
+    """Instantes epoch exactos (01:00 UTC) de inicio e fim da hora de Verão do ano."""
+    return tuple(
+        int((limite + timedelta(hours=1)).replace(tzinfo=timezone.utc).timestamp())
+        for limite in limites_verao(ano)
+    )
+
+
+_janela = (0, 0, False)
+
+
+def verao(epoch):
+    """Indica se o instante epoch está em hora legal de Verão."""
+    global _janela
+
+    inicio, fim, em_verao = _janela
+    if inicio <= epoch < fim:
+        return em_verao
+
+    # Leituras chegam tipicamente por ordem: guarda o troço com desvio constante que contém o instante
+    ano = time.gmtime(epoch).tm_year
+    i_verao, f_verao = transicoes(ano)
+    if epoch < i_verao:
+        _janela = (transicoes(ano - 1)[1], i_verao, False)
+    elif epoch < f_verao:
+        _janela = (i_verao, f_verao, True)
+    else:
+        _janela = (f_verao, transicoes(ano + 1)[0], False)
+    return _janela[2]
+
+
+def verao_many(epochs):
+    """Versão vectorizada de verao para um array numpy de instantes epoch (segundos)."""
+    import numpy as np
+
+    epochs = np.asarray(epochs, dtype=np.int64)
+    anos = epochs.astype("datetime64[s]").astype("datetime64[Y]").astype(np.int64) + 1970
+    primeiro, ultimo = (int(anos.min()), int(anos.max())) if anos.size else (1970, 1970)
+    limites = np.array(
+        [transicoes(ano) for ano in range(primeiro, ultimo + 1)], dtype=np.int64
+    )[anos - primeiro]
+    return (limites[..., 0] <= epochs) & (epochs < limites[..., 1])
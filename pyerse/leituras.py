@@ -0,0 +1,103 @@
+"""Leitura em streaming de perfis de carga (diagramas de carga) em CSV."""
+
+import csv
+from itertools import islice
+
+from pyerse.comercializador import Plano
+
+TAMANHO_BLOCO = 100_000
+
+
+def ler_csv(
+    ficheiro,
+    coluna_data="timestamp",
+    coluna_kwh="kwh",
+    delimitador=",",
+    decimal=".",
+    tamanho_bloco=TAMANHO_BLOCO,
+):
+    """Itera sobre blocos (instantes, kWh) de um CSV com uma leitura por linha.
+
+    Os instantes devem estar em ISO 8601 (e.g. "2025-01-01 00:15") em hora local. Cada bloco tem
+    no máximo tamanho_bloco leituras, pelo que a memória usada não depende do tamanho do ficheiro.
+    Linhas vazias são ignoradas; um ficheiro sem cabeçalho lança ValueError.
+    """
+    import numpy as np
+
+    leitor = (linha for linha in csv.reader(ficheiro, delimiter=delimitador) if linha)
+    cabecalho = next(leitor, None)
+    if cabecalho is None:
+        raise ValueError("Ficheiro CSV vazio, sem cabeçalho")
+    try:
+        i_data, i_kwh = cabecalho.index(coluna_data), cabecalho.index(coluna_kwh)
+    except ValueError:
+        raise ValueError(f"Colunas {coluna_data!r} e {coluna_kwh!r} não encontradas em {cabecalho}")
+
+    while True:
+        linhas = list(islice(leitor, tamanho_bloco))
+        if not linhas:
+            return
+
+        instantes = np.array([linha[i_data] for linha in linhas], dtype="datetime64[m]")
+        kwh = np.array([linha[i_kwh] for linha in linhas])
+        if decimal != ".":
+            kwh = np.char.replace(kwh, decimal, ".")
+        yield instantes, kwh.astype(np.float64)
+
+
+def agregar(plano: Plano, blocos):
+    """kWh por Tarifa e dias com leituras de cada periodo de faturação (mês civil).
+
+    Retorna um dicionário {"AAAA-MM": (dias, {Tarifa: kWh})}, ordenado por periodo.
+    """
+    import numpy as np
+
+    tarifas = plano.tarifas
+    totais = {}
+    dias = {}
+    for instantes, kwh in blocos:
+        meses = instantes.astype("datetime64[M]")
+        primeiro = meses.min()
+        indice_mes = (meses - primeiro).astype(np.int64)
+
+        # Uma única soma por bloco: chave combinada (mês, tarifa)
+        chave = indice_mes * len(tarifas) + plano.indices_tarifa(instantes)
+        somas = np.bincount(
+            chave, weights=kwh, minlength=(indice_mes.max() + 1) * len(tarifas)
+        ).reshape(-1, len(tarifas))
+        for i, soma in enumerate(somas):
+            periodo = str(primeiro + i)
+            if periodo not in totais:
+                totais[periodo] = np.zeros(len(tarifas))
+                dias[periodo] = set()
+            totais[periodo] += soma
+
+        for dia in np.unique(instantes.astype("datetime64[D]")):
+            dias[str(dia.astype("datetime64[M]"))].add(dia)
+
+    return {
+        periodo: (len(dias[periodo]), dict(zip(tarifas, totais[periodo].tolist())))
+        for periodo in sorted(totais)
+        if dias[periodo]
+    }
+
+
+def escrever_resumo(plano: Plano, agregados, saida, familia_numerosa=False, com_custos=True):
+    """Escreve em CSV o resumo por periodo: kWh por Tarifa e, com custos, a fatura estimada."""
+    escritor = csv.writer(saida)
+    cabecalho = ["periodo", "dias"] + [f"kWh {tarifa.value}" for tarifa in plano.tarifas]
+    if com_custos:
+        cabecalho += ["energia", "iec", "custos fixos", "total"]
+    escritor.writerow(cabecalho)
+
+    for periodo, (dias, energia) in agregados.items():
+        linha = [periodo, dias] + [round(energia[tarifa], 3) for tarifa in plano.tarifas]
+        if com_custos:
+            fatura = plano.faturar(energia, dias, familia_numerosa)
+            linha += [
+                round(sum(sum(custo) for custo in fatura.custo_energia.values()), 2),
+                round(fatura.iec, 2),
+                round(fatura.custos_fixos, 2),
+                round(fatura.total, 2),
+            ]
+        escritor.writerow(linha)
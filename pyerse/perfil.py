@@ -0,0 +1,147 @@
+"""Armazenamento colunar em disco de perfis de carga, lido por memory-map."""
+
+import hashlib
+import os
+
+from pyerse import hora_legal
+from pyerse.ciclos import Ciclo
+from pyerse.comercializador import Plano
+
+EPOCH = "epoch.i8"
+KWH = "kwh.f4"
+
+
+class PerfilCargaException(Exception):
+    """Exceptions lançadas por PerfilCarga."""
+
+
+class PerfilCarga:
+    """Perfil de carga guardado numa directoria, uma coluna binária por ficheiro.
+
+    - epoch.i8: instantes Unix epoch (segundos UTC), int64, por ordem crescente;
+    - kwh.f4: kWh de cada leitura, float32;
+    - periodos-<ciclo>-<versão>.u1: códigos dos periodos horários (Periodos_Horarios.codigo) de
+      cada leitura no ciclo, calculados uma única vez e reutilizados nas faturações seguintes.
+
+    As colunas são lidas por memory-map, sem cópia nem interpretação.
+    """
+
+    def __init__(self, caminho):
+        """Abre (ou cria, vazio) o perfil de carga na directoria caminho.
+
+        Colunas com tamanhos diferentes (uma escrita interrompida em acrescentar) são cortadas
+        às leituras completas em todas as colunas.
+        """
+        self._caminho = caminho
+        os.makedirs(caminho, exist_ok=True)
+        for coluna in (EPOCH, KWH):
+            open(os.path.join(caminho, coluna), "ab").close()
+        self._reparar()
+
+    def _reparar(self):
+        colunas = {EPOCH: 8, KWH: 4}
+        n = min(os.path.getsize(os.path.join(self._caminho, nome)) // tamanho for nome, tamanho in colunas.items())
+        colunas.update({nome: 1 for nome in os.listdir(self._caminho) if nome.startswith("periodos-")})
+        for nome, tamanho in colunas.items():
+            caminho = os.path.join(self._caminho, nome)
+            if os.path.getsize(caminho) > n * tamanho:
+                os.truncate(caminho, n * tamanho)
+
+    def __len__(self):
+        return os.path.getsize(os.path.join(self._caminho, EPOCH)) // 8
+
+    def _coluna(self, nome, dtype):
+        import numpy as np
+
+        caminho = os.path.join(self._caminho, nome)
+        if os.path.getsize(caminho) == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(caminho, dtype=dtype, mode="r")
+
+    @property
+    def epochs(self):
+        """Coluna dos instantes (memory-map, só de leitura)."""
+        return self._coluna(EPOCH, "<i8")
+
+    @property
+    def kwh(self):
+        """Coluna dos kWh (memory-map, só de leitura)."""
+        return self._coluna(KWH, "<f4")
+
+    def acrescentar(self, epochs, kwh):
+        """Acrescenta leituras ao fim do perfil (os instantes devem continuar por ordem crescente)."""
+        import numpy as np
+
+        epochs = np.asarray(epochs)
+        if np.issubdtype(epochs.dtype, np.datetime64):
+            epochs = epochs.astype("datetime64[s]")
+        epochs = epochs.astype("<i8")
+        kwh = np.asarray(kwh, dtype="<f4")
+        if epochs.shape != kwh.shape or epochs.ndim != 1:
+            raise PerfilCargaException("Instantes e kWh devem ser arrays com uma dimensão e o mesmo tamanho")
+
+        anteriores = self.epochs
+        if np.any(np.diff(epochs) < 0) or (len(anteriores) and len(epochs) and epochs[0] < anteriores[-1]):
+            raise PerfilCargaException("Leituras fora de ordem")
+
+        # Os instantes são escritos por último: len() só conta leituras com os kWh já escritos
+        with open(os.path.join(self._caminho, KWH), "ab") as f:
+            kwh.tofile(f)
+        with open(os.path.join(self._caminho, EPOCH), "ab") as f:
+            epochs.tofile(f)
+
+    def _sidecar(self, ciclo: Ciclo):
+        # A versão identifica a tabela compilada: alterações ao ciclo invalidam a classificação guardada
+        versao = hashlib.sha1(ciclo.tabela()).hexdigest()[:12]
+        return os.path.join(self._caminho, f"periodos-{ciclo.__name__}-{versao}.u1")
+
+    def periodos(self, ciclo: Ciclo):
+        """Códigos dos periodos horários de cada leitura no ciclo (memory-map).
+
+        São calculados só para as leituras ainda não classificadas e guardados junto ao perfil.
+        """
+        import numpy as np
+
+        caminho = self._sidecar(ciclo)
+        classificadas = os.path.getsize(caminho) if os.path.exists(caminho) else 0
+        if classificadas < len(self):
+            with open(caminho, "ab") as f:
+                ciclo.classify_epoch(self.epochs[classificadas:]).astype(np.uint8).tofile(f)
+
+        return self._coluna(os.path.basename(caminho), np.uint8)
+
+    def fatia(self, inicio=None, fim=None):
+        """slice das leituras com inicio <= epoch < fim (instantes epoch em segundos)."""
+        import numpy as np
+
+        epochs = self.epochs
+        return slice(
+            int(np.searchsorted(epochs, inicio)) if inicio is not None else 0,
+            int(np.searchsorted(epochs, fim)) if fim is not None else len(epochs),
+        )
+
+    def energia(self, plano: Plano, inicio=None, fim=None):
+        """kWh por Tarifa das leituras entre inicio e fim, reutilizando a classificação guardada."""
+        import numpy as np
+
+        fatia = self.fatia(inicio, fim)
+        if plano.ciclo is None:
+            codigos = np.zeros(fatia.stop - fatia.start, dtype=np.uint8)
+        else:
+            codigos = self.periodos(plano.ciclo)[fatia]
+        return plano.energia_codigos(codigos, self.kwh[fatia])
+
+    def faturar(self, plano: Plano, inicio=None, fim=None, dias: int = None, familia_numerosa=False):
+        """Fatura das leituras entre inicio e fim (instantes epoch em segundos).
+
+        Sem dias, os custos fixos são calculados para o número de dias (em hora legal) com leituras.
+        """
+        import numpy as np
+
+        if dias is None:
+            epochs = self.epochs[self.fatia(inicio, fim)]
+            fuso = plano.ciclo.FUSO if plano.ciclo is not None else 0
+            locais = epochs + fuso + hora_legal.verao_many(epochs) * hora_legal.HORA
+            dias = len(np.unique(locais // 86400))
+
+        return plano.faturar(self.energia(plano, inicio, fim), dias, familia_numerosa)
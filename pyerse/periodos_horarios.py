@@ -14,3 +14,17 @@ class Periodos_Horarios(Enum):
     def __str__(self):
         """Return nome do periodo."""
         return self.value
+
+    @property
+    def codigo(self) -> int:
+        """Código inteiro compacto do periodo (usado nas tabelas compiladas)."""
+        return _CODIGOS[self]
+
+    @classmethod
+    def de_codigo(cls, codigo: int):
+        """Periodo correspondente a um código compacto."""
+        return _PERIODOS[codigo]
+
+
+_PERIODOS = tuple(Periodos_Horarios)
+_CODIGOS = {periodo: codigo for codigo, periodo in enumerate(_PERIODOS)}
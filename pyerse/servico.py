@@ -0,0 +1,174 @@
+"""Serviço local de consulta de tarifas (python -m pyerse serve).
+
+Mantém em memória os planos registados (e as tabelas compiladas dos ciclos) e responde em lote,
+por HTTP sobre TCP ou sobre um socket Unix, a consultas de tarifa actual, próxima mudança de
+tarifa e preço do kWh. Pedidos e respostas em JSON:
+
+- ``GET /planos``: planos registados, {nome: descrição}
+- ``POST /planos``: regista um plano, e.g. ``{"nome": "casa", "potencia": 6.9, "opcao": "Bi-Horária",
+  "ciclo": "Ciclo Semanal", "precos": {"Vazio": 0.0958, "Fora de Vazio": 0.1815}, "preco_potencia": 0.3147}``
+- ``POST /consultas``: ``{"consultas": [{"plano": "casa", "tipo": "tarifa"}, ...]}`` com tipo
+  ``tarifa``, ``transicao`` ou ``preco`` (com ``kwh`` consumidos no mês e ``familia_numerosa``)
+  e, opcionalmente, ``instante`` em ISO 8601 (por omissão o instante do pedido; sem desvio UTC é
+  hora legal de Lisboa). Retorna
+  ``{"resultados": [...]}`` pela ordem das consultas; consultas inválidas têm ``{"erro": ...}``.
+"""
+
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import logging
+import socketserver
+import threading
+from zoneinfo import ZoneInfo
+
+from pyerse.ciclos import CicloException
+from pyerse.comercializador import POTENCIA, Opcao_Horaria, Plano, PlanoException, Tarifa
+
+PORTA = 8080
+
+FUSO = ZoneInfo("Europe/Lisbon")
+"""Fuso horário dos ciclos; instantes com desvio UTC são convertidos para a hora legal deste fuso."""
+
+
+class ServicoException(Exception):
+    """Exceptions lançadas por ServicoTarifas."""
+
+    pass
+
+
+def plano_json(definicao):
+    """Plano a partir da definição JSON de POST /planos."""
+    try:
+        if definicao["potencia"] not in POTENCIA:
+            raise ServicoException(f"Potencia {definicao['potencia']} não disponivel")
+        plano = Plano(definicao["potencia"], Opcao_Horaria(definicao["opcao"]), definicao.get("ciclo"))
+        for tarifa, preco in definicao.get("precos", {}).items():
+            plano.definir_custo_kWh(Tarifa(tarifa), float(preco))
+        if definicao.get("preco_potencia") is not None:
+            plano.definir_custo_potencia(float(definicao["preco_potencia"]))
+    except (KeyError, ValueError, PlanoException) as err:
+        raise ServicoException(f"Plano inválido: {err!r}")
+    return plano
+
+
+class ServicoTarifas:
+    """Planos registados em memória e respostas a consultas em lote."""
+
+    def __init__(self):
+        self._planos = {}
+        self._lock = threading.Lock()
+
+    def registar(self, nome, plano: Plano):
+        """Regista (ou substitui) o plano nome."""
+        if plano.ciclo is not None:
+            plano.ciclo.tabela()  # carrega a tabela do ciclo antes das consultas
+        with self._lock:
+            self._planos[nome] = plano
+
+    def planos(self):
+        """{nome: descrição} dos planos registados."""
+        return {nome: str(plano) for nome, plano in self._planos.items()}
+
+    def consultar(self, consultas, agora=None):
+        """Resultados de uma lista de consultas (ver o formato de POST /consultas).
+
+        Consultas sem instante usam agora (por omissão o instante da chamada, comum a todo o lote).
+        """
+        if agora is None:
+            agora = datetime.now()
+
+        resultados = []
+        for consulta in consultas:
+            try:
+                resultados.append(self._consulta(consulta, agora))
+            except (KeyError, TypeError, ValueError, PlanoException, CicloException, ServicoException) as err:
+                resultados.append({"erro": repr(err)})
+        return resultados
+
+    def _consulta(self, consulta, agora):
+        plano = self._planos.get(consulta["plano"])
+        if plano is None:
+            raise ServicoException(f"Plano {consulta['plano']} não registado")
+        instante = datetime.fromisoformat(consulta["instante"]) if "instante" in consulta else agora
+        fuso = instante.tzinfo
+        if fuso is not None:
+            # Os ciclos usam a hora legal (de parede): o mesmo instante com qualquer desvio UTC
+            instante = instante.astimezone(FUSO)
+
+        tipo = consulta.get("tipo", "tarifa")
+        if tipo == "tarifa":
+            return {"tarifa": plano.tarifa_actual(instante).value}
+        if tipo == "transicao":
+            transicao = plano.next_transition(instante)
+            if transicao is None:
+                return None
+            inicio = transicao[0] if fuso is None else transicao[0].astimezone(fuso)
+            return {"instante": inicio.isoformat(), "tarifa": transicao[1].value}
+        if tipo == "preco":
+            return {
+                "tarifa": plano.tarifa_actual(instante).value,
+                "preco": plano.custo_kWh_actual(
+                    float(consulta.get("kwh", 0)), bool(consulta.get("familia_numerosa", False)), instante
+                ),
+            }
+        raise ServicoException(f"Tipo de consulta {tipo} desconhecido")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True  # cabeçalhos e corpo saem em escritas separadas
+
+    def log_message(self, formato, *args):
+        logging.debug(formato, *args)
+
+    def _responder(self, estado, corpo):
+        resposta = json.dumps(corpo, ensure_ascii=False).encode()
+        self.send_response(estado)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(resposta)))
+        self.end_headers()
+        self.wfile.write(resposta)
+
+    def do_GET(self):
+        if self.path == "/planos":
+            self._responder(200, self.server.servico.planos())
+        else:
+            self._responder(404, {"erro": f"{self.path} não existe"})
+
+    def do_POST(self):
+        try:
+            pedido = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            if self.path == "/consultas":
+                self._responder(200, {"resultados": self.server.servico.consultar(pedido["consultas"])})
+            elif self.path == "/planos":
+                self.server.servico.registar(pedido["nome"], plano_json(pedido))
+                self._responder(201, {"nome": pedido["nome"]})
+            else:
+                self._responder(404, {"erro": f"{self.path} não existe"})
+        except (KeyError, TypeError, ValueError, ServicoException) as err:
+            self._responder(400, {"erro": repr(err)})
+
+
+class _HandlerUnix(_Handler):
+    disable_nagle_algorithm = False  # TCP_NODELAY não se aplica a sockets Unix
+
+
+class ServidorHTTP(ThreadingHTTPServer):
+    """Serviço em HTTP sobre TCP."""
+
+    daemon_threads = True
+
+    def __init__(self, servico: ServicoTarifas, endereco=("127.0.0.1", PORTA)):
+        super().__init__(endereco, _Handler)
+        self.servico = servico
+
+
+class ServidorUnix(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Serviço em HTTP sobre um socket Unix."""
+
+    daemon_threads = True
+
+    def __init__(self, servico: ServicoTarifas, caminho):
+        super().__init__(caminho, _HandlerUnix)
+        self.servico = servico
@@ -1,128 +1,178 @@
 from datetime import datetime
+import heapq
 import logging
-import requests
 from datetime import date, datetime
+from typing import NamedTuple
 
+from pyerse import estatisticas
 from pyerse.comercializador import POTENCIA
 
+URL = "https://simulador.precos.erse.pt/connectors/simular_eletricidade/"
+
+TAMANHO_PAGINA = 50
+
+HEADERS = {
+    "Content-Type": "application/x-www-form-urlencoded; charset=UTF-8",
+    "Host": "simulador.precos.erse.pt",
+}
+
+
+def _validar_potencia(potencia):
+    try:
+        return POTENCIA.index(potencia)
+    except ValueError as err:
+        logging.error("Potencia não disponivel!")
+        raise err
+
+
+def validar_data(date_str):
+    """Valida uma data AAAA-MM-DD (o mês e o dia podem ter um só dígito) e retorna-a inalterada."""
+    try:
+        datetime.strptime(date_str, "%Y-%m-%d")
+    except ValueError:
+        raise ValueError("Formato de data incorrecto, deve ser YYYY-MM-DD")
+    return date_str
+
+
+class Oferta(NamedTuple):
+    """Oferta devolvida pelo simulador, já convertida."""
+
+    comercializador: str
+    nome: str
+    precos_energia: tuple
+    """Euros por kWh de (ponta, cheias, vazio) pela ordem do simulador; None se não aplicável."""
+    preco_fixo: float
+    """Euros por dia."""
+
+    @classmethod
+    def de_json(cls, oferta):
+        """Converte uma oferta do JSON do simulador (decimais com vírgula)."""
+
+        def preco(campo):
+            valor = oferta[campo].replace(",", ".")
+            return float(valor) if valor != "" else None
+
+        return cls(
+            oferta["Comercializador"],
+            oferta["Nome"],
+            tuple(preco(campo) for campo in ("PrecoTermoenergia", "PrecoTermoenergia2", "PrecoTermoenergia3")),
+            preco("PrecoTermoFixo"),
+        )
+
+    def __str__(self):
+        return f"{self.comercializador} - {self.nome}"
+
+    def estimativa(self, dias, ponta, cheias=None, vazio=None):
+        """Custo estimado em Euros para os consumos e o número de dias."""
+        return (
+            sum(preco * kwh for preco, kwh in zip(self.precos_energia, (ponta, cheias, vazio)) if preco is not None)
+            + self.preco_fixo * dias
+        )
+
+
+def dias_periodo(period_start, period_stop):
+    """Número de dias de period_start a period_stop (datas AAAA-MM-DD)."""
+    periodo = datetime.strptime(period_stop, "%Y-%m-%d") - datetime.strptime(
+        period_start, "%Y-%m-%d"
+    )
+    return periodo.days
+
+
+def _dados(potencia, period_start, period_stop, ponta, cheias=None, vazio=None, inicio=0, tamanho_pagina=1):
+    """Pedido ao simulador (potencia é o índice em POTENCIA)."""
+    if vazio != None:
+        ciclo = "3"  # Tri-horário
+    elif cheias != None:
+        ciclo = "2"  # Bi-horário
+    else:
+        ciclo = "1"  # Simples
+
+    return {
+        "pageStartIndex": str(inicio),
+        "pageStep": str(tamanho_pagina),
+        "caseType": "3",  # Residencial
+        "electSupply": potencia,
+        "cycle": ciclo,
+        "electCalendar": "3",  # "a definir"
+        "electCalendarPeriodStart": period_start,
+        "electCalendarPeriodEnd": period_stop,
+        "electPonta": ponta,
+        "electCheias": cheias if cheias else "",
+        "electVazio": vazio if vazio else "",
+    }
+
+
+def _melhor(ofertas, period_start, period_stop, ponta, cheias=None, vazio=None):
+    """Oferta mais barata para os consumos, de uma lista de ofertas JSON: tuplo (nome, estimativa em Euros)."""
+    dias = dias_periodo(period_start, period_stop)
+    estimativas = (
+        (oferta, oferta.estimativa(dias, ponta, cheias, vazio)) for oferta in map(Oferta.de_json, ofertas)
+    )
+    oferta, estimativa = min(estimativas, key=lambda oferta_estimativa: oferta_estimativa[1])
+    return str(oferta), estimativa
+
+
+def _chave_ofertas(data):
+    """Chave na cache da lista completa de ofertas de um pedido (os consumos não entram na chave)."""
+    from pyerse.cache import chave
+
+    return "ofertas|" + chave(data)
+
 
 class Simulador:
-    def __init__(self, potencia, period_start, period_stop=None):
-        try:
-            self._potencia = POTENCIA.index(potencia)
-        except ValueError as err:
-            logging.error("Potencia não disponivel!")
-            raise err
-
-        def validate(date_str):
-            try:
-                datetime.strptime(date_str, "%Y-%m-%d")
-            except ValueError:
-                raise ValueError("Formato de data incorrecto, deve ser YYYY-MM-DD")
-            return date_str
-
-        self._period_start = validate(period_start)
+    def __init__(self, potencia, period_start, period_stop=None, url=URL, cache=None):
+        self._potencia = _validar_potencia(potencia)
+        self._period_start = validar_data(period_start)
 
         if period_stop:
-            self._period_stop = validate(period_stop)
+            self._period_stop = validar_data(period_stop)
         else:
             self._period_stop = date.today().strftime("%Y-%m-%d")
 
-    def _simular(self, ponta, cheias=None, vazio=None):
+        self._url = url
+        self._cache = cache
+        self._sessao = None
 
-        if vazio != None:
-            ciclo = "3"  # Tri-horário
-        elif cheias != None:
-            ciclo = "2"  # Bi-horário
-        else:
-            ciclo = "1"  # Simples
-
-        headers = {
-            "Content-Type": "application/x-www-form-urlencoded; charset=UTF-8",
-            "Host": "simulador.precos.erse.pt",
-        }
-
-        data = {
-            "pageStartIndex": "0",
-            "pageStep": "1",
-            "caseType": "3",  # Residencial
-            "electSupply": self._potencia,
-            "cycle": ciclo,
-            "electCalendar": "3",  # "a definir"
-            "electCalendarPeriodStart": self._period_start,
-            "electCalendarPeriodEnd": self._period_stop,
-            "electPonta": ponta,
-            "electCheias": cheias if cheias else "",
-            "electVazio": vazio if vazio else "",
-        }
+    @estatisticas.medido("simulador.pedido")
+    def _pedido(self, data):
+        if self._sessao is None:
+            # requests só é importado no primeiro pedido; a sessão é reutilizada (keep-alive)
+            import requests
 
-        logging.debug("Simulation data: %s", data)
+            self._sessao = requests.Session()
 
-        response = requests.post(
-            "https://simulador.precos.erse.pt/connectors/simular_eletricidade/",
-            headers=headers,
+        response = self._sessao.post(
+            self._url,
+            headers=HEADERS,
             data=data,
         )
+        return response.json()
 
-        result = response.json()
-
-        logging.debug(result["Resultados"][0]["Oferta"][0])
-
-        preco_ponta = (
-            float(
-                result["Resultados"][0]["Oferta"][0]["PrecoTermoenergia"].replace(
-                    ",", "."
-                )
-            )
-            * ponta
-            if result["Resultados"][0]["Oferta"][0]["PrecoTermoenergia"].replace(
-                ",", "."
-            )
-            != ""
-            else 0
-        )
-        preco_cheias = (
-            float(
-                result["Resultados"][0]["Oferta"][0]["PrecoTermoenergia2"].replace(
-                    ",", "."
-                )
-            )
-            * cheias
-            if result["Resultados"][0]["Oferta"][0]["PrecoTermoenergia2"].replace(
-                ",", "."
-            )
-            != ""
-            else 0
-        )
-        preco_vazio = (
-            float(
-                result["Resultados"][0]["Oferta"][0]["PrecoTermoenergia3"].replace(
-                    ",", "."
-                )
-            )
-            * vazio
-            if result["Resultados"][0]["Oferta"][0]["PrecoTermoenergia3"].replace(
-                ",", "."
-            )
-            != ""
-            else 0
-        )
-        preco_fixo = float(
-            result["Resultados"][0]["Oferta"][0]["PrecoTermoFixo"].replace(",", ".")
-        )
+    @estatisticas.medido("simulador.simular")
+    def _simular(self, ponta, cheias=None, vazio=None):
 
-        periodo = datetime.strptime(self._period_stop, "%Y-%m-%d") - datetime.strptime(
-            self._period_start, "%Y-%m-%d"
-        )
+        data = _dados(self._potencia, self._period_start, self._period_stop, ponta, cheias, vazio)
 
-        estimativa = (
-            preco_ponta + preco_cheias + preco_vazio + preco_fixo * periodo.days
-        )
+        logging.debug("Simulation data: %s", data)
 
-        return (
-            f"{result['Resultados'][0]['Oferta'][0]['Comercializador']} - {result['Resultados'][0]['Oferta'][0]['Nome']}",
-            estimativa,
-        )
+        # A ordem das ofertas depende dos consumos (sem o termo fixo): escolhe a melhor localmente
+        if self._cache is not None:
+            ofertas = self._cache.obter(_chave_ofertas(data), lambda: self._ofertas_json(data))
+        else:
+            ofertas = self._ofertas_json(data)
+        return _melhor(ofertas, self._period_start, self._period_stop, ponta, cheias, vazio)
+
+    def _ofertas_json(self, data, tamanho_pagina=TAMANHO_PAGINA):
+        """Todas as ofertas (JSON do simulador) do pedido data, página a página."""
+        ofertas = []
+        inicio = 0
+        while True:
+            pagina = self._pedido({**data, "pageStartIndex": str(inicio), "pageStep": str(tamanho_pagina)})
+            pagina = pagina["Resultados"][0]["Oferta"]
+            if not pagina:
+                return ofertas
+            ofertas.extend(pagina)
+            inicio += len(pagina)
 
     def melhor_tarifa_simples(self, energia):
         return self._simular(ponta=energia)
@@ -133,6 +183,35 @@ class Simulador:
     def melhor_tarifa_trihorario(self, ponta, cheias, vazio):
         return self._simular(ponta, cheias, vazio)
 
+    def ofertas(self, ponta, cheias=None, vazio=None, tamanho_pagina=TAMANHO_PAGINA):
+        """Itera sobre todas as ofertas do simulador para os consumos, página a página.
+
+        Os consumos seguem a convenção de _simular: (energia), (fora de vazio, vazio) ou
+        (ponta, cheias, vazio). Cada oferta é convertida uma única vez num registo Oferta. O
+        simulador pode devolver páginas mais curtas do que tamanho_pagina: a lista só termina
+        na primeira página vazia.
+        """
+        inicio = 0
+        while True:
+            data = _dados(
+                self._potencia, self._period_start, self._period_stop, ponta, cheias, vazio, inicio, tamanho_pagina
+            )
+            pagina = self._pedido(data)["Resultados"][0]["Oferta"]
+            if not pagina:
+                return
+            for oferta in pagina:
+                yield Oferta.de_json(oferta)
+            inicio += len(pagina)
+
+    def melhores_ofertas(self, n, ponta, cheias=None, vazio=None, tamanho_pagina=TAMANHO_PAGINA):
+        """As n ofertas mais baratas: lista de (Oferta, estimativa), da mais barata para a mais cara."""
+        dias = dias_periodo(self._period_start, self._period_stop)
+        estimativas = (
+            (oferta, oferta.estimativa(dias, ponta, cheias, vazio))
+            for oferta in self.ofertas(ponta, cheias, vazio, tamanho_pagina)
+        )
+        return heapq.nsmallest(n, estimativas, key=lambda oferta_estimativa: oferta_estimativa[1])
+
 
 if __name__ == "__main__":
     logging.basicConfig(level=logging.DEBUG)
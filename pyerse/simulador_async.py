@@ -0,0 +1,146 @@
+"""Cliente asyncio do simulador de preços da ERSE (requer aiohttp)."""
+
+import asyncio
+from datetime import date
+import logging
+
+import aiohttp
+
+from pyerse import estatisticas
+from pyerse.simulador import (
+    HEADERS,
+    TAMANHO_PAGINA,
+    URL,
+    _chave_ofertas,
+    _dados,
+    _melhor,
+    _validar_potencia,
+    validar_data,
+)
+
+CONCORRENCIA = 10
+TENTATIVAS = 3
+ESPERA = 0.5
+
+
+def _repetir(err):
+    """Se o pedido falhado deve ser repetido: falhas de ligação, timeouts, erros 5xx e 429."""
+    if isinstance(err, aiohttp.ClientResponseError):
+        return err.status == 429 or err.status >= 500
+    return isinstance(err, (aiohttp.ClientConnectionError, asyncio.TimeoutError))
+
+
+class AsyncSimulador:
+    """Variante asyncio de Simulador.
+
+    Usa uma única sessão HTTP com ligações keep-alive reutilizadas, limita o número de pedidos
+    em simultâneo e repete pedidos falhados (ligação, timeout, 5xx e 429) com espera exponencial. Deve ser usado como
+    contexto assíncrono::
+
+        async with AsyncSimulador(6.9, "2021-08-01") as s:
+            await s.melhor_tarifa_simples(220)
+    """
+
+    def __init__(
+        self,
+        potencia,
+        period_start,
+        period_stop=None,
+        url=URL,
+        concorrencia=CONCORRENCIA,
+        tentativas=TENTATIVAS,
+        espera=ESPERA,
+        cache=None,
+    ):
+        self._potencia = potencia
+        self._period_start = validar_data(period_start)
+        self._period_stop = validar_data(period_stop) if period_stop else date.today().strftime("%Y-%m-%d")
+        _validar_potencia(potencia)
+
+        self._url = url
+        self._concorrencia = concorrencia
+        self._tentativas = tentativas
+        self._espera = espera
+        self._cache = cache
+        self._sessao = None
+        self._semaforo = None
+
+    async def __aenter__(self):
+        self._semaforo = asyncio.Semaphore(self._concorrencia)
+        self._sessao = aiohttp.ClientSession(
+            headers=HEADERS, connector=aiohttp.TCPConnector(limit=self._concorrencia)
+        )
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self._sessao.close()
+        self._sessao = None
+
+    @estatisticas.medido("simulador.pedido")
+    async def _pedido(self, data):
+        for tentativa in range(self._tentativas):
+            try:
+                async with self._semaforo:
+                    async with self._sessao.post(self._url, data=data) as response:
+                        response.raise_for_status()
+                        return await response.json(content_type=None)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+                if tentativa + 1 == self._tentativas or not _repetir(err):
+                    raise
+                logging.debug("Pedido ao simulador falhou (%s), nova tentativa", err)
+                await asyncio.sleep(self._espera * 2**tentativa)
+
+    @estatisticas.medido("simulador.simular")
+    async def _simular(self, ponta, cheias=None, vazio=None, potencia=None, period_start=None, period_stop=None):
+        potencia = _validar_potencia(potencia if potencia is not None else self._potencia)
+        period_start = period_start or self._period_start
+        period_stop = period_stop or self._period_stop
+
+        data = _dados(potencia, period_start, period_stop, ponta, cheias, vazio)
+        logging.debug("Simulation data: %s", data)
+
+        # A ordem das ofertas depende dos consumos (sem o termo fixo): escolhe a melhor localmente
+        if self._cache is not None:
+            ofertas = await self._cache.obter_async(_chave_ofertas(data), lambda: self._ofertas_json(data))
+        else:
+            ofertas = await self._ofertas_json(data)
+        return _melhor(ofertas, period_start, period_stop, ponta, cheias, vazio)
+
+    async def _ofertas_json(self, data, tamanho_pagina=TAMANHO_PAGINA):
+        """Todas as ofertas (JSON do simulador) do pedido data, página a página."""
+        ofertas = []
+        inicio = 0
+        while True:
+            pagina = await self._pedido({**data, "pageStartIndex": str(inicio), "pageStep": str(tamanho_pagina)})
+            pagina = pagina["Resultados"][0]["Oferta"]
+            if not pagina:
+                return ofertas
+            ofertas.extend(pagina)
+            inicio += len(pagina)
+
+    async def melhor_tarifa_simples(self, energia):
+        return await self._simular(ponta=energia)
+
+    async def melhor_tarifa_bihorario(self, fora_de_vazio, vazio):
+        return await self._simular(ponta=fora_de_vazio, cheias=vazio)
+
+    async def melhor_tarifa_trihorario(self, ponta, cheias, vazio):
+        return await self._simular(ponta, cheias, vazio)
+
+    async def lote(self, pedidos):
+        """Simula vários pedidos (potencia, period_start, period_stop, consumos) em simultâneo.
+
+        consumos é (energia,), (fora_de_vazio, vazio) ou (ponta, cheias, vazio), como nos métodos
+        melhor_tarifa_*. Retorna os resultados pela ordem dos pedidos.
+        """
+        return await asyncio.gather(
+            *(
+                self._simular(
+                    *consumos,
+                    potencia=potencia,
+                    period_start=validar_data(inicio),
+                    period_stop=validar_data(fim) if fim else None,
+                )
+                for potencia, inicio, fim, consumos in pedidos
+            )
+        )
@@ -14,13 +14,19 @@ setup(
     long_description_content_type='text/markdown',
     long_description = open('README.md').read(),
     packages = find_packages(),
+    package_data = {'pyerse': ['data/*']},
     install_requires=[
         # put packages here
     ],
+    extras_require={
+        'numpy': ['numpy'],
+        'simulador': ['requests'],
+        'async': ['aiohttp'],
+    },
     test_suite = 'tests',
     entry_points = {
 	    'console_scripts': [
-	        'packagename = packagename.__main__:main',
+	        'pyerse = pyerse.__main__:main',
 	    ]
 	}
 )
@@ -0,0 +1,107 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+import pytest
+
+# Ofertas do simulador local: (comercializador, nome, {ciclo: preços de energia}, preço fixo)
+OFERTAS = [
+    ("Alfa", "Casa", {"1": ["0,1600"], "2": ["0,1900", "0,1000"], "3": ["0,2500", "0,1700", "0,1000"]}, "0,3000"),
+    ("Beta", "Verde", {"1": ["0,1500"], "2": ["0,2000", "0,0900"], "3": ["0,2600", "0,1600", "0,0900"]}, "0,3500"),
+    ("Gama", "Base", {"1": ["0,1700"], "2": ["0,1800", "0,1100"], "3": ["0,2400", "0,1800", "0,1100"]}, "0,2500"),
+    ("Delta", "Fixo", {"1": ["0,1550"], "2": ["0,1850", "0,0950"], "3": ["0,2450", "0,1650", "0,0950"]}, "0,3200"),
+]
+
+
+def oferta_json(oferta, ciclo):
+    comercializador, nome, energia, fixo = oferta
+    precos = energia[ciclo] + [""] * (3 - len(energia[ciclo]))
+    return {
+        "Comercializador": comercializador,
+        "Nome": nome,
+        "PrecoTermoenergia": precos[0],
+        "PrecoTermoenergia2": precos[1],
+        "PrecoTermoenergia3": precos[2],
+        "PrecoTermoFixo": fixo,
+    }
+
+
+class SimuladorLocal(ThreadingHTTPServer):
+    """Substituto local do endpoint simular_eletricidade da ERSE."""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.pedidos = []
+        self.falhas = 0
+        self.codigo_falha = 503
+        self.max_pagina = None
+        self.demora = 0
+        self.em_curso = 0
+        self.max_em_curso = 0
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/connectors/simular_eletricidade/"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        servidor = self.server
+        corpo = self.rfile.read(int(self.headers["Content-Length"])).decode()
+        dados = {campo: valores[0] for campo, valores in parse_qs(corpo, keep_blank_values=True).items()}
+
+        with servidor.lock:
+            servidor.pedidos.append(dados)
+            servidor.em_curso += 1
+            servidor.max_em_curso = max(servidor.max_em_curso, servidor.em_curso)
+            falhar = servidor.falhas > 0
+            servidor.falhas -= falhar
+        try:
+            time.sleep(servidor.demora)
+            if falhar:
+                self.send_response(servidor.codigo_falha)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+
+            ciclo = dados["cycle"]
+            consumos = [float(dados[campo] or 0) for campo in ("electPonta", "electCheias", "electVazio")]
+
+            def custo(oferta):
+                return sum(float(p.replace(",", ".")) * c for p, c in zip(oferta[2][ciclo], consumos))
+
+            ofertas = sorted(OFERTAS, key=custo)
+            inicio, passo = int(dados["pageStartIndex"]), int(dados["pageStep"])
+            passo = min(passo, servidor.max_pagina or passo)
+            resposta = json.dumps(
+                {"Resultados": [{"Oferta": [oferta_json(o, ciclo) for o in ofertas[inicio:inicio + passo]]}]}
+            ).encode()
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(resposta)))
+            self.end_headers()
+            self.wfile.write(resposta)
+        finally:
+            with servidor.lock:
+                servidor.em_curso -= 1
+
+
+@pytest.fixture
+def simulador_local():
+    servidor = SimuladorLocal()
+    thread = threading.Thread(target=servidor.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield servidor
+    servidor.shutdown()
+    servidor.server_close()
@@ -0,0 +1,90 @@
+from datetime import datetime, timedelta
+import json
+
+import pytest
+
+from pyerse.acumulador import AcumuladorException, AcumuladorMensal
+from pyerse.ciclos import Ciclo_Semanal
+from pyerse.comercializador import IMPOSTO_ESPECIAL_CONSUMO, IVA_INTERMEDIA, IVA_NORMAL, Plano, Opcao_Horaria, Tarifa
+
+
+@pytest.fixture
+def plano():
+    p = Plano(6.9, Opcao_Horaria.BI_HORARIA, Ciclo_Semanal)
+    p.definir_custo_kWh(Tarifa.VAZIO, 0.1)
+    p.definir_custo_kWh(Tarifa.FORA_DE_VAZIO, 0.2)
+    p.definir_custo_potencia(0.3147)
+    return p
+
+
+def leituras(inicio, fim, passo=timedelta(minutes=15)):
+    instante = inicio
+    while instante < fim:
+        yield instante, 0.05 + (instante.hour % 5) * 0.01
+        instante += passo
+
+
+def test_acumulador_mes(plano):
+    np = pytest.importorskip("numpy")
+
+    # Março de 2025, com a mudança para a hora legal de Verão
+    serie = list(leituras(datetime(2025, 3, 1), datetime(2025, 4, 1)))
+    acumulador = AcumuladorMensal(plano)
+    for instante, kwh in serie:
+        assert acumulador.adicionar(instante, kwh) is None
+
+    energia = plano.energia_serie(
+        np.array([instante for instante, _ in serie], dtype="datetime64[m]"), [kwh for _, kwh in serie]
+    )
+    assert acumulador.mes == (2025, 3) and acumulador.leituras == len(serie)
+    assert acumulador.energia == pytest.approx(energia)
+    assert acumulador.fatura() == plano.faturar(acumulador.energia, 31)
+
+
+def test_acumulador_mudanca_mes(plano):
+    acumulador = AcumuladorMensal(plano)
+    for instante, kwh in leituras(datetime(2025, 4, 30, 22), datetime(2025, 5, 1)):
+        acumulador.adicionar(instante, kwh)
+    abril = acumulador.fatura(30)
+
+    assert acumulador.adicionar(datetime(2025, 5, 1, 0, 0), 0.5) == abril
+    assert acumulador.mes == (2025, 5) and acumulador.leituras == 1
+    assert acumulador.energia == {Tarifa.VAZIO: 0.5, Tarifa.FORA_DE_VAZIO: 0.0}
+    assert acumulador.fatura().custos_fixos == plano.custos_fixos(1)
+
+    with pytest.raises(AcumuladorException):
+        acumulador.adicionar(datetime(2025, 4, 30, 23, 59), 0.1)
+
+
+def test_acumulador_plafond_custo_marginal(plano):
+    acumulador = AcumuladorMensal(plano)
+    vazio = datetime(2025, 3, 3, 3, 0)
+
+    acumulador.adicionar(vazio, 30)
+    assert acumulador.plafonds() == {Tarifa.VAZIO: (30, 40), Tarifa.FORA_DE_VAZIO: (0, 60)}
+    assert acumulador.custo_marginal() == pytest.approx(0.1 * IVA_INTERMEDIA + IMPOSTO_ESPECIAL_CONSUMO * IVA_NORMAL)
+
+    acumulador.adicionar(vazio + timedelta(minutes=15), 15)
+    assert acumulador.plafonds()[Tarifa.VAZIO] == (40, 40)
+    assert acumulador.custo_marginal() == pytest.approx(0.1 * IVA_NORMAL + IMPOSTO_ESPECIAL_CONSUMO * IVA_NORMAL)
+    assert acumulador.custo_marginal(datetime(2025, 3, 3, 10, 0)) == pytest.approx(
+        0.2 * IVA_INTERMEDIA + IMPOSTO_ESPECIAL_CONSUMO * IVA_NORMAL
+    )
+
+
+def test_acumulador_estado(plano):
+    serie = list(leituras(datetime(2025, 10, 20), datetime(2025, 11, 3)))
+    continuo = AcumuladorMensal(plano, familia_numerosa=True)
+    interrompido = AcumuladorMensal(plano, familia_numerosa=True)
+    for i, (instante, kwh) in enumerate(serie):
+        continuo.adicionar(instante, kwh)
+        if i % 500 == 0:
+            # Reinício do processo: o estado é guardado em JSON e restaurado
+            interrompido = AcumuladorMensal.restaurar(plano, json.loads(json.dumps(interrompido.estado())))
+        interrompido.adicionar(instante, kwh)
+
+    assert interrompido.estado() == continuo.estado()
+    assert interrompido.fatura() == continuo.fatura()
+
+    with pytest.raises(AcumuladorException):
+        AcumuladorMensal.restaurar(Plano(6.9, Opcao_Horaria.SIMPLES), continuo.estado())
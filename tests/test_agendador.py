@@ -0,0 +1,106 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from pyerse.agendador import FUSO, Agendador
+from pyerse.ciclos import Ciclo_Diario, Ciclo_Semanal
+from pyerse.comercializador import Opcao_Horaria, Plano
+
+
+class Relogio:
+    """Relógio falso: dormir avança o tempo sem esperar."""
+
+    def __init__(self, agora):
+        self.agora = agora
+        self.esperas = 0
+
+    def __call__(self):
+        return self.agora
+
+    async def dormir(self, segundos):
+        self.esperas += 1
+        self.agora += timedelta(seconds=segundos)
+        await asyncio.sleep(0)
+
+
+def mudancas(plano, inicio, fim):
+    """Mudanças de tarifa, minuto a minuto em UTC, classificadas na hora legal de Lisboa."""
+    resultado = []
+    anterior = plano.tarifa_actual(inicio.astimezone(FUSO))
+    instante = inicio
+    while instante + timedelta(minutes=1) < fim:
+        instante += timedelta(minutes=1)
+        tarifa = plano.tarifa_actual(instante.astimezone(FUSO))
+        if tarifa != anterior:
+            resultado.append((instante, tarifa, anterior))
+            anterior = tarifa
+    return resultado
+
+
+async def recolher(agendador, relogio, fim):
+    eventos = []
+
+    async def consumir():
+        async for transicao in agendador.eventos():
+            eventos.append(transicao)
+
+    async with agendador:
+        consumidor = asyncio.ensure_future(consumir())
+        while relogio.agora < fim:
+            await asyncio.sleep(0)
+        consumidor.cancel()
+    return eventos
+
+
+@pytest.mark.parametrize("inicio", [datetime(2025, 3, 28, tzinfo=timezone.utc), datetime(2025, 10, 24, tzinfo=timezone.utc)])
+def test_mudancas_de_hora(inicio):
+    fim = inicio + timedelta(days=4)
+    planos = {
+        "bi": Plano(6.9, Opcao_Horaria.BI_HORARIA, Ciclo_Semanal),
+        "tri": Plano(6.9, Opcao_Horaria.TRI_HORARIA, Ciclo_Diario),
+        "simples": Plano(6.9, Opcao_Horaria.SIMPLES),
+    }
+    relogio = Relogio(inicio)
+    agendador = Agendador(relogio=relogio, dormir=relogio.dormir, espera_maxima=None)
+    chamadas = []
+    for nome, plano in planos.items():
+        agendador.adicionar(nome, plano, callback=chamadas.append)
+
+    eventos = [e for e in asyncio.run(recolher(agendador, relogio, fim)) if e.instante < fim]
+
+    for nome, plano in planos.items():
+        esperado = mudancas(plano, inicio, fim)
+        obtido = [(e.instante, e.tarifa, e.anterior) for e in eventos if e.nome == nome]
+        assert obtido == esperado
+    assert [e for e in chamadas if e.instante < fim] == eventos
+    # Uma espera por mudança (e não por minuto)
+    assert relogio.esperas <= len(chamadas) + 1
+
+
+def test_adicionar_durante_espera():
+    relogio = Relogio(datetime(2025, 5, 5, 8, 0, tzinfo=timezone.utc))
+    agendador = Agendador(relogio=relogio, dormir=relogio.dormir)
+    bi = Plano(6.9, Opcao_Horaria.BI_HORARIA, Ciclo_Semanal)
+
+    async def cenario():
+        async with agendador:
+            await asyncio.sleep(0)
+            agendador.adicionar("bi", bi)
+            assert agendador.proxima() == datetime(2025, 5, 5, 23, 0, tzinfo=timezone.utc)
+            async for transicao in agendador.eventos():
+                return transicao
+
+    transicao = asyncio.run(cenario())
+
+    assert transicao.instante == datetime(2025, 5, 6, 0, 0, tzinfo=FUSO)
+    assert agendador.tarifa("bi") == transicao.tarifa
+
+
+def test_relogio_real():
+    agendador = Agendador()
+    agendador.adicionar("bi", Plano(6.9, Opcao_Horaria.BI_HORARIA, Ciclo_Semanal))
+
+    assert agendador.proxima() > datetime.now(timezone.utc)
+    agendador.remover("bi")
+    assert agendador.proxima() is None
@@ -0,0 +1,115 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from pyerse.cache import CacheSimulador, chave
+
+pytest.importorskip("requests")
+from pyerse.simulador import Simulador
+
+
+def test_chave():
+    dados = {
+        "caseType": "3", "electSupply": 5, "cycle": "1",
+        "electCalendarPeriodStart": "2021-8-1", "electCalendarPeriodEnd": "2021-08-31", "electPonta": 220,
+    }
+
+    assert chave(dados) == chave({**dados, "electCalendarPeriodStart": "2021-08-01", "electPonta": 100})
+    assert chave(dados) != chave({**dados, "cycle": "2"})
+
+
+def test_cache_simulador(simulador_local, tmp_path):
+    cache = CacheSimulador(tmp_path / "cache.sqlite")
+    s = Simulador(6.9, "2021-08-01", "2021-08-31", url=simulador_local.url, cache=cache)
+
+    assert s.melhor_tarifa_simples(220) == ("Beta - Verde", pytest.approx(0.15 * 220 + 0.35 * 30))
+    # A melhor oferta é escolhida localmente com os consumos de cada pedido (termo fixo incluído)
+    assert s.melhor_tarifa_simples(100) == ("Gama - Base", pytest.approx(0.17 * 100 + 0.25 * 30))
+    assert len(simulador_local.pedidos) == 2  # uma página com as ofertas e a página vazia final
+
+    # A cache persiste em disco
+    s = Simulador(6.9, "2021-08-01", "2021-08-31", url=simulador_local.url, cache=CacheSimulador(tmp_path / "cache.sqlite"))
+    s.melhor_tarifa_simples(50)
+    assert len(simulador_local.pedidos) == 2
+
+
+def test_cache_melhor_oferta_por_consumos(simulador_local):
+    # A melhor oferta depende da repartição dos consumos, que não entra na chave
+    sem_cache = Simulador(6.9, "2021-08-01", "2021-08-31", url=simulador_local.url)
+    s = Simulador(6.9, "2021-08-01", "2021-08-31", url=simulador_local.url, cache=CacheSimulador())
+
+    for consumos in [(500, 10), (10, 500), (200, 200)]:
+        [(oferta, estimativa)] = sem_cache.melhores_ofertas(1, *consumos)
+        assert s.melhor_tarifa_bihorario(*consumos) == (str(oferta), pytest.approx(estimativa))
+    assert s.melhor_tarifa_bihorario(500, 10) == ("Gama - Base", pytest.approx(0.18 * 500 + 0.11 * 10 + 0.25 * 30))
+    assert s.melhor_tarifa_bihorario(10, 500) == ("Beta - Verde", pytest.approx(0.2 * 10 + 0.09 * 500 + 0.35 * 30))
+    assert len(simulador_local.pedidos) == 2 * (3 + 1)
+
+
+def test_cache_ttl_lru():
+    cache = CacheSimulador(max_entradas=2)
+    for i in range(3):
+        cache.escrever(f"k{i}", {"v": i})
+    cache.ler("k1")
+    cache.escrever("k3", {"v": 3})
+
+    assert len(cache) == 2
+    assert cache.ler("k1") == {"v": 1}
+    assert cache.ler("k0") is None and cache.ler("k2") is None
+
+    expirada = CacheSimulador(ttl=0)
+    expirada.escrever("k", {"v": 0})
+    assert expirada.ler("k") is None
+
+
+def test_cache_pedidos_simultaneos(simulador_local):
+    simulador_local.demora = 0.1
+    s = Simulador(6.9, "2021-08-01", "2021-08-31", url=simulador_local.url, cache=CacheSimulador())
+
+    with ThreadPoolExecutor(8) as executor:
+        resultados = list(executor.map(s.melhor_tarifa_simples, [220] * 8))
+
+    assert resultados == [resultados[0]] * 8
+    assert len(simulador_local.pedidos) == 2
+
+
+def test_cache_pedidos_simultaneos_async(simulador_local):
+    pytest.importorskip("aiohttp")
+    from pyerse.simulador_async import AsyncSimulador
+
+    simulador_local.demora = 0.05
+
+    async def simular():
+        async with AsyncSimulador(6.9, "2021-08-01", "2021-08-31", url=simulador_local.url, cache=CacheSimulador()) as s:
+            return await asyncio.gather(*(s.melhor_tarifa_bihorario(120 + v, 100) for v in range(10)))
+
+    resultados = asyncio.run(simular())
+
+    assert resultados[3] == ("Gama - Base", pytest.approx(0.18 * 123 + 0.11 * 100 + 0.25 * 30))
+    assert len(simulador_local.pedidos) == 2
+
+
+def test_cache_async_sqlite_fora_do_ciclo():
+    threads = []
+
+    class Cache(CacheSimulador):
+        def ler(self, chave):
+            threads.append(threading.get_ident())
+            return super().ler(chave)
+
+        def escrever(self, chave, valor):
+            threads.append(threading.get_ident())
+            super().escrever(chave, valor)
+
+    async def calcular():
+        return {"v": 1}
+
+    async def obter(cache):
+        return [await cache.obter_async("k", calcular) for _ in range(2)], threading.get_ident()
+
+    resultados, ciclo = asyncio.run(obter(Cache()))
+
+    assert resultados == [{"v": 1}] * 2
+    assert len(threads) == 3 and ciclo not in threads
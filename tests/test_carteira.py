@@ -0,0 +1,54 @@
+import pytest
+
+from pyerse.carteira import Cliente, faturar_carteira, somar
+from pyerse.ciclos import Ciclo_Diario, Ciclo_Semanal
+from pyerse.comercializador import Plano, Opcao_Horaria, Tarifa
+
+np = pytest.importorskip("numpy")
+
+
+def clientes(n):
+    instantes = np.arange(
+        np.datetime64("2025-05-01T00:00"), np.datetime64("2025-06-01T00:00"), np.timedelta64(15, "m")
+    )
+    planos = []
+    for opcao_horaria, ciclo, precos in [
+        (Opcao_Horaria.SIMPLES, None, {Tarifa.NORMAL: 0.16}),
+        (Opcao_Horaria.BI_HORARIA, Ciclo_Diario, {Tarifa.VAZIO: 0.10, Tarifa.FORA_DE_VAZIO: 0.19}),
+        (Opcao_Horaria.TRI_HORARIA, Ciclo_Semanal, {Tarifa.VAZIO: 0.10, Tarifa.CHEIAS: 0.17, Tarifa.PONTA: 0.25}),
+    ]:
+        plano = Plano(6.9, opcao_horaria, ciclo)
+        for tarifa, preco in precos.items():
+            plano.definir_custo_kWh(tarifa, preco)
+        plano.definir_custo_potencia(0.3147)
+        planos.append(plano)
+
+    rng = np.random.default_rng(0)
+    return [
+        Cliente(f"PT{i:04}", planos[i % len(planos)], instantes, rng.random(len(instantes)) / 4)
+        for i in range(n)
+    ]
+
+
+@pytest.mark.parametrize("max_workers", [0, 2])
+def test_faturar_carteira(max_workers):
+    carteira = clientes(10)
+
+    faturas, total = faturar_carteira(carteira, max_workers=max_workers, tamanho_lote=3)
+
+    assert list(faturas) == [cliente.id for cliente in carteira]
+    for cliente in carteira:
+        assert faturas[cliente.id] == cliente.plano.faturar_serie(cliente.timestamps, cliente.kwh)
+    assert total.total == pytest.approx(sum(fatura.total for fatura in faturas.values()))
+    assert total == faturar_carteira(carteira, max_workers=0, tamanho_lote=3)[1]
+
+
+def test_somar():
+    a, b = clientes(2)
+    fatura_a = a.plano.faturar_serie(a.timestamps, a.kwh)
+    fatura_b = b.plano.faturar_serie(b.timestamps, b.kwh)
+
+    soma = somar([fatura_a, fatura_b])
+
+    assert set(soma.energia) == {Tarifa.NORMAL, Tarifa.VAZIO, Tarifa.FORA_DE_VAZIO}
+    assert soma.custos_fixos == fatura_a.custos_fixos + fatura_b.custos_fixos
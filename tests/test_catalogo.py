@@ -0,0 +1,79 @@
+import io
+
+import pytest
+
+from pyerse.catalogo import CatalogoOfertas
+from pyerse.comercializador import Opcao_Horaria
+from pyerse.simulador import Oferta
+
+np = pytest.importorskip("numpy")
+
+
+@pytest.fixture
+def catalogo():
+    c = CatalogoOfertas()
+    c.importar(
+        [
+            Oferta("Alfa", "Casa", (0.16, None, None), 0.30),
+            Oferta("Beta", "Verde", (0.15, None, None), 0.35),
+        ],
+        6.9, Opcao_Horaria.SIMPLES, "2021-01-01",
+    )
+    c.adicionar(Oferta("Gama", "Promo", (0.10, None, None), 0.30), 6.9, Opcao_Horaria.SIMPLES, "2021-06-01", "2021-06-30")
+    c.adicionar(Oferta("Delta", "Fixo", (0.185, 0.095, None), 0.32), 6.9, Opcao_Horaria.BI_HORARIA)
+    c.adicionar(Oferta("Gama", "Base", (0.18, 0.11, None), 0.25), 6.9, Opcao_Horaria.BI_HORARIA)
+    return c
+
+
+def test_melhor_tarifa(catalogo):
+    assert catalogo.melhor_tarifa_simples(6.9, "2021-08-01", "2021-08-31", 220) == (
+        "Beta - Verde", pytest.approx(0.15 * 220 + 0.35 * 30)
+    )
+    assert catalogo.melhor_tarifa_simples(6.9, "2021-06-01", "2021-06-30", 220)[0] == "Gama - Promo"
+    assert catalogo.melhor_tarifa_simples(6.9, "2020-06-01", "2020-06-30", 220) is None
+    assert catalogo.melhor_tarifa_bihorario(6.9, "2021-08-01", "2021-08-31", 120, 100)[0] == "Gama - Base"
+    assert catalogo.melhor_tarifa_trihorario(6.9, "2021-08-01", "2021-08-31", 20, 100, 100) is None
+
+
+def test_ranking(catalogo):
+    ranking = catalogo.ranking(6.9, Opcao_Horaria.SIMPLES, "2021-06-10", "2021-06-20", (100,))
+
+    assert [str(oferta) for oferta, _ in ranking] == ["Gama - Promo", "Beta - Verde", "Alfa - Casa"]
+    assert [estimativa for _, estimativa in ranking] == pytest.approx([13, 18.5, 19])
+
+
+def test_ranking_validade_no_periodo(catalogo):
+    # A promoção termina a meio do período: não é válida em [period_start, period_stop]
+    ranking = catalogo.ranking(6.9, Opcao_Horaria.SIMPLES, "2021-06-15", "2021-07-15", (100,))
+    assert [str(oferta) for oferta, _ in ranking] == ["Alfa - Casa", "Beta - Verde"]
+
+    # Nem começa a meio do período
+    assert catalogo.melhor_tarifa_simples(6.9, "2020-12-15", "2021-01-15", 100) is None
+    assert catalogo.melhor_tarifa_simples(6.9, "2021-06-01", "2021-06-30", 100)[0] == "Gama - Promo"
+
+
+def test_csv(catalogo):
+    ficheiro = io.StringIO()
+    catalogo.exportar_csv(ficheiro)
+    ficheiro.seek(0)
+
+    importado = CatalogoOfertas()
+    importado.importar_csv(ficheiro)
+
+    assert len(importado) == len(catalogo)
+    assert importado.ranking(6.9, "Bi-Horária", "2021-08-01", "2021-08-31", (120, 100)) == catalogo.ranking(
+        6.9, Opcao_Horaria.BI_HORARIA, "2021-08-01", "2021-08-31", (120, 100)
+    )
+
+
+def test_importar_simulador(simulador_local):
+    pytest.importorskip("requests")
+    from pyerse.simulador import Simulador
+
+    s = Simulador(6.9, "2021-08-01", "2021-08-31", url=simulador_local.url)
+    catalogo = CatalogoOfertas()
+    catalogo.importar(s.ofertas(20, 100, 100), 6.9, Opcao_Horaria.TRI_HORARIA)
+
+    assert catalogo.ranking(6.9, Opcao_Horaria.TRI_HORARIA, "2021-08-01", "2021-08-31", (20, 100, 100), n=2) == (
+        s.melhores_ofertas(2, 20, 100, 100)
+    )
@@ -0,0 +1,83 @@
+import random
+from fractions import Fraction
+
+import pytest
+
+from pyerse import centimos
+from pyerse.ciclos import Ciclo_Semanal
+from pyerse.comercializador import Plano, Opcao_Horaria, Tarifa
+
+
+def plano_bi_horario():
+    p = Plano(6.9, Opcao_Horaria.BI_HORARIA, Ciclo_Semanal)
+    p.definir_custo_kWh(Tarifa.FORA_DE_VAZIO, 0.1815)
+    p.definir_custo_kWh(Tarifa.VAZIO, 0.0958)
+    p.definir_custo_potencia(0.3147)
+    return p
+
+
+def test_exemplos():
+    p = plano_bi_horario()
+
+    fatura = centimos.faturar(p, {Tarifa.FORA_DE_VAZIO: 170, Tarifa.VAZIO: 80}, 30)
+    assert fatura.custo_energia == {Tarifa.VAZIO: (433, 471), Tarifa.FORA_DE_VAZIO: (1231, 2456)}
+    assert fatura.custos_fixos == 1161 + 302 + 9
+
+    fatura = centimos.faturar(p, {Tarifa.FORA_DE_VAZIO: 170, Tarifa.VAZIO: 80}, 30, familia_numerosa=True)
+    assert fatura.custo_energia == {Tarifa.VAZIO: (650, 236), Tarifa.FORA_DE_VAZIO: (1846, 1786)}
+    assert fatura.iec == 31
+    assert fatura.total == 650 + 236 + 1846 + 1786 + 31 + 1472
+    assert fatura.em_euros().total == 60.21
+
+
+def test_meio_centimo():
+    p = Plano(6.9, Opcao_Horaria.SIMPLES)
+    p.definir_custo_kWh(Tarifa.NORMAL, 0.275)
+    p.definir_custo_potencia(0.3147)
+
+    # 20 * 0.275 * 1.13 = 6.215 Euros exactos; em float fica abaixo de meio cêntimo
+    assert centimos.faturar(p, {Tarifa.NORMAL: 20}, 30).custo_energia[Tarifa.NORMAL] == (622, 0)
+    assert centimos.equivalencia(p, {Tarifa.NORMAL: 20}, 30)["NORMAL.intermedia"] == (622, 621)
+
+
+def test_equivalencia():
+    random.seed(1)
+    for _ in range(2000):
+        opcao_horaria = random.choice(list(Opcao_Horaria))
+        p = Plano(6.9, opcao_horaria, Ciclo_Semanal)
+        for tarifa in p.tarifas:
+            p.definir_custo_kWh(tarifa, round(random.random() * 0.3, 4))
+        p.definir_custo_potencia(round(random.random() * 0.5, 4))
+        energia = {tarifa: round(random.random() * 300, 3) for tarifa in p.tarifas}
+
+        diferencas = centimos.equivalencia(p, energia, 30)
+
+        # Só diferem (num cêntimo) parcelas com valor exacto em meio cêntimo, e o total (IEC)
+        for parcela, (inteiro, real) in diferencas.items():
+            assert abs(inteiro - real) == 1
+            if parcela == "custos_fixos":
+                exacto = 30 * Fraction(str(p.custo_potencia())) * 123
+                assert exacto.denominator == 2
+            elif parcela != "total":
+                tarifa = Tarifa[parcela.split(".")[0]]
+                assert parcela == f"{tarifa.name}.intermedia"
+                kwh = min(Fraction(str(energia[tarifa])), Fraction(str(p._plafond(tarifa, False))))
+                exacto = kwh * Fraction(str(p.custo_tarifa(tarifa))) * 113
+                assert exacto.denominator == 2
+
+
+def test_faturar_array():
+    np = pytest.importorskip("numpy")
+
+    p = plano_bi_horario()
+    rng = np.random.default_rng(0)
+    wh = rng.integers(0, 400_000, size=(500, 2))
+    dias = rng.integers(28, 32, size=500)
+    familia_numerosa = rng.random(500) < 0.3
+
+    totais = centimos.faturar_array(p, wh, dias, familia_numerosa)
+
+    assert totais.dtype == np.int64
+    for i in range(len(wh)):
+        energia = {tarifa: wh[i, j] / 1000 for j, tarifa in enumerate(p.tarifas)}
+        assert totais[i] == centimos.faturar(p, energia, int(dias[i]), bool(familia_numerosa[i])).total
@@ -1,8 +1,32 @@
 import pytest
 from freezegun import freeze_time
 
-from pyerse.ciclos import Ciclo_Diario, Ciclo_Semanal
-from datetime import datetime
+from pyerse.ciclos import (
+    ESTACOES_MESES,
+    MAPPING,
+    MINUTOS_SEMANA,
+    CicloException,
+    Ciclo_Diario,
+    Ciclo_Diario_Acores,
+    Ciclo_Diario_Madeira,
+    Ciclo_Diario_Opcional_Acores,
+    Ciclo_Diario_Opcional_Madeira,
+    Ciclo_Semanal,
+    Ciclo_Semanal_Acores,
+    Ciclo_Semanal_Madeira,
+    Ciclo_Semanal_Opcional,
+    registar,
+    registar_ficheiro,
+)
+from pyerse.comercializador import Opcao_Horaria, Plano, Tarifa
+from pyerse.periodos_horarios import Periodos_Horarios as ph
+from datetime import datetime, timedelta, timezone
+import json
+from zoneinfo import ZoneInfo
+
+CICLOS = list(MAPPING.values())
+"""Ciclos incluídos no pacote."""
+
 
 @pytest.mark.parametrize("frozen_time, expected_intervalo", [
     ("2025-03-23 00:05:00", (datetime(2025, 3, 23, 0, 0), datetime(2025, 3, 23, 2, 0))),
@@ -46,3 +70,252 @@ def test_get_intervalo_proximo_periodo_horario(frozen_time, expected_intervalo1,
 
         assert next(iter_intervalo) == expected_intervalo1
         assert next(iter_intervalo) == expected_intervalo2
+
+
+@pytest.mark.parametrize("ciclo", CICLOS, ids=str)
+@pytest.mark.parametrize("estacao", [1, 0])
+def test_tabela_compilada(ciclo, estacao):
+    tabela = ciclo.tabela()
+    assert len(tabela) == 2 * MINUTOS_SEMANA
+
+    # Compara a tabela com a pesquisa sobre PERIODOS, minuto a minuto de uma semana
+    segunda = datetime(2025, 7, 7) if estacao else datetime(2025, 1, 6)
+    season = ciclo.ESTACOES[estacao]
+    for minuto in range(MINUTOS_SEMANA):
+        t = segunda + timedelta(minutes=minuto)
+        weekday = 0 if t.weekday() < 5 or hasattr(ciclo, 'diario') else t.weekday()
+        esperado = next(
+            periodo
+            for periodo, intervalos in ciclo.PERIODOS[season][weekday].items()
+            if any(ciclo.in_time_range(a.hour, a.minute, t, b.hour, b.minute) for a, b in intervalos)
+        )
+        assert ciclo.get_periodo_horario(t) == esperado
+
+
+@pytest.mark.parametrize("ciclo", CICLOS, ids=str)
+def test_classify_many(ciclo):
+    np = pytest.importorskip("numpy")
+
+    instantes = np.arange(
+        np.datetime64("2024-12-30T00:00"), np.datetime64("2026-01-05T00:00"), np.timedelta64(13, "m")
+    )
+    codigos = ciclo.classify_many(instantes)
+
+    assert codigos.shape == instantes.shape
+    assert [ph.de_codigo(c) for c in codigos] == [
+        ciclo.get_periodo_horario(t) for t in instantes.astype(datetime)
+    ]
+
+
+def test_classify_many_datetimeindex():
+    pd = pytest.importorskip("pandas")
+
+    indice = pd.date_range("2025-03-29 23:00", periods=8, freq="h", tz="Europe/Lisbon")
+    codigos = Ciclo_Semanal.classify_many(indice)
+
+    assert [ph.de_codigo(c) for c in codigos] == [
+        Ciclo_Semanal.get_periodo_horario(t) for t in indice.to_pydatetime()
+    ]
+
+
+@pytest.mark.parametrize("instante_utc, expected_verao", [
+    ("2025-03-30 00:59:59", False),
+    ("2025-03-30 01:00:00", True),
+    ("2025-10-26 00:30:00", True),   # 01:30 WEST
+    ("2025-10-26 01:30:00", False),  # 01:30 WET (hora repetida)
+])
+def test_is_summer_com_fuso_horario(instante_utc, expected_verao):
+    instante = datetime.fromisoformat(instante_utc).replace(tzinfo=timezone.utc)
+
+    assert Ciclo_Semanal.is_summer(instante.astimezone(ZoneInfo("Europe/Lisbon"))) == expected_verao
+
+
+@pytest.mark.parametrize("ciclo", CICLOS, ids=str)
+def test_periodo_horario_epoch(ciclo):
+    fuso = ZoneInfo("Atlantic/Azores" if ciclo.FUSO == -3600 else "Europe/Lisbon")
+    inicio = int(datetime(2025, 3, 28, tzinfo=timezone.utc).timestamp())
+    fim = int(datetime(2025, 11, 3, tzinfo=timezone.utc).timestamp())
+    epochs = range(inicio, fim, 17 * 60)
+
+    esperado = [ciclo.get_periodo_horario(datetime.fromtimestamp(e, fuso)) for e in epochs]
+
+    assert [ciclo.get_periodo_horario_epoch(e) for e in epochs] == esperado
+
+    np = pytest.importorskip("numpy")
+    assert [ph.de_codigo(c) for c in ciclo.classify_epoch(np.array(epochs))] == esperado
+
+
+@pytest.mark.parametrize("start, expected_intervalos", [
+    (datetime(2025, 3, 23, 15, 15), [
+        (datetime(2025, 3, 23, 6, 0), datetime(2025, 3, 24, 2, 0), ph.VAZIO_NORMAL),
+        (datetime(2025, 3, 24, 2, 0), datetime(2025, 3, 24, 6, 0), ph.SUPER_VAZIO),
+        (datetime(2025, 3, 24, 6, 0), datetime(2025, 3, 24, 7, 0), ph.VAZIO_NORMAL),
+    ]),
+    (datetime(2025, 3, 22, 23, 15), [
+        (datetime(2025, 3, 22, 22, 0), datetime(2025, 3, 23, 2, 0), ph.VAZIO_NORMAL),
+        (datetime(2025, 3, 23, 2, 0), datetime(2025, 3, 23, 6, 0), ph.SUPER_VAZIO),
+    ]),
+])
+def test_intervalos_semanal(start, expected_intervalos):
+    end = expected_intervalos[-1][1] - timedelta(minutes=1)
+
+    assert list(Ciclo_Semanal.intervalos(start, end)) == expected_intervalos
+
+
+@pytest.mark.parametrize("ciclo, start, end", [
+    (Ciclo_Semanal, datetime(2025, 10, 20, 12, 7), datetime(2025, 11, 3)),
+    (Ciclo_Diario, datetime(2025, 10, 20, 12, 7), datetime(2025, 11, 3)),
+    (Ciclo_Semanal_Acores, datetime(2025, 5, 26, 12, 7), datetime(2025, 6, 9)),
+    (Ciclo_Semanal_Madeira, datetime(2025, 10, 27, 12, 7), datetime(2025, 11, 10)),
+])
+def test_intervalos_mudanca_hora(ciclo, start, end):
+    intervalos = list(ciclo.intervalos(start, end))
+
+    assert intervalos[0][0] <= start < intervalos[0][1]
+    assert intervalos[-1][0] < end <= intervalos[-1][1]
+    for (_, fim, periodo), (inicio, _, seguinte) in zip(intervalos, intervalos[1:]):
+        assert fim == inicio and periodo != seguinte
+    for inicio, fim, periodo in intervalos:
+        t = inicio
+        while t < fim:
+            assert ciclo.get_periodo_horario(t) == periodo
+            t += timedelta(minutes=15)
+
+
+
+@pytest.mark.parametrize("ciclo, t, expected", [
+    (Ciclo_Semanal_Opcional, datetime(2025, 1, 6, 18, 0), ph.PONTA),
+    (Ciclo_Semanal_Opcional, datetime(2025, 1, 6, 0, 15), ph.CHEIAS),
+    (Ciclo_Semanal_Opcional, datetime(2025, 7, 7, 15, 0), ph.PONTA),
+    (Ciclo_Semanal_Opcional, datetime(2025, 7, 12, 4, 0), ph.SUPER_VAZIO),
+    (Ciclo_Semanal_Opcional, datetime(2025, 7, 12, 11, 0), ph.CHEIAS),
+    (Ciclo_Semanal_Opcional, datetime(2025, 7, 13, 11, 0), ph.VAZIO_NORMAL),
+    (Ciclo_Diario_Acores, datetime(2025, 1, 6, 18, 0), ph.PONTA),
+    (Ciclo_Diario_Acores, datetime(2025, 7, 12, 18, 0), ph.CHEIAS),
+    (Ciclo_Diario_Opcional_Acores, datetime(2025, 1, 6, 10, 0), ph.CHEIAS),
+    (Ciclo_Diario_Opcional_Acores, datetime(2025, 1, 11, 17, 0), ph.PONTA),
+    (Ciclo_Diario_Madeira, datetime(2025, 1, 6, 11, 0), ph.PONTA),
+    (Ciclo_Diario_Madeira, datetime(2025, 7, 13, 22, 30), ph.CHEIAS),
+    (Ciclo_Diario_Opcional_Madeira, datetime(2025, 1, 6, 11, 0), ph.CHEIAS),
+    (Ciclo_Semanal_Acores, datetime(2025, 5, 26, 12, 0), ph.CHEIAS),
+    (Ciclo_Semanal_Acores, datetime(2025, 6, 2, 12, 0), ph.PONTA),
+    (Ciclo_Semanal_Acores, datetime(2025, 6, 7, 12, 0), ph.CHEIAS),
+    (Ciclo_Semanal_Acores, datetime(2025, 6, 8, 12, 0), ph.VAZIO_NORMAL),
+    (Ciclo_Semanal_Madeira, datetime(2025, 10, 27, 12, 0), ph.PONTA),
+    (Ciclo_Semanal_Madeira, datetime(2025, 11, 3, 12, 0), ph.CHEIAS),
+])
+def test_ciclos_opcionais_e_regioes_autonomas(ciclo, t, expected):
+    assert ciclo.get_periodo_horario(t) == expected
+
+
+@pytest.mark.parametrize("t, estacao", [
+    ("2025-05-31T23:59", 0),
+    ("2025-06-01T00:00", 1),
+    ("2025-10-31T23:59", 1),
+    ("2025-11-01T00:00", 0),
+])
+def test_estacoes_por_meses(t, estacao):
+    assert Ciclo_Semanal_Acores.ESTACOES is ESTACOES_MESES
+    assert Ciclo_Semanal_Acores.estacao(datetime.fromisoformat(t)) == estacao
+
+
+def test_intervalos_estacoes_por_meses():
+    # Sábado 23:00 (Novembro a Maio) até Segunda 07:00 (Junho a Outubro), com o Domingo todo em vazio
+    intervalos = Ciclo_Semanal_Acores.intervalos(datetime(2025, 5, 31, 23, 30))
+
+    assert next(intervalos) == (datetime(2025, 5, 31, 23, 0), datetime(2025, 6, 2, 7, 0), ph.VAZIO_NORMAL)
+    assert next(intervalos) == (datetime(2025, 6, 2, 7, 0), datetime(2025, 6, 2, 10, 30), ph.CHEIAS)
+    assert Ciclo_Semanal_Acores.get_intervalo_periodo_horario(datetime(2025, 6, 1, 12, 0)) == (
+        datetime(2025, 6, 1), datetime(2025, 6, 2)
+    )
+    plano = Plano(6.9, Opcao_Horaria.TRI_HORARIA, "Ciclo Semanal Açores")
+    assert plano.ciclo is Ciclo_Semanal_Acores
+    assert plano.next_transition(datetime(2025, 6, 1, 12, 0)) == (datetime(2025, 6, 2, 7, 0), Tarifa.CHEIAS)
+
+
+DIARIO_ILHA = {
+    "Inverno": {"0": {"Ponta": ["18:00-21:00"], "Cheias": ["08:00-18:00", "21:00-22:00"], "Vazio Normal": ["22:00-08:00"]}},
+    "Verão": {"0": {"Ponta": ["19:00-22:00"], "Cheias": ["08:00-19:00"], "Vazio Normal": ["22:00-08:00"]}},
+}
+
+
+@pytest.fixture
+def registo():
+    """Repõe MAPPING (e os nomes de classe em pyerse.ciclos) no fim do teste."""
+    import pyerse.ciclos
+
+    anteriores = dict(MAPPING)
+    yield
+    for nome in set(MAPPING) - set(anteriores):
+        delattr(pyerse.ciclos, MAPPING.pop(nome).__name__)
+
+
+def test_registar_ficheiro(tmp_path, registo):
+    # Ilha sintética, uma hora atrás do continente, registada a partir de um ficheiro
+    ficheiro = tmp_path / "ilha.json"
+    ficheiro.write_text(
+        json.dumps({"Ciclo Diário Ilha": {"classe": "Ciclo_Diario_Ilha", "fuso": -3600, "periodos": DIARIO_ILHA}}),
+        encoding="utf-8",
+    )
+
+    [ciclo] = registar_ficheiro(ficheiro)
+
+    assert MAPPING["Ciclo Diário Ilha"] is ciclo and ciclo.__name__ == "Ciclo_Diario_Ilha"
+    assert str(ciclo()) == "Ciclo Diário Ilha" and ciclo.diario
+    assert Plano(6.9, Opcao_Horaria.TRI_HORARIA, "Ciclo Diário Ilha").ciclo is ciclo
+    assert registar_ficheiro(ficheiro) == [ciclo]
+
+    # A classificação por epoch usa a hora legal da ilha
+    fuso = ZoneInfo("Atlantic/Azores")
+    for epoch in range(1735689600, 1767225600, 37 * 60 * 60 + 7 * 60):
+        assert ciclo.get_periodo_horario_epoch(epoch) == ciclo.get_periodo_horario(datetime.fromtimestamp(epoch, fuso))
+
+
+def test_registar_tabelas_partilhadas(registo):
+    ciclo = registar("Ciclo Diário Ilha", DIARIO_ILHA)
+    copia = registar("Ciclo Diário Ilha Copia", DIARIO_ILHA)
+
+    assert ciclo is not copia and ciclo.tabela() is copia.tabela()
+    assert registar("Ciclo Diário Ilha", DIARIO_ILHA) is ciclo
+    with pytest.raises(CicloException):
+        registar("Ciclo Diário Ilha", {**DIARIO_ILHA, "Inverno": DIARIO_ILHA["Verão"]})
+
+
+@pytest.mark.parametrize("cheias, erro", [
+    (["08:00-18:00", "21:30-22:00"], "lacuna entre 21:00 e 21:30"),
+    (["08:00-18:30", "21:00-22:00"], "sobrepõe-se"),
+    (["08:00-18:00", "21:00-22:00", "23:00-23:30"], "sobrepõe-se"),
+    (["08:00-17:00", "21:00-22:00"], "lacuna entre 17:00 e 18:00"),
+    (["8h-18h"], "definição inválida"),
+])
+def test_registar_invalido(cheias, erro):
+    inverno = {"0": {"Ponta": ["18:00-21:00"], "Cheias": cheias, "Vazio Normal": ["22:00-08:00"]}}
+
+    with pytest.raises(CicloException, match=erro):
+        registar("Ciclo Inválido", {**DIARIO_ILHA, "Inverno": inverno})
+    assert "Ciclo Inválido" not in MAPPING
+
+
+def test_intervalos_valor_constante(registo):
+    # Sem mudanças de valor a fusão pararia só no ano 0: os intervalos são as estações
+    vazio = {"0": {"Vazio Normal": ["00:00-00:00"]}}
+    ciclo = registar("Ciclo Vazio", {"Inverno": vazio, "Verão": vazio})
+    start = datetime(2025, 1, 6, 12, 0)
+
+    assert list(ciclo.intervalos(start, datetime(2025, 5, 1))) == [
+        (datetime(2024, 10, 27), datetime(2025, 3, 30), ph.VAZIO_NORMAL),
+        (datetime(2025, 3, 30), datetime(2025, 10, 26), ph.VAZIO_NORMAL),
+    ]
+    assert list(Ciclo_Semanal.intervalos(start, datetime(2025, 2, 1), (ph.CHEIAS,) * len(ph))) == [
+        (datetime(2024, 10, 27), datetime(2025, 3, 30), ph.CHEIAS),
+    ]
+    assert Plano(6.9, Opcao_Horaria.BI_HORARIA, ciclo).tarifa_actual(start).value == "Vazio"
+
+
+def test_ciclos_declarados():
+    # Os ciclos do pacote são as classes do módulo, com os periodos compilados do registo
+    import pickle
+
+    assert MAPPING["Ciclo Semanal"] is Ciclo_Semanal and MAPPING["Ciclo Diário"] is Ciclo_Diario
+    assert "_tabela" in vars(Ciclo_Semanal) and Ciclo_Diario.diario and not hasattr(Ciclo_Semanal, "diario")
+    assert pickle.loads(pickle.dumps(Ciclo_Semanal)) is Ciclo_Semanal
@@ -1,9 +1,15 @@
+import gc
+import pickle
+
 import pytest 
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
 from freezegun import freeze_time
 
 from pyerse.ciclos import Ciclo_Semanal
-from pyerse.comercializador import Plano, Opcao_Horaria, Tarifa
+from pyerse.comercializador import (
+    Plano, PlanoCompacto, PlanoException, Opcao_Horaria, Tarifa, TARIFAS, TARIFA_PERIODO, custos_kWh_iva,
+)
 
 @pytest.mark.parametrize("frozen_time, expected_tarifa, expected_intervalo", [
     ("2025-03-23 00:05:00", Tarifa.VAZIO, (datetime(2025, 3, 23, 0, 0), datetime(2025, 3, 24, 7, 0))),
@@ -67,7 +73,38 @@ def test_tarifa_proximo_intervalo_tri_horario(frozen_time, expected_tarifa, expe
         (start, stop) = next(it)
         assert p.tarifa_actual(start) == expected_new_tarifa
         assert (start, stop) == expected_intervalo
- 
+
+
+def test_intervalos_bi_horario_semanal():
+    p = Plano(6.9, Opcao_Horaria.BI_HORARIA, Ciclo_Semanal)
+
+    assert list(p.intervalos(datetime(2025, 3, 23, 15, 15), datetime(2025, 3, 25, 12, 0))) == [
+        (datetime(2025, 3, 22, 22, 0), datetime(2025, 3, 24, 7, 0), Tarifa.VAZIO),
+        (datetime(2025, 3, 24, 7, 0), datetime(2025, 3, 25, 0, 0), Tarifa.FORA_DE_VAZIO),
+        (datetime(2025, 3, 25, 0, 0), datetime(2025, 3, 25, 7, 0), Tarifa.VAZIO),
+        (datetime(2025, 3, 25, 7, 0), datetime(2025, 3, 26, 0, 0), Tarifa.FORA_DE_VAZIO),
+    ]
+
+
+@pytest.mark.parametrize("opcao_horaria, now, expected_transicao", [
+    (Opcao_Horaria.BI_HORARIA, datetime(2025, 3, 23, 15, 15), (datetime(2025, 3, 24, 7, 0), Tarifa.FORA_DE_VAZIO)),
+    (Opcao_Horaria.TRI_HORARIA, datetime(2025, 3, 24, 15, 15), (datetime(2025, 3, 24, 18, 30), Tarifa.PONTA)),
+    (Opcao_Horaria.TRI_HORARIA, datetime(2025, 3, 24, 2, 30), (datetime(2025, 3, 24, 7, 0), Tarifa.CHEIAS)),
+])
+def test_next_transition(opcao_horaria, now, expected_transicao):
+    p = Plano(6.9, opcao_horaria, Ciclo_Semanal)
+
+    assert p.next_transition(now) == expected_transicao
+
+
+def test_intervalos_simples():
+    p = Plano(6.9, Opcao_Horaria.SIMPLES)
+    start, end = datetime(2025, 3, 23), datetime(2025, 4, 23)
+
+    assert list(p.intervalos(start, end)) == [(start, end, Tarifa.NORMAL)]
+    assert p.next_transition(start) is None
+    assert next(p.intervalo(start)) == (datetime(2025, 3, 24), datetime(2025, 3, 25))
+
 
 def compare_euro(a, b, precision=2):
     return round(a, precision) == round(b, precision)
@@ -130,3 +167,186 @@ def test_custo_exemplo_3():
         p.custo_kWh(Tarifa.VAZIO, 80, familia_numerosa=True), 6.50 + 2.36
     )
     assert compare_euro(p.custos_fixos(30), 10.92 + 0.69 + 3.02 + 0.09)
+
+
+def test_faturar_serie_tri_horario():
+    np = pytest.importorskip("numpy")
+
+    p = Plano(6.9, Opcao_Horaria.TRI_HORARIA, Ciclo_Semanal)
+    p.definir_custo_kWh(Tarifa.PONTA, 0.2)
+    p.definir_custo_kWh(Tarifa.CHEIAS, 0.15)
+    p.definir_custo_kWh(Tarifa.VAZIO, 0.1)
+    p.definir_custo_potencia(0.3147)
+
+    instantes = np.arange(
+        np.datetime64("2025-03-01T00:00"), np.datetime64("2025-04-01T00:00"), np.timedelta64(15, "m")
+    )
+    kwh = np.linspace(0.01, 0.2, len(instantes))
+
+    fatura = p.faturar_serie(instantes, kwh)
+
+    energia = {tarifa: 0 for tarifa in p.tarifas}
+    for t, k in zip(instantes.astype(datetime), kwh):
+        energia[p.tarifa_actual(t)] += k
+    for tarifa in p.tarifas:
+        assert fatura.energia[tarifa] == pytest.approx(energia[tarifa])
+        assert sum(fatura.custo_energia[tarifa]) == p.custo_kWh(tarifa, fatura.energia[tarifa])
+    assert fatura.custos_fixos == p.custos_fixos(31)
+    assert fatura.total == pytest.approx(
+        sum(p.custo_kWh_final(tarifa, fatura.energia[tarifa]) for tarifa in p.tarifas) + p.custos_fixos(31)
+    )
+
+
+def test_faturar_serie_um_mes():
+    np = pytest.importorskip("numpy")
+
+    p = Plano(6.9, Opcao_Horaria.SIMPLES)
+    p.definir_custo_kWh(Tarifa.NORMAL, 0.16)
+    p.definir_custo_potencia(0.3147)
+    instantes = np.arange(
+        np.datetime64("2025-03-01T00:00"), np.datetime64("2025-05-01T00:00"), np.timedelta64(1, "h")
+    )
+    kwh = np.full(len(instantes), 0.1)
+
+    # Os plafonds de IVA são mensais: cada mês é faturado em separado
+    with pytest.raises(PlanoException):
+        p.faturar_serie(instantes, kwh)
+    marco = instantes < np.datetime64("2025-04-01")
+    assert p.faturar_serie(instantes[marco], kwh[marco]).custo_energia[Tarifa.NORMAL] == p.custo_kWh_iva(
+        Tarifa.NORMAL, 0.1 * 31 * 24
+    )
+
+
+def test_faturar_simples():
+    p = Plano(3.45, Opcao_Horaria.SIMPLES)
+    p.definir_custo_kWh(Tarifa.NORMAL, 0.1486)
+    p.definir_custo_potencia(0.1660)
+
+    fatura = p.faturar({Tarifa.NORMAL: 160}, 30)
+
+    assert fatura.custo_energia[Tarifa.NORMAL] == (16.79, 10.97)
+    assert compare_euro(fatura.total, p.custo_kWh_final(Tarifa.NORMAL, 160) + p.custos_fixos(30))
+
+
+def test_custo_tarifa_fora_da_opcao():
+    p = Plano(6.9, Opcao_Horaria.BI_HORARIA, Ciclo_Semanal)
+    p.definir_custo_kWh(Tarifa.VAZIO, 0.1)
+
+    with pytest.raises(PlanoException):
+        p.custo_kWh_iva(Tarifa.PONTA, 10)
+
+
+@pytest.mark.parametrize("opcao_horaria", list(Opcao_Horaria))
+def test_custos_kWh_iva(opcao_horaria):
+    np = pytest.importorskip("numpy")
+
+    rng = np.random.default_rng(0)
+    tarifas = TARIFAS[opcao_horaria]
+    kwh = np.round(rng.random((2000, len(tarifas))) * 200, 1)
+    kwh[0] = 20  # 20 * 0.275 * 1.13 = 6.215: round() dá 6.21 e numpy.round 6.22
+    precos = np.round(rng.random((2000, len(tarifas))) * 0.3, 4)
+    precos[0] = 0.275
+    familia_numerosa = rng.random(2000) < 0.3
+
+    intermedia, normal = custos_kWh_iva(opcao_horaria, precos, kwh, familia_numerosa)
+
+    for i in range(len(kwh)):
+        p = Plano(6.9, opcao_horaria, Ciclo_Semanal)
+        for j, tarifa in enumerate(tarifas):
+            p.definir_custo_kWh(tarifa, float(precos[i, j]))
+            assert p.custo_kWh_iva(tarifa, float(kwh[i, j]), bool(familia_numerosa[i])) == (
+                intermedia[i, j],
+                normal[i, j],
+            )
+
+
+def test_tarifa_actual_janela(monkeypatch):
+    p = Plano(6.9, Opcao_Horaria.BI_HORARIA, Ciclo_Semanal)
+    intervalos = []
+    original = Plano.intervalos
+
+    def contar(self, start, end=None):
+        intervalos.append(start)
+        return original(self, start, end)
+
+    monkeypatch.setattr(Plano, "intervalos", contar)
+
+    # Segunda-feira de Verão: fora de vazio das 07:00 às 24:00
+    assert p.tarifa_actual(datetime(2025, 5, 5, 8, 0)) == Tarifa.FORA_DE_VAZIO
+    assert p.tarifa_actual(datetime(2025, 5, 5, 23, 59)) == Tarifa.FORA_DE_VAZIO
+    assert p.tarifa_actual(datetime(2025, 5, 5, 7, 0)) == Tarifa.FORA_DE_VAZIO
+    assert len(intervalos) == 1
+
+    assert p.tarifa_actual(datetime(2025, 5, 6, 0, 0)) == Tarifa.VAZIO
+    assert len(intervalos) == 2
+
+    # Outro fuso horário não usa a janela guardada
+    assert p.tarifa_actual(datetime(2025, 5, 6, 1, 0, tzinfo=timezone.utc)) == Tarifa.VAZIO
+    assert len(intervalos) == 3
+
+    p.definir_custo_kWh(Tarifa.VAZIO, 0.1)
+    assert p.tarifa_actual(datetime(2025, 5, 6, 1, 0, tzinfo=timezone.utc)) == Tarifa.VAZIO
+    assert len(intervalos) == 4
+
+
+def test_tarifa_actual_janela_mudanca_de_hora():
+    lisboa = ZoneInfo("Europe/Lisbon")
+    for opcao_horaria in (Opcao_Horaria.BI_HORARIA, Opcao_Horaria.TRI_HORARIA):
+        p = Plano(6.9, opcao_horaria, Ciclo_Semanal)
+        for inicio in (datetime(2025, 3, 29, tzinfo=timezone.utc), datetime(2025, 10, 25, tzinfo=timezone.utc)):
+            for i in range(2 * 24 * 12):
+                t = (inicio + timedelta(minutes=5 * i)).astimezone(lisboa)
+                assert p.tarifa_actual(t) == TARIFA_PERIODO[opcao_horaria][Ciclo_Semanal.get_periodo_horario(t)]
+
+
+PRECOS_TRI = {Tarifa.VAZIO: 0.1023, Tarifa.CHEIAS: 0.1659, Tarifa.PONTA: 0.2435}
+
+
+def test_plano_compacto_partilhado():
+    plano = PlanoCompacto(6.9, Opcao_Horaria.TRI_HORARIA, Ciclo_Semanal, PRECOS_TRI, 0.3147)
+
+    assert PlanoCompacto(6.9, "Tri-Horária", "Ciclo Semanal", {t.value: p for t, p in PRECOS_TRI.items()}, 0.3147) is plano
+    assert PlanoCompacto(6.9, Opcao_Horaria.TRI_HORARIA, Ciclo_Semanal, PRECOS_TRI, 0.32) is not plano
+    assert pickle.loads(pickle.dumps(plano)) is plano
+    assert {plano: 1}[PlanoCompacto(6.9, Opcao_Horaria.TRI_HORARIA, Ciclo_Semanal, PRECOS_TRI, 0.3147)] == 1
+    assert plano.precos == PRECOS_TRI
+
+    # Sem referências o plano é descartado
+    chave = plano._chave
+    del plano
+    gc.collect()
+    assert chave not in PlanoCompacto._planos
+
+
+def test_plano_compacto_imutavel():
+    plano = PlanoCompacto(6.9, Opcao_Horaria.TRI_HORARIA, Ciclo_Semanal, PRECOS_TRI, 0.3147)
+
+    with pytest.raises(PlanoException):
+        plano.definir_custo_kWh(Tarifa.VAZIO, 0.2)
+    with pytest.raises(AttributeError):
+        plano._precos = ()
+    with pytest.raises(AttributeError):
+        plano.outro = 1
+    assert not hasattr(plano, "__dict__")
+
+
+def test_plano_compacto_equivalente():
+    plano = Plano(6.9, Opcao_Horaria.TRI_HORARIA, Ciclo_Semanal)
+    for tarifa, preco in PRECOS_TRI.items():
+        plano.definir_custo_kWh(tarifa, preco)
+    plano.definir_custo_potencia(0.3147)
+    compacto = PlanoCompacto.de_plano(plano)
+
+    assert compacto is PlanoCompacto(6.9, Opcao_Horaria.TRI_HORARIA, Ciclo_Semanal, PRECOS_TRI, 0.3147)
+    energia = {Tarifa.VAZIO: 120.5, Tarifa.CHEIAS: 80, Tarifa.PONTA: 30.25}
+    assert compacto.faturar(energia, 30, True) == plano.faturar(energia, 30, True)
+    instante = datetime(2025, 3, 24, 20, 0)
+    assert compacto.custo_kWh_actual(50, now=instante) == plano.custo_kWh_actual(50, now=instante)
+    assert compacto.custo_tarifa(Tarifa.NORMAL) == plano.custo_tarifa(Tarifa.NORMAL) == 0
+    assert all(compacto.preco_kWh(tarifa) == plano.preco_kWh(tarifa) == PRECOS_TRI[tarifa] for tarifa in plano.tarifas)
+    for p in (plano, compacto):
+        with pytest.raises(PlanoException):
+            p.preco_kWh(Tarifa.NORMAL)
+    with pytest.raises(PlanoException):
+        PlanoCompacto(6.9, Opcao_Horaria.TRI_HORARIA, Ciclo_Semanal).custo_potencia()
+
@@ -0,0 +1,80 @@
+import pytest
+
+from pyerse.comercializador import Comercializador, Plano, PlanoException, Opcao_Horaria, Tarifa
+from pyerse.comparador import comparar
+
+np = pytest.importorskip("numpy")
+
+
+def oferta(nome, opcao_horaria, ciclo, precos):
+    c = Comercializador(nome, 6.9, opcao_horaria, ciclo)
+    for tarifa, preco in precos.items():
+        c.plano.definir_custo_kWh(tarifa, preco)
+    c.plano.definir_custo_potencia(0.3147)
+    return c
+
+
+def test_comparar():
+    instantes = np.arange(
+        np.datetime64("2025-06-01T00:00"), np.datetime64("2025-07-01T00:00"), np.timedelta64(15, "m")
+    )
+    kwh = 0.05 + 0.1 * (instantes.astype("datetime64[h]").astype(np.int64) % 24 >= 18)
+
+    ofertas = [
+        oferta("A", Opcao_Horaria.SIMPLES, None, {Tarifa.NORMAL: 0.16}),
+        oferta("B", Opcao_Horaria.BI_HORARIA, "Ciclo Diário", {Tarifa.VAZIO: 0.10, Tarifa.FORA_DE_VAZIO: 0.19}),
+        oferta("C", Opcao_Horaria.BI_HORARIA, "Ciclo Semanal", {Tarifa.VAZIO: 0.10, Tarifa.FORA_DE_VAZIO: 0.19}),
+        oferta("D", Opcao_Horaria.TRI_HORARIA, "Ciclo Semanal",
+               {Tarifa.VAZIO: 0.10, Tarifa.CHEIAS: 0.17, Tarifa.PONTA: 0.25}),
+    ]
+
+    ranking = comparar(ofertas, instantes, kwh)
+
+    assert sorted(proposta.nome for proposta in ranking) == ["A", "B", "C", "D"]
+    assert [p.fatura.total for p in ranking] == sorted(p.fatura.total for p in ranking)
+    for proposta in ranking:
+        esperado = proposta.plano.faturar_serie(instantes, kwh)
+        assert proposta.fatura.energia == pytest.approx(esperado.energia)
+        assert proposta.fatura.total == pytest.approx(esperado.total)
+        assert proposta.fatura == proposta.plano.faturar(proposta.fatura.energia, 30)
+
+
+def test_comparar_com_fuso_horario():
+    pd = pytest.importorskip("pandas")
+
+    # Outubro em Lisboa, com a mudança de hora: a hora local difere de UTC
+    instantes = pd.date_range("2025-10-01", "2025-11-01", freq="15min", inclusive="left", tz="Europe/Lisbon")
+    kwh = 0.05 + 0.1 * (instantes.hour >= 18)
+
+    ofertas = [
+        oferta("C", Opcao_Horaria.BI_HORARIA, "Ciclo Semanal", {Tarifa.VAZIO: 0.10, Tarifa.FORA_DE_VAZIO: 0.19}),
+        oferta("D", Opcao_Horaria.TRI_HORARIA, "Ciclo Diário",
+               {Tarifa.VAZIO: 0.10, Tarifa.CHEIAS: 0.17, Tarifa.PONTA: 0.25}),
+    ]
+
+    for proposta in comparar(ofertas, instantes, kwh):
+        esperado = proposta.plano.faturar_serie(instantes, kwh)
+        assert proposta.fatura.energia == pytest.approx(esperado.energia)
+        assert proposta.fatura.custos_fixos == esperado.custos_fixos
+        assert proposta.fatura.total == pytest.approx(esperado.total)
+
+
+def test_comparar_planos():
+    p = Plano(6.9, Opcao_Horaria.SIMPLES)
+    p.definir_custo_kWh(Tarifa.NORMAL, 0.16)
+    p.definir_custo_potencia(0.3147)
+
+    [proposta] = comparar([p], np.array(["2025-06-01T00:00"], dtype="datetime64[m]"), [1.0])
+
+    assert proposta.nome == str(p)
+    assert proposta.fatura.energia == {Tarifa.NORMAL: 1.0}
+
+
+def test_comparar_um_mes():
+    instantes = np.arange(
+        np.datetime64("2025-06-01T00:00"), np.datetime64("2025-08-01T00:00"), np.timedelta64(1, "h")
+    )
+    ofertas = [oferta("A", Opcao_Horaria.SIMPLES, None, {Tarifa.NORMAL: 0.16})]
+
+    with pytest.raises(PlanoException):
+        comparar(ofertas, instantes, np.ones(len(instantes)))
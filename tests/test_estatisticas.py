@@ -0,0 +1,73 @@
+from datetime import datetime
+from itertools import islice
+
+import pytest
+
+import pyerse
+from pyerse import estatisticas
+from pyerse.cache import CacheSimulador
+from pyerse.ciclos import Ciclo_Semanal
+from pyerse.comercializador import Opcao_Horaria, Plano
+
+
+@pytest.fixture
+def activo():
+    estatisticas.repor()
+    estatisticas.activar()
+    yield
+    estatisticas.activar(False)
+    estatisticas.repor()
+
+
+def test_desactivado():
+    estatisticas.repor()
+    Ciclo_Semanal.get_periodo_horario(datetime(2025, 5, 5, 10, 0))
+
+    assert pyerse.stats() == {"activo": False, "contadores": {}, "histogramas": {}}
+
+
+def test_classificacoes(activo):
+    np = pytest.importorskip("numpy")
+
+    Ciclo_Semanal.get_periodo_horario(datetime(2025, 5, 5, 10, 0))
+    Ciclo_Semanal.classify_many(np.array(["2025-05-05T10:00", "2025-05-05T23:00"], dtype="datetime64[m]"))
+    Ciclo_Semanal.classify_epoch([1746439200])
+
+    stats = pyerse.stats()
+    assert stats["contadores"] == {"ciclo.classificacoes": 4}
+    assert stats["histogramas"]["ciclo.classify_many"]["n"] == 1
+    assert stats["histogramas"]["ciclo.classify_epoch"]["n"] == 1
+
+
+def test_intervalo_hook(activo):
+    registos = []
+
+    def hook(nome, duracao):
+        registos.append(nome)
+
+    estatisticas.adicionar_hook(hook)
+    try:
+        p = Plano(6.9, Opcao_Horaria.TRI_HORARIA, Ciclo_Semanal)
+        list(islice(p.intervalo(datetime(2025, 3, 28, 12, 0)), 5))
+    finally:
+        estatisticas.remover_hook(hook)
+
+    histograma = pyerse.stats()["histogramas"]["plano.intervalo"]
+    assert registos == ["plano.intervalo"] * 5
+    assert histograma["n"] == sum(histograma["baldes"].values()) == 5
+    assert 0 < histograma["min"] <= histograma["media"] <= histograma["max"]
+
+
+def test_simulador(activo, simulador_local):
+    pytest.importorskip("requests")
+    from pyerse.simulador import Simulador
+
+    s = Simulador(6.9, "2021-08-01", "2021-09-01", url=simulador_local.url, cache=CacheSimulador())
+
+    s.melhor_tarifa_simples(220)
+    s.melhor_tarifa_simples(100)
+
+    stats = pyerse.stats()
+    assert stats["contadores"] == {"cache.falhas": 1, "cache.acertos": 1}
+    assert stats["histogramas"]["simulador.simular"]["n"] == 2
+    assert stats["histogramas"]["simulador.pedido"]["n"] == 2
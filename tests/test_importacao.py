@@ -0,0 +1,58 @@
+import subprocess
+import sys
+
+PESADOS = {"requests", "urllib3", "aiohttp", "numpy", "pandas", "asyncio", "sqlite3"}
+
+
+def importados(codigo):
+    """Módulos importados por codigo, segundo python -X importtime."""
+    resultado = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", codigo], capture_output=True, text=True, check=True
+    )
+    return {
+        linha.split("|")[-1].strip()
+        for linha in resultado.stderr.splitlines()
+        if linha.startswith("import time:") and not linha.endswith("package")
+    }, resultado.stdout
+
+
+def test_importacao_leve():
+    modulos, _ = importados("import pyerse, pyerse.comercializador, pyerse.simulador, pyerse.catalogo")
+
+    assert "pyerse.simulador" in modulos
+    assert not modulos & PESADOS
+
+
+def test_tabelas_sem_periodos():
+    # A classificação usa as tabelas compiladas no registo, sem construir PERIODOS
+    _, saida = importados(
+        "from datetime import datetime\n"
+        "from pyerse.ciclos import Ciclo_Semanal\n"
+        "print(Ciclo_Semanal.get_periodo_horario(datetime(2025, 5, 5, 10)))\n"
+        "print('PERIODOS' in vars(Ciclo_Semanal))\n"
+    )
+
+    assert saida.split() == ["Ponta", "False"]
+
+
+
+def test_registo_concorrente():
+    # Vários threads a usar o registo na primeira importação vêem todos os ciclos
+    _, saida = importados(
+        "import threading\n"
+        "barreira = threading.Barrier(8)\n"
+        "erros = []\n"
+        "def plano():\n"
+        "    barreira.wait()\n"
+        "    try:\n"
+        "        from pyerse.comercializador import Opcao_Horaria, Plano\n"
+        "        Plano(6.9, Opcao_Horaria.BI_HORARIA, 'Ciclo Semanal')\n"
+        "    except Exception as erro:\n"
+        "        erros.append(erro)\n"
+        "threads = [threading.Thread(target=plano) for _ in range(8)]\n"
+        "for thread in threads: thread.start()\n"
+        "for thread in threads: thread.join()\n"
+        "print(len(erros))\n"
+    )
+
+    assert saida.split() == ["0"]
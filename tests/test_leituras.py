@@ -0,0 +1,92 @@
+import csv
+import io
+
+import pytest
+
+from pyerse.__main__ import main
+from pyerse.ciclos import Ciclo_Semanal
+from pyerse.comercializador import Plano, Opcao_Horaria, Tarifa
+from pyerse import leituras
+
+np = pytest.importorskip("numpy")
+
+
+@pytest.fixture
+def perfil():
+    instantes = np.arange(
+        np.datetime64("2025-01-20T00:00"), np.datetime64("2025-03-10T00:00"), np.timedelta64(15, "m")
+    )
+    kwh = np.round(np.linspace(0.01, 0.3, len(instantes)), 4)
+    return instantes, kwh
+
+
+def escrever_csv(caminho, instantes, kwh):
+    with open(caminho, "w", newline="") as f:
+        f.write("timestamp;kwh\n")
+        for t, k in zip(instantes, kwh):
+            f.write(f"{str(t).replace('T', ' ')};{str(k).replace('.', ',')}\n")
+
+
+def test_agregar_por_blocos(perfil):
+    instantes, kwh = perfil
+    plano = Plano(6.9, Opcao_Horaria.BI_HORARIA, Ciclo_Semanal)
+    ficheiro = io.StringIO("timestamp,kwh\n" + "".join(f"{t},{k}\n" for t, k in zip(instantes, kwh)))
+
+    agregados = leituras.agregar(plano, leituras.ler_csv(ficheiro, tamanho_bloco=1000))
+
+    assert list(agregados) == ["2025-01", "2025-02", "2025-03"]
+    for periodo, (dias, energia) in agregados.items():
+        mes = instantes.astype("datetime64[M]") == np.datetime64(periodo)
+        assert dias == len(np.unique(instantes[mes].astype("datetime64[D]")))
+        esperado = plano.energia_serie(instantes[mes], kwh[mes])
+        assert energia == pytest.approx(esperado)
+
+
+
+def test_ler_csv_linhas_vazias():
+    ficheiro = io.StringIO("timestamp,kwh\n2025-01-01 00:00,0.5\n\n2025-01-01 00:15,0.25\n\n")
+
+    [(instantes, kwh)] = leituras.ler_csv(ficheiro)
+
+    assert instantes.tolist() == np.array(["2025-01-01T00:00", "2025-01-01T00:15"], dtype="datetime64[m]").tolist()
+    assert kwh.tolist() == [0.5, 0.25]
+
+
+def test_ler_csv_sem_cabecalho():
+    with pytest.raises(ValueError, match="sem cabeçalho"):
+        list(leituras.ler_csv(io.StringIO("")))
+
+def test_cli_faturar(perfil, tmp_path):
+    instantes, kwh = perfil
+    escrever_csv(tmp_path / "leituras.csv", instantes, kwh)
+
+    main([
+        "faturar", str(tmp_path / "leituras.csv"),
+        "--potencia", "6.9", "--opcao", "Bi-Horária", "--ciclo", "Ciclo Semanal",
+        "--preco", "Vazio=0.0958", "--preco", "Fora de Vazio=0.1815", "--preco-potencia", "0.3147",
+        "--delimitador", ";", "--decimal", ",", "--bloco", "500", "-o", str(tmp_path / "resumo.csv"),
+    ])
+
+    with open(tmp_path / "resumo.csv", newline="") as f:
+        resumo = list(csv.DictReader(f))
+
+    plano = Plano(6.9, Opcao_Horaria.BI_HORARIA, Ciclo_Semanal)
+    plano.definir_custo_kWh(Tarifa.VAZIO, 0.0958)
+    plano.definir_custo_kWh(Tarifa.FORA_DE_VAZIO, 0.1815)
+    plano.definir_custo_potencia(0.3147)
+    mes = instantes.astype("datetime64[M]") == np.datetime64("2025-02")
+    fatura = plano.faturar_serie(instantes[mes], kwh[mes])
+
+    assert [linha["periodo"] for linha in resumo] == ["2025-01", "2025-02", "2025-03"]
+    assert resumo[1]["dias"] == "28"
+    assert float(resumo[1]["total"]) == round(fatura.total, 2)
+
+
+def test_cli_faturar_sem_ciclo(tmp_path, capsys):
+    (tmp_path / "leituras.csv").write_text("timestamp,kwh\n2025-01-01 00:00,0.5\n")
+
+    with pytest.raises(SystemExit) as saida:
+        main(["faturar", str(tmp_path / "leituras.csv"), "--potencia", "6.9", "--opcao", "Bi-Horária"])
+
+    assert saida.value.code == 2
+    assert "pyerse faturar: error: Ciclo não definido" in capsys.readouterr().err
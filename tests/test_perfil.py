@@ -0,0 +1,85 @@
+import os
+
+import pytest
+
+from pyerse.ciclos import Ciclo_Semanal
+from pyerse.comercializador import Plano, Opcao_Horaria, Tarifa
+from pyerse.perfil import PerfilCarga, PerfilCargaException
+
+np = pytest.importorskip("numpy")
+
+
+@pytest.fixture
+def plano():
+    p = Plano(6.9, Opcao_Horaria.TRI_HORARIA, Ciclo_Semanal)
+    p.definir_custo_kWh(Tarifa.PONTA, 0.2)
+    p.definir_custo_kWh(Tarifa.CHEIAS, 0.15)
+    p.definir_custo_kWh(Tarifa.VAZIO, 0.1)
+    p.definir_custo_potencia(0.3147)
+    return p
+
+
+def test_perfil_carga(tmp_path, plano):
+    epochs = np.arange(1738368000, 1740787200, 900)  # Fevereiro 2025 (UTC)
+    kwh = np.linspace(0.01, 0.2, len(epochs)).astype(np.float32)
+
+    perfil = PerfilCarga(tmp_path / "cpe")
+    perfil.acrescentar(epochs[:1000], kwh[:1000])
+    assert len(perfil) == 1000
+    primeiros = perfil.periodos(Ciclo_Semanal).copy()
+
+    perfil.acrescentar(epochs[1000:], kwh[1000:])
+    periodos = perfil.periodos(Ciclo_Semanal)
+
+    assert (perfil.epochs == epochs).all()
+    assert (periodos[:1000] == primeiros).all()
+    assert (periodos == Ciclo_Semanal.classify_epoch(epochs)).all()
+    assert len([f for f in os.listdir(tmp_path / "cpe") if f.startswith("periodos-")]) == 1
+
+    fatura = perfil.faturar(plano)
+    instantes = (epochs.astype("datetime64[s]")).astype("datetime64[m]")
+    esperado = plano.energia_serie(instantes, kwh)
+
+    assert fatura.energia == pytest.approx(esperado)
+    assert fatura.custos_fixos == plano.custos_fixos(28)
+
+
+def test_perfil_carga_fatia(tmp_path, plano):
+    perfil = PerfilCarga(tmp_path / "cpe")
+    perfil.acrescentar(np.arange(0, 100 * 900, 900), np.ones(100))
+
+    assert perfil.energia(plano, 900 * 10, 900 * 20) == pytest.approx(
+        {Tarifa.VAZIO: 10, Tarifa.CHEIAS: 0, Tarifa.PONTA: 0}
+    )
+
+    with pytest.raises(PerfilCargaException):
+        perfil.acrescentar([0], [1])
+
+
+def test_perfil_carga_escrita_interrompida(tmp_path, plano):
+    perfil = PerfilCarga(tmp_path / "cpe")
+    perfil.acrescentar(np.arange(0, 100 * 900, 900), np.ones(100))
+    perfil.periodos(Ciclo_Semanal)
+
+    # Escrita interrompida: kWh de 3 leituras e parte do instante da primeira
+    with open(tmp_path / "cpe" / "kwh.f4", "ab") as f:
+        np.ones(3, dtype="<f4").tofile(f)
+    with open(tmp_path / "cpe" / "epoch.i8", "ab") as f:
+        f.write(b"\x00" * 5)
+
+    perfil = PerfilCarga(tmp_path / "cpe")
+    assert len(perfil) == len(perfil.kwh) == len(perfil.periodos(Ciclo_Semanal)) == 100
+
+    perfil.acrescentar(np.arange(100 * 900, 110 * 900, 900), np.full(10, 2))
+    assert len(perfil.kwh) == 110 and perfil.kwh[100:].tolist() == [2] * 10
+    assert (perfil.periodos(Ciclo_Semanal) == Ciclo_Semanal.classify_epoch(perfil.epochs)).all()
+
+    # Instantes (e a sua classificação) sem os kWh correspondentes
+    with open(tmp_path / "cpe" / "epoch.i8", "ab") as f:
+        np.arange(110 * 900, 115 * 900, 900).astype("<i8").tofile(f)
+    [sidecar] = (tmp_path / "cpe").glob("periodos-*")
+    with open(sidecar, "ab") as f:
+        f.write(bytes(5))
+
+    perfil = PerfilCarga(tmp_path / "cpe")
+    assert len(perfil) == len(perfil.kwh) == len(perfil.periodos(Ciclo_Semanal)) == 110
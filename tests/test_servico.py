@@ -0,0 +1,145 @@
+from datetime import datetime
+import http.client
+import json
+import socket
+import threading
+
+import pytest
+
+from pyerse.comercializador import Opcao_Horaria, Tarifa
+from pyerse.servico import ServicoException, ServicoTarifas, ServidorHTTP, ServidorUnix, plano_json
+
+CASA = {
+    "nome": "casa",
+    "potencia": 6.9,
+    "opcao": "Bi-Horária",
+    "ciclo": "Ciclo Semanal",
+    "precos": {"Vazio": 0.0958, "Fora de Vazio": 0.1815},
+    "preco_potencia": 0.3147,
+}
+
+
+class _LigacaoUnix(http.client.HTTPConnection):
+    def __init__(self, caminho):
+        super().__init__("localhost")
+        self._caminho = caminho
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self._caminho)
+
+
+def pedido(ligacao, metodo, caminho, corpo=None):
+    ligacao.request(metodo, caminho, body=json.dumps(corpo) if corpo is not None else None)
+    resposta = ligacao.getresponse()
+    return resposta.status, json.loads(resposta.read())
+
+
+@pytest.fixture
+def servidor_http():
+    servidor = ServidorHTTP(ServicoTarifas(), ("127.0.0.1", 0))
+    threading.Thread(target=servidor.serve_forever, args=(0.05,), daemon=True).start()
+    yield servidor
+    servidor.shutdown()
+    servidor.server_close()
+
+
+def test_plano_json():
+    plano = plano_json(CASA)
+
+    assert plano.opcao_horaria == Opcao_Horaria.BI_HORARIA
+    assert plano.custo_tarifa(Tarifa.VAZIO) == 0.0958
+    with pytest.raises(ServicoException):
+        plano_json({**CASA, "potencia": 7})
+    with pytest.raises(ServicoException):
+        plano_json({**CASA, "ciclo": None})
+
+
+def test_consultar():
+    servico = ServicoTarifas()
+    servico.registar("casa", plano_json(CASA))
+    plano = plano_json(CASA)
+
+    resultados = servico.consultar(
+        [
+            {"plano": "casa", "tipo": "tarifa", "instante": "2025-05-05T10:00:00"},
+            {"plano": "casa", "tipo": "transicao", "instante": "2025-05-05T10:00:00"},
+            {"plano": "casa", "tipo": "preco", "kwh": 100, "instante": "2025-05-06T01:00:00"},
+            {"plano": "casa"},
+            {"plano": "outro"},
+            {"plano": "casa", "tipo": "fatura"},
+        ],
+        agora=datetime(2025, 5, 6, 1, 0),
+    )
+
+    assert resultados[:4] == [
+        {"tarifa": "Fora de Vazio"},
+        {"instante": "2025-05-06T00:00:00", "tarifa": "Vazio"},
+        {"tarifa": "Vazio", "preco": plano.custo_kWh_actual(100, now=datetime(2025, 5, 6, 1, 0))},
+        {"tarifa": "Vazio"},
+    ]
+    assert all("erro" in resultado for resultado in resultados[4:])
+
+
+def test_consultar_com_desvio_utc():
+    servico = ServicoTarifas()
+    servico.registar("casa", plano_json(CASA))
+
+    # O mesmo instante (07:30 em Lisboa, hora de Verão) escrito com desvios diferentes
+    resultados = servico.consultar(
+        [
+            {"plano": "casa", "tipo": tipo, "instante": instante}
+            for instante in ("2025-07-01T06:30:00+00:00", "2025-07-01T07:30:00+01:00", "2025-07-01T07:30:00")
+            for tipo in ("tarifa", "transicao")
+        ]
+    )
+
+    assert resultados == [
+        {"tarifa": "Fora de Vazio"},
+        {"instante": "2025-07-01T23:00:00+00:00", "tarifa": "Vazio"},
+        {"tarifa": "Fora de Vazio"},
+        {"instante": "2025-07-02T00:00:00+01:00", "tarifa": "Vazio"},
+        {"tarifa": "Fora de Vazio"},
+        {"instante": "2025-07-02T00:00:00", "tarifa": "Vazio"},
+    ]
+
+    # Antes da mudança para fora de vazio (07:00 em Lisboa, 06:00 UTC)
+    [transicao] = servico.consultar([{"plano": "casa", "tipo": "transicao", "instante": "2025-07-01T05:30:00+00:00"}])
+    assert transicao == {"instante": "2025-07-01T06:00:00+00:00", "tarifa": "Fora de Vazio"}
+
+
+def test_servidor_http(servidor_http):
+    ligacao = http.client.HTTPConnection(*servidor_http.server_address)
+
+    assert pedido(ligacao, "POST", "/planos", CASA) == (201, {"nome": "casa"})
+    assert pedido(ligacao, "GET", "/planos") == (200, {"casa": str(plano_json(CASA))})
+
+    # Vários lotes na mesma ligação (keep-alive)
+    for _ in range(3):
+        estado, resposta = pedido(
+            ligacao, "POST", "/consultas", {"consultas": [{"plano": "casa", "instante": "2025-05-04T10:00"}] * 100}
+        )
+        assert estado == 200
+        assert resposta["resultados"] == [{"tarifa": "Vazio"}] * 100
+
+    assert pedido(ligacao, "POST", "/planos", {**CASA, "opcao": "Quadri-Horária"})[0] == 400
+    assert pedido(ligacao, "POST", "/consultas", {})[0] == 400
+    ligacao.close()
+
+
+def test_servidor_unix(tmp_path):
+    caminho = str(tmp_path / "pyerse.sock")
+    servico = ServicoTarifas()
+    servico.registar("casa", plano_json(CASA))
+    servidor = ServidorUnix(servico, caminho)
+    threading.Thread(target=servidor.serve_forever, args=(0.05,), daemon=True).start()
+    try:
+        estado, resposta = pedido(
+            _LigacaoUnix(caminho), "POST", "/consultas", {"consultas": [{"plano": "casa", "tipo": "transicao"}]}
+        )
+    finally:
+        servidor.shutdown()
+        servidor.server_close()
+
+    assert estado == 200
+    assert resposta["resultados"][0]["tarifa"] in ("Vazio", "Fora de Vazio")
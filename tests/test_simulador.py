@@ -0,0 +1,105 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("requests")
+from pyerse.simulador import Oferta, Simulador
+
+
+def test_melhor_tarifa(simulador_local):
+    s = Simulador(6.9, "2021-08-01", "2021-08-31", url=simulador_local.url)
+
+    assert s.melhor_tarifa_simples(220) == ("Beta - Verde", pytest.approx(0.15 * 220 + 0.35 * 30))
+    assert s.melhor_tarifa_bihorario(120, 100) == ("Gama - Base", pytest.approx(0.18 * 120 + 0.11 * 100 + 0.25 * 30))
+    # O simulador ordena sem o termo fixo: Delta passa à frente da primeira oferta (Beta)
+    assert s.melhor_tarifa_trihorario(20, 100, 100)[0] == "Delta - Fixo"
+    # Cada simulação lê as ofertas até à primeira página vazia
+    assert [pedido["cycle"] for pedido in simulador_local.pedidos] == ["1", "1", "2", "2", "3", "3"]
+    assert simulador_local.pedidos[0]["electSupply"] == "5"
+
+
+def test_async_simulador(simulador_local):
+    pytest.importorskip("aiohttp")
+    from pyerse.simulador_async import AsyncSimulador
+
+    simulador_local.demora = 0.02
+    simulador_local.falhas = 2
+
+    async def simular():
+        async with AsyncSimulador(6.9, "2021-08-01", "2021-08-31", url=simulador_local.url, concorrencia=3, espera=0.01) as s:
+            simples = await s.melhor_tarifa_simples(220)
+            resultados = await s.lote(
+                [(6.9, "2021-08-01", "2021-08-31", (220,)) for _ in range(10)]
+                + [(3.45, "2021-08-01", "2021-08-11", (120, 100))]
+            )
+        return simples, resultados
+
+    simples, resultados = asyncio.run(simular())
+
+    esperado = Simulador(6.9, "2021-08-01", "2021-08-31", url=simulador_local.url).melhor_tarifa_simples(220)
+    assert simples == esperado
+    assert resultados[:10] == [esperado] * 10
+    assert resultados[10] == ("Delta - Fixo", pytest.approx(0.185 * 120 + 0.095 * 100 + 0.32 * 10))
+    assert simulador_local.max_em_curso <= 3
+    assert len(simulador_local.pedidos) == 2 * (1 + 11 + 1) + 2
+
+
+@pytest.mark.parametrize("codigo, pedidos", [(429, 2), (500, 2), (400, 1), (404, 1)])
+def test_async_simulador_repeticoes(simulador_local, codigo, pedidos):
+    aiohttp = pytest.importorskip("aiohttp")
+    from pyerse.simulador_async import AsyncSimulador
+
+    simulador_local.falhas = 1
+    simulador_local.codigo_falha = codigo
+
+    async def simular():
+        async with AsyncSimulador(6.9, "2021-08-01", "2021-08-31", url=simulador_local.url, espera=0.01) as s:
+            return await s.melhor_tarifa_simples(220)
+
+    if pedidos == 1:
+        with pytest.raises(aiohttp.ClientResponseError):
+            asyncio.run(simular())
+    else:
+        assert asyncio.run(simular())[0] == "Beta - Verde"
+    assert len(simulador_local.pedidos) == pedidos + (pedidos > 1)
+
+
+def test_ofertas_paginadas(simulador_local):
+    s = Simulador(6.9, "2021-08-01", "2021-08-31", url=simulador_local.url)
+
+    ofertas = list(s.ofertas(120, 100, tamanho_pagina=3))
+
+    assert [str(oferta) for oferta in ofertas] == ["Delta - Fixo", "Gama - Base", "Alfa - Casa", "Beta - Verde"]
+    assert ofertas[0] == Oferta("Delta", "Fixo", (0.185, 0.095, None), 0.32)
+    assert [(p["pageStartIndex"], p["pageStep"]) for p in simulador_local.pedidos] == [("0", "3"), ("3", "3"), ("4", "3")]
+
+
+def test_ofertas_paginas_limitadas(simulador_local):
+    # O servidor devolve menos ofertas por página do que as pedidas: não é o fim da lista
+    simulador_local.max_pagina = 1
+    s = Simulador(6.9, "2021-08-01", "2021-08-31", url=simulador_local.url)
+
+    assert len(list(s.ofertas(120, 100))) == 4
+    assert s.melhor_tarifa_trihorario(20, 100, 100)[0] == "Delta - Fixo"
+    assert [p["pageStartIndex"] for p in simulador_local.pedidos] == ["0", "1", "2", "3", "4"] * 2
+
+
+def test_melhores_ofertas(simulador_local):
+    s = Simulador(6.9, "2021-08-01", "2021-08-31", url=simulador_local.url)
+
+    melhores = s.melhores_ofertas(2, 20, 100, 100, tamanho_pagina=2)
+
+    # O custo fixo entra na ordenação: Delta ultrapassa a primeira oferta do simulador
+    assert [str(oferta) for oferta, _ in melhores] == ["Delta - Fixo", "Beta - Verde"]
+    assert melhores[0][1] == pytest.approx(0.245 * 20 + 0.165 * 100 + 0.095 * 100 + 0.32 * 30)
+    assert melhores[0][1] == s.melhor_tarifa_trihorario(20, 100, 100)[1]
+
+
+def test_melhor_tarifa_com_e_sem_cache(simulador_local):
+    from pyerse.cache import CacheSimulador
+
+    sem_cache = Simulador(6.9, "2021-08-01", "2021-08-31", url=simulador_local.url)
+    com_cache = Simulador(6.9, "2021-08-01", "2021-08-31", url=simulador_local.url, cache=CacheSimulador())
+
+    for consumos in [(220,), (500, 10), (10, 500), (20, 100, 100), (100, 20, 300)]:
+        assert sem_cache._simular(*consumos) == com_cache._simular(*consumos)